@@ -12,7 +12,7 @@ if PROJECT_ROOT not in sys.path:
     sys.path.insert(0, PROJECT_ROOT)
 
 import streamlit as st
-from src.rag_pipeline import RAGPipeline
+from src.rag_pipeline import get_shared_pipeline
 
 # --------------------------------------------------
 # Page Config
@@ -25,23 +25,32 @@ st.set_page_config(
 st.title("📚 Mi asistente personal: Mr. Research Copilot")
 
 # --------------------------------------------------
-# Initialize Pipeline Once
+# Shared Pipeline (once per process, not per session)
 # --------------------------------------------------
-if "pipeline" not in st.session_state:
-    st.session_state.pipeline = RAGPipeline()
+@st.cache_resource(show_spinner="Warming up Research Copilot...")
+def load_pipeline():
+    pipeline = get_shared_pipeline()
+    pipeline.warm_up()
+    return pipeline
+
+pipeline = load_pipeline()
+
+# Per-session state is only the conversation
+if "history" not in st.session_state:
+    st.session_state.history = []
 
 # --------------------------------------------------
 # Strategy Selector
 # --------------------------------------------------
-strategy = st.selectbox(
-    "Select Prompt Strategy",
-    [
-        "v1_delimiters",
-        "v2_json_output",
-        "v3_few_shot",
-        "v4_chain_of_thought"
-    ]
-)
+strategies = pipeline.generator.prompts.strategies()
+
+compare_mode = st.toggle("Compare all strategies side by side")
+
+if not compare_mode:
+    strategy = st.selectbox(
+        "Select Prompt Strategy",
+        strategies
+    )
 
 # --------------------------------------------------
 # User Input
@@ -50,15 +59,24 @@ question = st.text_input("Ask a research question:")
 
 result = None  # ✅ Prevent NameError
 
-if st.button("Ask") and question.strip():
+clicked = st.button("Compare" if compare_mode else "Ask") and question.strip()
+
+if clicked and not compare_mode:
 
     with st.spinner("Processing..."):
 
-        result = st.session_state.pipeline.query(
+        result = pipeline.query(
             question,
             strategy=strategy
         )
 
+    st.session_state.history.append({
+        "question": question,
+        "strategy": strategy,
+        "answer": result.get("answer"),
+        "citations": result.get("citations", [])
+    })
+
     # --------------------------------------------------
     # Show Answer
     # --------------------------------------------------
@@ -73,6 +91,43 @@ if st.button("Ask") and question.strip():
         for citation in result["citations"]:
             st.markdown(citation)
 
+elif clicked:
+
+    # --------------------------------------------------
+    # Comparison View (answers render as they complete)
+    # --------------------------------------------------
+    with st.spinner("Retrieving context..."):
+        retrieved_chunks, results = pipeline.compare_stream(
+            question,
+            strategies
+        )
+
+    columns = st.columns(len(strategies))
+    slots = {}
+
+    for column, name in zip(columns, strategies):
+        column.subheader(name)
+        slots[name] = column.empty()
+        slots[name].info("Waiting for answer...")
+
+    for item in results:
+        with slots[item["strategy"]].container():
+            if item["error"]:
+                st.error(item["error"])
+                continue
+
+            st.caption(
+                f"⏱️ {item['latency_ms']:.0f} ms · "
+                f"🔤 {item['prompt_tokens']} prompt / "
+                f"{item['completion_tokens']} completion tokens"
+            )
+            st.write(item["answer"])
+
+            for citation in item["citations"]:
+                st.markdown(citation)
+
+    result = {"retrieved_chunks": retrieved_chunks}
+
 # --------------------------------------------------
 # Show Retrieved Sources ONLY if result exists
 # --------------------------------------------------
@@ -101,4 +156,18 @@ if result:
             st.markdown("---")
 
     else:
-        st.info("No sources retrieved.")
\ No newline at end of file
+        st.info("No sources retrieved.")
+
+# --------------------------------------------------
+# Conversation History (this session only)
+# --------------------------------------------------
+if st.session_state.history:
+
+    with st.expander(f"🕘 Conversation history ({len(st.session_state.history)})"):
+
+        for turn in reversed(st.session_state.history):
+            st.markdown(f"**Q ({turn['strategy']}):** {turn['question']}")
+            st.write(turn["answer"])
+            for citation in turn["citations"]:
+                st.caption(citation)
+            st.markdown("---")
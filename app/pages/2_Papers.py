@@ -1,6 +1,20 @@
+import sys
+import os
+
+# --------------------------------------------------
+# Add project root to path
+# --------------------------------------------------
+PROJECT_ROOT = os.path.abspath(
+    os.path.join(os.path.dirname(__file__), "..", "..")
+)
+
+if PROJECT_ROOT not in sys.path:
+    sys.path.insert(0, PROJECT_ROOT)
+
+import math
 import streamlit as st
-import json
-from typing import List, Dict
+
+from src.catalog.catalog import get_catalog
 
 # --------------------------------------------------
 # Page config
@@ -13,60 +27,48 @@ st.set_page_config(
 st.title("📄 Paper Browser")
 
 # --------------------------------------------------
-# Load paper catalog
+# Load paper catalog + indexes (rebuilt only when the file changes)
 # --------------------------------------------------
-@st.cache_data
-def load_catalog() -> Dict:
-    with open("papers/paper_catalog.json", "r", encoding="utf-8") as f:
-        return json.load(f)
+index = get_catalog().browser_index()
 
-catalog = load_catalog().get("papers", [])
-
-if not catalog:
+if not index.papers:
     st.warning("No papers found in the catalog.")
     st.stop()
 
-# --------------------------------------------------
-# Unique filters
-# --------------------------------------------------
-titles = sorted({paper.get("title", "") for paper in catalog})
-authors = sorted({", ".join(paper.get("authors", [])) for paper in catalog})
-years = sorted({paper.get("year", "") for paper in catalog})
-topics = sorted({topic for paper in catalog for topic in paper.get("topics", [])})
-
 # --------------------------------------------------
 # Sidebar filters
 # --------------------------------------------------
 st.sidebar.header("🔍 Filters")
 
-selected_title = st.sidebar.multiselect("Title", titles)
-selected_author = st.sidebar.multiselect("Author", authors)
-selected_year = st.sidebar.multiselect("Year", years)
-selected_topic = st.sidebar.multiselect("Topic", topics)
+search_text = st.sidebar.text_input("Search titles & abstracts")
+selected_title = st.sidebar.multiselect("Title", index.options["title"])
+selected_author = st.sidebar.multiselect("Author", index.options["author"])
+selected_year = st.sidebar.multiselect("Year", index.options["year"])
+selected_topic = st.sidebar.multiselect("Topic", index.options["topic"])
+
+page_size = st.sidebar.selectbox("Papers per page", [10, 25, 50, 100], index=1)
 
 # --------------------------------------------------
-# Filtering logic
+# Filtering logic (inverted-index intersection)
 # --------------------------------------------------
-def apply_filters(papers):
-    filtered = []
-    for paper in papers:
-        tmatch = (not selected_title) or (paper.get("title") in selected_title)
-        amatch = (not selected_author) or (", ".join(paper.get("authors", [])) in selected_author)
-        ymatch = (not selected_year) or (paper.get("year") in selected_year)
-        tpmatch = (not selected_topic) or bool(set(paper.get("topics", [])).intersection(set(selected_topic)))
-
-        if tmatch and amatch and ymatch and tpmatch:
-            filtered.append(paper)
-    return filtered
+matches = index.filter(
+    titles=selected_title,
+    authors=selected_author,
+    years=selected_year,
+    topics=selected_topic,
+    text=search_text
+)
 
-filtered_papers = apply_filters(catalog)
+total_pages = max(math.ceil(len(matches) / page_size), 1)
 
 # --------------------------------------------------
-# Display
+# Display (only the visible page is rendered)
 # --------------------------------------------------
-st.markdown(f"### 📚 Showing {len(filtered_papers)} papers")
+col_count, col_page = st.columns([3, 1])
+page = col_page.number_input("Page", min_value=1, max_value=total_pages, value=1, step=1)
+col_count.markdown(f"### 📚 Showing {len(matches)} papers (page {page} of {total_pages})")
 
-for paper in filtered_papers:
+for paper in index.page(matches, page, page_size):
 
     with st.expander(f"{paper.get('title', 'Unknown Title')} ({paper.get('year', 'n.d.')})"):
 
@@ -81,4 +83,4 @@ for paper in filtered_papers:
         if paper.get("topics"):
             st.markdown(f"**Topics:** {', '.join(paper.get('topics', []))}")
 
-        st.markdown("---")
\ No newline at end of file
+        st.markdown("---")
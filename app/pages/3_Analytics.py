@@ -1,45 +1,189 @@
+import sys
+import os
+
+# --------------------------------------------------
+# Add project root to path
+# --------------------------------------------------
+PROJECT_ROOT = os.path.abspath(
+    os.path.join(os.path.dirname(__file__), "..", "..")
+)
+
+if PROJECT_ROOT not in sys.path:
+    sys.path.insert(0, PROJECT_ROOT)
+
 import streamlit as st
 import pandas as pd
-import json
-import os
 import plotly.express as px
 
-# Load Paper Catalog
-catalog_path = os.path.join("papers", "paper_catalog.json")
+from src.catalog.catalog import get_catalog
+from src.analytics.snapshot import catalog_aggregates, load_snapshot, read_manifest
+from src.observability.usage import get_usage_store
+
+# --------------------------------------------------
+# Load data: ingest-time snapshot, cached per index version
+# --------------------------------------------------
+@st.cache_data
+def load_index_snapshot(index_version: str) -> dict:
+    return load_snapshot()
+
+
+@st.cache_data
+def load_catalog_only(catalog_version: int) -> dict:
+    papers = [paper.to_dict() for paper in get_catalog().papers]
+    return {
+        "papers": pd.DataFrame(papers),
+        "aggregates": pd.DataFrame(catalog_aggregates(papers)),
+    }
+
+
+@st.cache_data(ttl=30)
+def load_usage() -> dict:
+    # Only the app's own traffic; benchmark / load-test rows are tagged otherwise
+    store = get_usage_store()
+    return {
+        "runs": pd.DataFrame(store.runs(limit=5000, source="app")),
+        "totals": pd.DataFrame(store.totals(source="app")),
+    }
+
+
+manifest = read_manifest()
+
 try:
-    with open(catalog_path, "r", encoding="utf-8") as f:
-        catalog = json.load(f)
-    papers = catalog.get("papers", [])
+    if manifest:
+        data = load_index_snapshot(manifest["index_version"])
+    else:
+        data = load_catalog_only(get_catalog().version)
 except Exception as e:
-    st.error(f"Error reading paper catalog: {e}")
-    papers = []
+    st.error(f"Error reading analytics data: {e}")
+    st.stop()
+
+df = data["papers"]
+aggregates = data["aggregates"]
 
-if not papers:
+if df.empty:
     st.warning("No papers available for analytics.")
     st.stop()
 
-df = pd.DataFrame(papers)
+
+def counts(dimension: str, label: str) -> pd.DataFrame:
+    rows = aggregates[aggregates["dimension"] == dimension][["value", "count"]]
+    return rows.rename(columns={"value": label, "count": "Count"})
+
 
 st.title("📊 Analytics Dashboard")
 
+if not manifest:
+    st.info("No index snapshot yet — run `python -m src.ingest` to add index health. Showing catalog statistics only.")
+
 # --------------------------------------------------
 # KPI Cards
 # --------------------------------------------------
+year_counts = counts("year", "Year")
+years = year_counts["Year"].astype(int) if not year_counts.empty else pd.Series(dtype=int)
+
 col1, col2, col3, col4 = st.columns(4)
 col1.metric("📄 Total Papers", len(df))
-col2.metric("👥 Unique Authors", df.explode("authors")["authors"].nunique() if "authors" in df.columns else 0)
-col3.metric("📅 Year Range", f"{int(df['year'].min())} – {int(df['year'].max())}" if "year" in df.columns else "N/A")
-col4.metric("🏛️ Venues", df["venue"].nunique() if "venue" in df.columns else 0)
+col2.metric("👥 Unique Authors", len(counts("author", "Author")))
+col3.metric("📅 Year Range", f"{years.min()} – {years.max()}" if not years.empty else "N/A")
+col4.metric("🏛️ Venues", len(counts("venue", "Venue")))
 
 st.divider()
 
+# --------------------------------------------------
+# Index Health (from the ingest snapshot)
+# --------------------------------------------------
+if manifest:
+    st.subheader("🩺 Index Health")
+
+    h1, h2, h3, h4 = st.columns(4)
+    h1.metric("🧩 Chunks", manifest["chunks"])
+    h2.metric("✅ Papers Indexed", f"{manifest['papers_indexed']}/{manifest['papers']}")
+    h3.metric("✂️ Chunk Size / Overlap", f"{manifest['chunk_size']} / {manifest['chunk_overlap']}")
+    h4.metric("🔢 Embedding Model", manifest["embedding_model"])
+    st.caption(f"Index version `{manifest['index_version']}` · built {manifest['created_at']}")
+
+    col_h, col_c = st.columns(2)
+
+    with col_h:
+        chunks = data["chunks"]
+        if not chunks.empty:
+            fig_tokens = px.histogram(chunks, x="token_count", nbins=30,
+                                      labels={"token_count": "Tokens per chunk"})
+            fig_tokens.update_layout(title="Token count distribution", showlegend=False)
+            st.plotly_chart(fig_tokens, use_container_width=True)
+
+    with col_c:
+        indexed = df[df["indexed"]].sort_values("chunk_count", ascending=False)
+        fig_chunks = px.bar(indexed, x="chunk_count", y="id", orientation="h",
+                            labels={"chunk_count": "Chunks", "id": "Paper"})
+        fig_chunks.update_layout(title="Chunks per paper", yaxis=dict(autorange="reversed"))
+        st.plotly_chart(fig_chunks, use_container_width=True)
+
+    timing_cols = ["id", "pages", "chunk_count", "tokens_mean", "extraction_ms", "chunking_ms", "embedding_ms"]
+    st.dataframe(indexed[timing_cols], use_container_width=True)
+
+    missing = df[~df["indexed"]]
+    if not missing.empty:
+        st.warning(f"{len(missing)} catalog papers are not in the index: {', '.join(missing['id'])}")
+
+    st.divider()
+
+# --------------------------------------------------
+# Token Usage & Cost (from the usage store)
+# --------------------------------------------------
+usage = load_usage()
+runs = usage["runs"]
+
+if not runs.empty:
+    st.subheader("💸 Token Usage & Cost")
+
+    runs["time"] = pd.to_datetime(runs["ts"], unit="s")
+    runs["total_tokens"] = runs["embedding_tokens"] + runs["prompt_tokens"] + runs["completion_tokens"]
+    queries = runs[runs["scope"] == "query"]
+    ingests = runs[runs["scope"] == "ingest"]
+
+    u1, u2, u3, u4 = st.columns(4)
+    u1.metric("💵 Total Cost", f"${runs['cost_usd'].sum():.4f}")
+    u2.metric("❓ Queries", len(queries))
+    u3.metric("🔤 Tokens / Query", f"{queries['total_tokens'].mean():,.0f}" if not queries.empty else "N/A")
+    u4.metric("💲 Cost / Query", f"${queries['cost_usd'].mean():.5f}" if not queries.empty else "N/A")
+
+    col_m, col_q = st.columns(2)
+
+    with col_m:
+        totals = usage["totals"]
+        if not totals.empty:
+            fig_cost = px.bar(totals, x="cost_usd", y="model", color="scope", orientation="h",
+                              labels={"cost_usd": "Cost (USD)", "model": "Model", "scope": "Scope"})
+            fig_cost.update_layout(title="Cost by model")
+            st.plotly_chart(fig_cost, use_container_width=True)
+
+    with col_q:
+        if not queries.empty:
+            fig_latency = px.scatter(queries, x="prompt_tokens", y="duration_ms",
+                                     hover_data=["label", "completion_tokens", "cost_usd"],
+                                     labels={"prompt_tokens": "Prompt tokens", "duration_ms": "Latency (ms)"})
+            fig_latency.update_layout(title="Query latency vs prompt tokens")
+            st.plotly_chart(fig_latency, use_container_width=True)
+
+    if not ingests.empty:
+        st.caption(
+            f"Ingest: {ingests['embedding_tokens'].sum():,} embedding tokens "
+            f"(${ingests['cost_usd'].sum():.4f}) over {len(ingests)} runs"
+        )
+
+    usage_cols = ["time", "scope", "label", "embedding_tokens", "prompt_tokens",
+                  "completion_tokens", "cost_usd", "duration_ms", "estimated"]
+    st.dataframe(runs[usage_cols].head(200), use_container_width=True)
+
+    st.divider()
+
 # --------------------------------------------------
 # Papers by Year
 # --------------------------------------------------
 st.subheader("📆 Papers by Year")
-if "year" in df.columns:
-    year_counts = df["year"].value_counts().sort_index().reset_index()
-    year_counts.columns = ["Year", "Count"]
+if not year_counts.empty:
+    year_counts = year_counts.assign(Year=years).sort_values("Year")
     fig = px.bar(year_counts, x="Year", y="Count", color="Count",
                  color_continuous_scale="Blues", text="Count")
     fig.update_traces(textposition="outside")
@@ -55,17 +199,15 @@ col_a, col_b = st.columns(2)
 
 with col_a:
     st.subheader("🏛️ Papers by Venue")
-    if "venue" in df.columns:
-        venue_counts = df["venue"].value_counts().reset_index()
-        venue_counts.columns = ["Venue", "Count"]
+    venue_counts = counts("venue", "Venue")
+    if not venue_counts.empty:
         fig2 = px.pie(venue_counts, names="Venue", values="Count", hole=0.4)
         st.plotly_chart(fig2, use_container_width=True)
 
 with col_b:
     st.subheader("📂 Papers by Section")
-    if "section" in df.columns:
-        section_counts = df["section"].dropna().value_counts().reset_index()
-        section_counts.columns = ["Section", "Count"]
+    section_counts = counts("section", "Section")
+    if not section_counts.empty:
         fig3 = px.bar(section_counts, x="Count", y="Section", orientation="h",
                       color="Count", color_continuous_scale="Purples")
         fig3.update_layout(coloraxis_showscale=False, yaxis=dict(autorange="reversed"))
@@ -77,21 +219,14 @@ st.divider()
 # Topics Distribution
 # --------------------------------------------------
 st.subheader("🏷️ Topic Distribution")
-if "topics" in df.columns:
-    df["topics"] = df["topics"].apply(lambda x: x if isinstance(x, list) else [])
-    topics_expanded = df.explode("topics")
-    valid_topics = topics_expanded["topics"].dropna()
-    if not valid_topics.empty:
-        topic_counts = valid_topics.value_counts().head(20).reset_index()
-        topic_counts.columns = ["Topic", "Count"]
-        fig4 = px.bar(topic_counts, x="Count", y="Topic", orientation="h",
-                      color="Count", color_continuous_scale="Greens")
-        fig4.update_layout(coloraxis_showscale=False, yaxis=dict(autorange="reversed"))
-        st.plotly_chart(fig4, use_container_width=True)
-    else:
-        st.info("No topic entries available. Add 'topics' field to your paper_catalog.json.")
+topic_counts = counts("topic", "Topic").head(20)
+if not topic_counts.empty:
+    fig4 = px.bar(topic_counts, x="Count", y="Topic", orientation="h",
+                  color="Count", color_continuous_scale="Greens")
+    fig4.update_layout(coloraxis_showscale=False, yaxis=dict(autorange="reversed"))
+    st.plotly_chart(fig4, use_container_width=True)
 else:
-    st.info("No 'topics' field found in paper catalog.")
+    st.info("No topic entries available. Add 'topics' field to your paper_catalog.json.")
 
 st.divider()
 
@@ -99,17 +234,12 @@ st.divider()
 # Authors Distribution
 # --------------------------------------------------
 st.subheader("👥 Top Authors")
-if "authors" in df.columns:
-    df["authors"] = df["authors"].apply(lambda x: x if isinstance(x, list) else [])
-    authors_expanded = df.explode("authors")
-    valid_authors = authors_expanded["authors"].dropna()
-    if not valid_authors.empty:
-        author_counts = valid_authors.value_counts().head(15).reset_index()
-        author_counts.columns = ["Author", "Count"]
-        fig5 = px.bar(author_counts, x="Count", y="Author", orientation="h",
-                      color="Count", color_continuous_scale="Oranges")
-        fig5.update_layout(coloraxis_showscale=False, yaxis=dict(autorange="reversed"))
-        st.plotly_chart(fig5, use_container_width=True)
+author_counts = counts("author", "Author").head(15)
+if not author_counts.empty:
+    fig5 = px.bar(author_counts, x="Count", y="Author", orientation="h",
+                  color="Count", color_continuous_scale="Oranges")
+    fig5.update_layout(coloraxis_showscale=False, yaxis=dict(autorange="reversed"))
+    st.plotly_chart(fig5, use_container_width=True)
 
 st.divider()
 
@@ -0,0 +1,126 @@
+"""
+fakes.py — Deterministic offline stand-ins for the OpenAI backends.
+
+They expose the same surface as the real classes so the benchmark runs
+the production code paths (TokenChunker, ChromaVectorStore, Retriever,
+Generator) with no network access.
+"""
+
+import hashlib
+import math
+import re
+import time
+
+
+# ---------------------------------------------------
+# Embeddings
+# ---------------------------------------------------
+class FakeEmbedder:
+    """
+    Feature-hashing embedder: same text -> same vector, similar texts
+    share dimensions. Interface matches OpenAIEmbedder.
+    """
+
+    def __init__(self, dim: int = 256, latency_ms: float = 0.0, model: str = "fake-embedding"):
+        self.dim = dim
+        self.latency_ms = latency_ms
+        self.model = model
+        self.calls = 0
+
+    def _embed(self, text: str) -> list[float]:
+        vector = [0.0] * self.dim
+
+        for word in re.findall(r"\w+", text.lower()):
+            digest = hashlib.blake2b(word.encode("utf-8"), digest_size=8).digest()
+            bucket = int.from_bytes(digest[:4], "little") % self.dim
+            sign = 1.0 if digest[4] & 1 else -1.0
+            vector[bucket] += sign
+
+        norm = math.sqrt(sum(v * v for v in vector)) or 1.0
+        return [v / norm for v in vector]
+
+    def embed_texts(self, texts: list[str], model: str = None) -> list[list[float]]:
+        self.calls += 1
+        if self.latency_ms:
+            time.sleep(self.latency_ms / 1000)
+        return [self._embed(text) for text in texts]
+
+    def embed_query(self, query: str, model: str = None) -> list[float]:
+        return self.embed_texts([query])[0]
+
+
+# ---------------------------------------------------
+# Chat model
+# ---------------------------------------------------
+class FakeMessage:
+    def __init__(self, content: str, input_tokens: int, output_tokens: int):
+        self.content = content
+        self.usage_metadata = {
+            "input_tokens": input_tokens,
+            "output_tokens": output_tokens,
+            "total_tokens": input_tokens + output_tokens
+        }
+
+
+class FakeLLM:
+    """
+    Stand-in for ChatOpenAI.invoke returning a canned, deterministic answer.
+    """
+
+    model_name = "fake-llm"
+
+    def __init__(self, latency_ms: float = 0.0):
+        self.latency_ms = latency_ms
+
+    def invoke(self, messages):
+        if self.latency_ms:
+            time.sleep(self.latency_ms / 1000)
+
+        prompt = "".join(str(m.content) for m in messages)
+        digest = hashlib.blake2b(prompt.encode("utf-8"), digest_size=4).hexdigest()
+        answer = f"Synthetic answer {digest} based on the provided context."
+
+        return FakeMessage(answer, len(prompt.split()), len(answer.split()))
+
+
+# ---------------------------------------------------
+# Tokenizer fallback
+# ---------------------------------------------------
+class FakeEncoder:
+    """
+    Offline tokenizer with tiktoken's encode/decode surface.
+    Words (plus trailing whitespace) are tokens, so decode is lossless.
+    Only used when the tiktoken BPE files cannot be downloaded.
+    """
+
+    name = "offline-words"
+
+    def __init__(self):
+        self._ids = {}
+        self._pieces = []
+
+    def encode(self, text: str) -> list[int]:
+        tokens = []
+        for piece in re.findall(r"\S+\s*|\s+", text):
+            token = self._ids.get(piece)
+            if token is None:
+                token = len(self._pieces)
+                self._ids[piece] = token
+                self._pieces.append(piece)
+            tokens.append(token)
+        return tokens
+
+    def decode(self, tokens: list[int]) -> str:
+        return "".join(self._pieces[t] for t in tokens)
+
+
+def load_encoder(model: str):
+    """
+    Real tiktoken encoder when available, FakeEncoder when offline.
+    """
+    import tiktoken
+
+    try:
+        return tiktoken.encoding_for_model(model)
+    except Exception:
+        return FakeEncoder()
@@ -0,0 +1,118 @@
+"""
+import_time.py — Where does cold-start time go?
+
+Imports each module in a fresh interpreter with `python -X importtime` and
+reports total import time, the slowest top-level packages (cumulative)
+and the slowest individual modules (self time). Use --budget-ms to fail
+when an entry point regresses.
+
+Usage:
+    python -m benchmarks.import_time
+    python -m benchmarks.import_time --modules src.main src.rag_pipeline --top 15
+    python -m benchmarks.import_time --modules src.main --budget-ms 800
+"""
+
+import argparse
+import os
+import re
+import subprocess
+import sys
+from pathlib import Path
+
+
+PROJECT_ROOT = Path(__file__).resolve().parent.parent
+
+LINE_PATTERN = re.compile(r"^import time:\s+(\d+) \|\s+(\d+) \|(\s*)(\S+)$")
+
+# Importing these must stay cheap: they are only needed when used
+HEAVY_MODULES = ("chromadb", "langchain_openai", "langchain_core", "openai", "tiktoken")
+
+
+def profile_import(module: str) -> list[dict]:
+    """
+    Rows of (module, self_us, cumulative_us, depth) from -X importtime.
+    """
+    env = {**os.environ, "PYTHONPATH": str(PROJECT_ROOT)}
+    completed = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", f"import {module}"],
+        cwd=PROJECT_ROOT,
+        env=env,
+        capture_output=True,
+        text=True
+    )
+
+    if completed.returncode != 0:
+        raise RuntimeError(f"import {module} failed:\n{completed.stderr[-2000:]}")
+
+    rows = []
+    for line in completed.stderr.splitlines():
+        match = LINE_PATTERN.match(line)
+        if match:
+            self_us, cumulative_us, indent, name = match.groups()
+            rows.append({
+                "module": name,
+                "self_us": int(self_us),
+                "cumulative_us": int(cumulative_us),
+                "depth": len(indent) // 2,
+            })
+
+    return rows
+
+
+def summarize(module: str, rows: list[dict], top: int) -> dict:
+    entry = next((row for row in rows if row["module"] == module), None)
+
+    # Cumulative time of the first (outermost) import of each top-level package
+    packages = {}
+    for row in rows:
+        package = row["module"].split(".")[0]
+        if row["module"] == package or package not in packages:
+            packages[package] = max(packages.get(package, 0), row["cumulative_us"])
+
+    loaded = {row["module"].split(".")[0] for row in rows}
+
+    return {
+        "module": module,
+        "total_ms": round(entry["cumulative_us"] / 1000, 1) if entry else None,
+        "modules_imported": len(rows),
+        "heavy_imported": [name for name in HEAVY_MODULES if name in loaded],
+        "top_packages": sorted(packages.items(), key=lambda item: -item[1])[:top],
+        "top_self": sorted(rows, key=lambda row: -row["self_us"])[:top],
+    }
+
+
+def print_report(summary: dict):
+    print(f"\n=== import {summary['module']} ===")
+    print(f"total: {summary['total_ms']} ms, {summary['modules_imported']} modules")
+
+    heavy = summary["heavy_imported"]
+    print(f"heavy dependencies loaded eagerly: {', '.join(heavy) if heavy else 'none'}")
+
+    print("\nslowest packages (cumulative):")
+    for package, cumulative_us in summary["top_packages"]:
+        print(f"  {cumulative_us / 1000:>9.1f} ms  {package}")
+
+    print("\nslowest modules (self):")
+    for row in summary["top_self"]:
+        print(f"  {row['self_us'] / 1000:>9.1f} ms  {row['module']}")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Report import-time cost of the app entry points")
+    parser.add_argument("--modules", nargs="+", default=["src.main", "src.rag_pipeline"])
+    parser.add_argument("--top", type=int, default=10)
+    parser.add_argument("--budget-ms", type=float, default=None,
+                        help="Exit non-zero if any module takes longer than this to import")
+    args = parser.parse_args()
+
+    over_budget = []
+    for module in args.modules:
+        summary = summarize(module, profile_import(module), args.top)
+        print_report(summary)
+
+        if args.budget_ms is not None and (summary["total_ms"] or 0) > args.budget_ms:
+            over_budget.append(f"{module} ({summary['total_ms']} ms)")
+
+    if over_budget:
+        print(f"\nOver the {args.budget_ms} ms budget: {', '.join(over_budget)}")
+        sys.exit(1)
@@ -0,0 +1,299 @@
+"""
+loadtest.py — Concurrent load generator for the /ask API.
+
+Closed loop (--mode closed): N virtual researchers each send a question,
+wait for the answer and immediately ask the next one.
+Open loop (--mode open): questions arrive as a Poisson process at R req/s,
+regardless of how fast the server answers.
+
+A ramp profile runs several stages back to back, e.g. "5:30,20:30,50:60"
+means level 5 for 30s, then 20 for 30s, then 50 for 60s (level is the
+concurrency in closed mode, the arrival rate in open mode).
+
+With --spawn the harness starts the OpenAI stub, builds a stub-embedded
+index in a temporary directory and launches uvicorn against both, so a
+full run needs no network access.
+
+Usage:
+    python -m benchmarks.loadtest --spawn --profile 5:20,20:20,50:30
+    python -m benchmarks.loadtest --url http://127.0.0.1:8000 --mode open --profile 10:60
+"""
+
+import argparse
+import asyncio
+import json
+import os
+import random
+import subprocess
+import sys
+import tempfile
+import time
+from collections import Counter
+from datetime import datetime, timezone
+from pathlib import Path
+
+import httpx
+
+from benchmarks.run import RESULTS_DIR, git_commit, percentile
+
+
+GOLDEN_SET_PATH = Path(__file__).parent / "golden_set.json"
+
+
+def parse_profile(profile: str) -> list[tuple[float, float]]:
+    stages = []
+    for part in profile.split(","):
+        level, duration = part.split(":")
+        stages.append((float(level), float(duration)))
+    return stages
+
+
+# ---------------------------------------------------
+# Load generation
+# ---------------------------------------------------
+class StageStats:
+    def __init__(self, level: float):
+        self.level = level
+        self.latencies_ms = []
+        self.errors = Counter()
+        self.client_lag_ms = []
+        self.started = time.perf_counter()
+        self.elapsed = 0.0
+
+    def report(self, server_before: dict, server_after: dict) -> dict:
+        ok = len(self.latencies_ms)
+        failed = sum(self.errors.values())
+        total = ok + failed
+
+        return {
+            "level": self.level,
+            "duration_s": round(self.elapsed, 2),
+            "requests": total,
+            "ok": ok,
+            "errors": dict(self.errors),
+            "error_rate": round(failed / total, 4) if total else 0.0,
+            "throughput_rps": round(ok / self.elapsed, 2) if self.elapsed else 0.0,
+            "latency_ms": {
+                "p50": round(percentile(self.latencies_ms, 50), 1),
+                "p90": round(percentile(self.latencies_ms, 90), 1),
+                "p99": round(percentile(self.latencies_ms, 99), 1),
+                "max": round(max(self.latencies_ms, default=0.0), 1),
+            },
+            "client_loop_lag_p99_ms": round(percentile(self.client_lag_ms, 99), 2),
+            "server_loop_lag": server_after.get("event_loop_lag", {}),
+            "server_single_flight": server_after.get("single_flight", {}),
+            "server_metrics_before": server_before,
+        }
+
+
+async def send(client: httpx.AsyncClient, question: str, strategy: str, stats: StageStats):
+    start = time.perf_counter()
+    try:
+        response = await client.post("/ask", json={"question": question, "strategy": strategy})
+        if response.status_code == 200:
+            stats.latencies_ms.append((time.perf_counter() - start) * 1000)
+        else:
+            stats.errors[f"http_{response.status_code}"] += 1
+    except httpx.HTTPError as e:
+        stats.errors[type(e).__name__] += 1
+
+
+async def monitor_client_lag(stats: StageStats, interval: float = 0.05):
+    while True:
+        start = time.perf_counter()
+        await asyncio.sleep(interval)
+        stats.client_lag_ms.append(max((time.perf_counter() - start - interval) * 1000, 0.0))
+
+
+async def run_closed_stage(client, questions, strategy, concurrency: int, duration: float, stats):
+    deadline = time.perf_counter() + duration
+    rng = random.Random(concurrency)
+
+    async def researcher():
+        while time.perf_counter() < deadline:
+            await send(client, rng.choice(questions), strategy, stats)
+
+    await asyncio.gather(*(researcher() for _ in range(max(int(concurrency), 1))))
+
+
+async def run_open_stage(client, questions, strategy, rate: float, duration: float, stats, max_in_flight: int):
+    deadline = time.perf_counter() + duration
+    rng = random.Random(int(rate * 1000))
+    in_flight = set()
+
+    while time.perf_counter() < deadline:
+        await asyncio.sleep(rng.expovariate(rate))
+        if len(in_flight) >= max_in_flight:
+            stats.errors["client_overload"] += 1
+            continue
+        task = asyncio.create_task(send(client, rng.choice(questions), strategy, stats))
+        in_flight.add(task)
+        task.add_done_callback(in_flight.discard)
+
+    if in_flight:
+        await asyncio.gather(*in_flight)
+
+
+async def fetch_metrics(client: httpx.AsyncClient) -> dict:
+    try:
+        response = await client.get("/metrics")
+        return response.json() if response.status_code == 200 else {}
+    except httpx.HTTPError:
+        return {}
+
+
+async def run_load(
+    url: str,
+    stages: list[tuple[float, float]],
+    mode: str,
+    questions: list[str],
+    strategy: str,
+    timeout: float,
+    max_in_flight: int
+) -> list[dict]:
+
+    limits = httpx.Limits(max_connections=max_in_flight, max_keepalive_connections=max_in_flight)
+    results = []
+
+    async with httpx.AsyncClient(base_url=url, timeout=timeout, limits=limits) as client:
+        for level, duration in stages:
+            stats = StageStats(level)
+            before = await fetch_metrics(client)
+            lag_task = asyncio.create_task(monitor_client_lag(stats))
+
+            if mode == "closed":
+                await run_closed_stage(client, questions, strategy, int(level), duration, stats)
+            else:
+                await run_open_stage(client, questions, strategy, level, duration, stats, max_in_flight)
+
+            stats.elapsed = time.perf_counter() - stats.started
+            lag_task.cancel()
+            after = await fetch_metrics(client)
+
+            report = stats.report(before, after)
+            results.append(report)
+            print(
+                f"level={level:<6g} rps={report['throughput_rps']:<8} "
+                f"p50={report['latency_ms']['p50']:<8} p99={report['latency_ms']['p99']:<8} "
+                f"errors={report['error_rate']:.2%} server_lag_p99={report['server_loop_lag'].get('p99_ms')}"
+            )
+
+    return results
+
+
+# ---------------------------------------------------
+# Spawned environment (stub + index + server)
+# ---------------------------------------------------
+def wait_until_up(url: str, path: str = "/", timeout: float = 120.0):
+    deadline = time.time() + timeout
+    while time.time() < deadline:
+        try:
+            if httpx.get(url + path, timeout=2).status_code < 500:
+                return
+        except httpx.HTTPError:
+            pass
+        time.sleep(0.5)
+    raise RuntimeError(f"{url} did not come up within {timeout}s")
+
+
+def spawn_environment(args) -> tuple[list[subprocess.Popen], tempfile.TemporaryDirectory]:
+    stub_url = f"http://127.0.0.1:{args.stub_port}"
+    workdir = tempfile.TemporaryDirectory(prefix="rc_load_")
+
+    env = {
+        **os.environ,
+        "OPENAI_BASE_URL": f"{stub_url}/v1",
+        "OPENAI_API_KEY": "stub",
+        "RC_CHROMA_DIR": args.chroma_dir or str(Path(workdir.name) / "chroma"),
+        # Stub traffic is logged to a throwaway file, tagged, never to metrics/usage.db
+        "RC_USAGE_DB": str(Path(workdir.name) / "usage.db"),
+        "RC_USAGE_SOURCE": "loadtest",
+    }
+
+    stub = subprocess.Popen([
+        sys.executable, "-m", "benchmarks.stub_openai",
+        "--port", str(args.stub_port),
+        "--embed-latency-ms", str(args.embed_latency_ms),
+        "--chat-latency-ms", str(args.chat_latency_ms),
+        "--jitter-ms", str(args.jitter_ms),
+    ], env=env)
+    wait_until_up(stub_url, "/docs")
+
+    if not args.chroma_dir:
+        print("Building stub-embedded index...")
+        subprocess.run([sys.executable, "-m", "src.ingest", "--reset"], env=env, check=True)
+
+    server = subprocess.Popen([
+        sys.executable, "-m", "uvicorn", "src.main:app",
+        "--port", str(args.server_port),
+        "--workers", str(args.workers),
+        "--log-level", "warning",
+    ], env=env)
+    wait_until_up(f"http://127.0.0.1:{args.server_port}", "/ready")
+
+    return [server, stub], workdir
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Load test the /ask API")
+    parser.add_argument("--url", default="http://127.0.0.1:8000")
+    parser.add_argument("--mode", choices=["closed", "open"], default="closed")
+    parser.add_argument("--profile", default="5:20,20:20,50:30", help="level:seconds,... stages")
+    parser.add_argument("--strategy", default="v1_delimiters")
+    parser.add_argument("--questions", default=str(GOLDEN_SET_PATH), help="Golden-set style JSON")
+    parser.add_argument("--timeout", type=float, default=60.0)
+    parser.add_argument("--max-in-flight", type=int, default=500)
+    parser.add_argument("--out", default=None)
+
+    spawn = parser.add_argument_group("spawned environment")
+    spawn.add_argument("--spawn", action="store_true", help="Start stub, index and server locally")
+    spawn.add_argument("--server-port", type=int, default=8000)
+    spawn.add_argument("--stub-port", type=int, default=8900)
+    spawn.add_argument("--workers", type=int, default=1)
+    spawn.add_argument("--chroma-dir", default=None, help="Reuse an existing stub-embedded index")
+    spawn.add_argument("--embed-latency-ms", type=float, default=80.0)
+    spawn.add_argument("--chat-latency-ms", type=float, default=1200.0)
+    spawn.add_argument("--jitter-ms", type=float, default=50.0)
+
+    args = parser.parse_args()
+
+    questions = [
+        item["question"]
+        for item in json.loads(Path(args.questions).read_text(encoding="utf-8"))["questions"]
+    ]
+
+    processes, workdir = [], None
+    if args.spawn:
+        processes, workdir = spawn_environment(args)
+        args.url = f"http://127.0.0.1:{args.server_port}"
+
+    try:
+        stages = asyncio.run(run_load(
+            args.url,
+            parse_profile(args.profile),
+            args.mode,
+            questions,
+            args.strategy,
+            args.timeout,
+            args.max_in_flight
+        ))
+    finally:
+        for process in processes:
+            process.terminate()
+            process.wait(timeout=30)
+        if workdir:
+            workdir.cleanup()
+
+    out = Path(args.out) if args.out else RESULTS_DIR / f"loadtest_{args.mode}_{int(time.time())}.json"
+    out.parent.mkdir(parents=True, exist_ok=True)
+    out.write_text(json.dumps({
+        "benchmark": "loadtest",
+        "timestamp": datetime.now(timezone.utc).isoformat(),
+        "git_commit": git_commit(),
+        "url": args.url,
+        "mode": args.mode,
+        "profile": args.profile,
+        "strategy": args.strategy,
+        "stages": stages,
+    }, indent=2), encoding="utf-8")
+    print(f"\nResults written to {out}")
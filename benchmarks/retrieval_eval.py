@@ -0,0 +1,207 @@
+"""
+retrieval_eval.py — Retrieval quality/latency sweep over index configurations.
+
+For every (chunk_size, chunk_overlap, embedding_model) combination the
+catalog is ingested with src.ingest.ingest() into its own Chroma
+directory, then the golden questions are embedded and searched in one
+batch. Recall@k, MRR, index size, ingest time and query latency are
+reported together in one table.
+
+Usage:
+    python -m benchmarks.retrieval_eval
+    python -m benchmarks.retrieval_eval --chunk-sizes 256 512 1024 --overlaps 0 50 --top-k 5 10 20
+    python -m benchmarks.retrieval_eval --embedding-models text-embedding-3-small text-embedding-3-large
+    python -m benchmarks.retrieval_eval --offline   # FakeEmbedder, no API calls
+"""
+
+import argparse
+import itertools
+import json
+import tempfile
+import time
+from datetime import datetime, timezone
+from pathlib import Path
+
+from benchmarks.fakes import FakeEmbedder, load_encoder
+from benchmarks.run import RESULTS_DIR, git_commit, percentile
+
+from src.chunking.chunker import TokenChunker
+from src.embedding.embedder import OpenAIEmbedder
+from src.ingest import ingest
+from src.observability.usage import configure_usage_store
+from src.rag_pipeline import RAGPipeline
+from src.retrieval.retriever import Retriever
+from src.transport.rate_limit import request_priority
+from src.vectorstore.chroma_store import ChromaVectorStore
+
+
+GOLDEN_SET_PATH = Path(__file__).parent / "golden_set.json"
+
+
+# ---------------------------------------------------
+# Metrics
+# ---------------------------------------------------
+def is_relevant(chunk: dict, item: dict) -> bool:
+    """Chunk-level match when the golden item pins chunk ids, paper-level otherwise."""
+    if item.get("chunk_ids"):
+        return chunk.get("id") in item["chunk_ids"]
+    return (chunk.get("metadata") or {}).get("paper_id") in item["paper_ids"]
+
+
+def recall_at_k(chunks: list[dict], item: dict, k: int) -> float:
+    expected = set(item.get("chunk_ids") or item["paper_ids"])
+    found = set()
+
+    for chunk in chunks[:k]:
+        if is_relevant(chunk, item):
+            found.add(chunk.get("id") if item.get("chunk_ids") else chunk["metadata"]["paper_id"])
+
+    return len(found) / len(expected) if expected else 0.0
+
+
+def reciprocal_rank(chunks: list[dict], item: dict) -> float:
+    for rank, chunk in enumerate(chunks, 1):
+        if is_relevant(chunk, item):
+            return 1 / rank
+    return 0.0
+
+
+def directory_size_mb(path: Path) -> float:
+    return round(sum(f.stat().st_size for f in path.rglob("*") if f.is_file()) / 1e6, 2)
+
+
+# ---------------------------------------------------
+# Sweep
+# ---------------------------------------------------
+def evaluate_config(
+    golden: list[dict],
+    chunk_size: int,
+    chunk_overlap: int,
+    embedding_model: str,
+    top_ks: list[int],
+    index_root: Path,
+    offline: bool
+) -> dict:
+
+    name = f"cs{chunk_size}_ov{chunk_overlap}_{embedding_model}"
+    persist_directory = index_root / name
+
+    if offline:
+        embedder = FakeEmbedder(model=embedding_model)
+        chunker = TokenChunker(chunk_size, chunk_overlap, encoder=load_encoder("gpt-4"))
+    else:
+        embedder = OpenAIEmbedder(model=embedding_model)
+        chunker = None
+
+    # 1️⃣ Build the index with the production ingest path
+    summary = ingest(
+        chunk_size=chunk_size,
+        chunk_overlap=chunk_overlap,
+        reset=True,
+        collection_name="eval",
+        persist_directory=str(persist_directory),
+        embedder=embedder,
+        chunker=chunker
+    )
+
+    retriever = Retriever(
+        collection_name="eval",
+        embedder=embedder,
+        vectorstore=ChromaVectorStore(persist_directory=str(persist_directory))
+    )
+    questions = [item["question"] for item in golden]
+    max_k = max(top_ks)
+
+    # 2️⃣ Batched retrieval: one embedding request, one Chroma query
+    start = time.perf_counter()
+    batch_results = retriever.retrieve_batch(questions, top_k=max_k)
+    batch_ms = (time.perf_counter() - start) * 1000
+    rankings = [RAGPipeline._parse_retrieval_results(results) for results in batch_results]
+
+    # 3️⃣ Single-query latency, as seen by an interactive user
+    single_ms = []
+    for question in questions:
+        start = time.perf_counter()
+        retriever.retrieve(question, top_k=max_k)
+        single_ms.append((time.perf_counter() - start) * 1000)
+
+    row = {
+        "config": name,
+        "chunk_size": chunk_size,
+        "chunk_overlap": chunk_overlap,
+        "embedding_model": embedding_model,
+        "chunks": summary["total_chunks"],
+        "index_mb": directory_size_mb(persist_directory),
+        "ingest_s": summary["seconds"],
+        "query_batched_ms": round(batch_ms / len(questions), 2),
+        "query_p50_ms": round(percentile(single_ms, 50), 2),
+        "query_p99_ms": round(percentile(single_ms, 99), 2),
+        "mrr": round(sum(reciprocal_rank(r, item) for r, item in zip(rankings, golden)) / len(golden), 4),
+    }
+
+    for k in top_ks:
+        row[f"recall@{k}"] = round(
+            sum(recall_at_k(r, item, k) for r, item in zip(rankings, golden)) / len(golden), 4
+        )
+
+    return row
+
+
+def print_table(rows: list[dict]):
+    columns = list(rows[0].keys())
+    columns.remove("config")
+    widths = {c: max(len(c), *(len(str(r[c])) for r in rows)) for c in columns}
+
+    print("  ".join(c.rjust(widths[c]) for c in columns))
+    for row in rows:
+        print("  ".join(str(row[c]).rjust(widths[c]) for c in columns))
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Sweep retrieval configurations against a golden set")
+    parser.add_argument("--golden", default=str(GOLDEN_SET_PATH))
+    parser.add_argument("--chunk-sizes", type=int, nargs="+", default=[256, 512, 1024])
+    parser.add_argument("--overlaps", type=int, nargs="+", default=[50])
+    parser.add_argument("--embedding-models", nargs="+", default=["text-embedding-3-small"])
+    parser.add_argument("--top-k", type=int, nargs="+", default=[5, 10, 20])
+    parser.add_argument("--index-dir", default=None, help="Keep the built indexes here")
+    parser.add_argument("--offline", action="store_true", help="Use the deterministic FakeEmbedder")
+    parser.add_argument("--out", default=None)
+
+    args = parser.parse_args()
+
+    # Sweep ingests and queries stay out of the app's usage log
+    configure_usage_store(enabled=False, source="eval")
+
+    golden = json.loads(Path(args.golden).read_text(encoding="utf-8"))["questions"]
+    tmp = None if args.index_dir else tempfile.TemporaryDirectory(prefix="rc_eval_")
+    index_root = Path(args.index_dir or tmp.name)
+
+    rows = []
+    # Evaluation traffic queues behind ingest and interactive queries
+    with request_priority("eval"):
+        for chunk_size, overlap, model in itertools.product(
+            args.chunk_sizes, args.overlaps, args.embedding_models
+        ):
+            if overlap >= chunk_size:
+                continue
+            rows.append(evaluate_config(
+                golden, chunk_size, overlap, model, sorted(args.top_k), index_root, args.offline
+            ))
+
+    print_table(rows)
+
+    out = Path(args.out) if args.out else RESULTS_DIR / f"retrieval_eval_{int(time.time())}.json"
+    out.parent.mkdir(parents=True, exist_ok=True)
+    out.write_text(json.dumps({
+        "benchmark": "retrieval_eval",
+        "timestamp": datetime.now(timezone.utc).isoformat(),
+        "git_commit": git_commit(),
+        "golden_set": args.golden,
+        "offline": args.offline,
+        "rows": rows,
+    }, indent=2), encoding="utf-8")
+    print(f"\nResults written to {out}")
+
+    if tmp:
+        tmp.cleanup()
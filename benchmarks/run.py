@@ -0,0 +1,319 @@
+"""
+run.py — Offline end-to-end pipeline benchmark.
+
+Generates (or reuses) a synthetic corpus and runs the real extraction,
+cleaning, chunking, vector store, retrieval and generation code with the
+deterministic fakes from benchmarks/fakes.py. Results are written as JSON
+so runs can be compared for regressions.
+
+Usage:
+    python -m benchmarks.run --papers 20
+    python -m benchmarks.run --papers 1000 --format text --queries 500
+    python -m benchmarks.run --papers 1000 --baseline bench_results/old.json
+"""
+
+import argparse
+import json
+import platform
+import subprocess
+import sys
+import tempfile
+import time
+from contextlib import contextmanager
+from datetime import datetime, timezone
+from pathlib import Path
+
+from benchmarks.fakes import FakeEmbedder, FakeLLM, load_encoder
+from benchmarks.synthetic import TOPICS, generate_corpus
+
+from src.chunking.chunker import TokenChunker
+from src.generation.generator import Generator
+from src.generation.prompt_registry import PromptRegistry
+from src.ingest import build_chunk_records, build_paper_metadata
+from src.ingestion.pdf_extractor import extract_text_from_pdf
+from src.ingestion.text_cleaner import clean_extracted_text
+from src.observability.usage import configure_usage_store
+from src.rag_pipeline import RAGPipeline
+from src.retrieval.retriever import Retriever
+from src.vectorstore.chroma_store import ChromaVectorStore
+
+try:
+    import resource
+except ImportError:  # Windows
+    resource = None
+
+
+RESULTS_DIR = Path("bench_results")
+
+
+# ---------------------------------------------------
+# Measurement helpers
+# ---------------------------------------------------
+def percentile(values: list[float], q: float) -> float:
+    """Nearest-rank percentile (q in 0..100)."""
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    rank = max(int(round(q / 100 * len(ordered) + 0.5)) - 1, 0)
+    return ordered[min(rank, len(ordered) - 1)]
+
+
+def peak_rss_mb():
+    if resource is None:
+        return None
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # Linux reports KiB, macOS bytes
+    return round(peak / (1024 * 1024 if sys.platform == "darwin" else 1024), 1)
+
+
+class Stage:
+    """
+    Collects per-item latencies for one pipeline stage.
+    """
+
+    def __init__(self, name: str):
+        self.name = name
+        self.latencies_ms = []
+        self.items = 0
+        self.started = None
+        self.wall_s = 0.0
+
+    @contextmanager
+    def measure(self, items: int = 1):
+        start = time.perf_counter()
+        yield
+        self.latencies_ms.append((time.perf_counter() - start) * 1000)
+        self.items += items
+
+    def __enter__(self):
+        self.started = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc):
+        self.wall_s = time.perf_counter() - self.started
+
+    def report(self) -> dict:
+        return {
+            "items": self.items,
+            "calls": len(self.latencies_ms),
+            "wall_s": round(self.wall_s, 4),
+            "throughput_per_s": round(self.items / self.wall_s, 2) if self.wall_s else None,
+            "p50_ms": round(percentile(self.latencies_ms, 50), 3),
+            "p99_ms": round(percentile(self.latencies_ms, 99), 3),
+            "peak_rss_mb": peak_rss_mb(),
+        }
+
+
+def git_commit() -> str:
+    try:
+        return subprocess.check_output(
+            ["git", "rev-parse", "--short", "HEAD"], text=True, stderr=subprocess.DEVNULL
+        ).strip()
+    except Exception:
+        return "unknown"
+
+
+# ---------------------------------------------------
+# Benchmark
+# ---------------------------------------------------
+def run_benchmark(
+    n_papers: int = 20,
+    fmt: str = "pdf",
+    pages: int = 6,
+    chunk_size: int = 512,
+    chunk_overlap: int = 50,
+    n_queries: int = 100,
+    top_k: int = 20,
+    embed_batch_size: int = 100,
+    corpus_dir: str = None,
+    seed: int = 42
+) -> dict:
+
+    stages = {}
+    workdir = tempfile.TemporaryDirectory(prefix="rc_bench_")
+    corpus = Path(corpus_dir or Path(workdir.name) / "corpus")
+
+    # 1️⃣ Corpus generation
+    with Stage("generate_corpus") as stage:
+        catalog_path = corpus / "paper_catalog.json"
+        if not catalog_path.exists():
+            with stage.measure(n_papers):
+                generate_corpus(n_papers, str(corpus), fmt, pages, seed)
+    stages[stage.name] = stage
+
+    papers = json.loads(catalog_path.read_text(encoding="utf-8"))["papers"][:n_papers]
+
+    # 2️⃣ Extraction
+    raw_texts = []
+    with Stage("extract") as stage:
+        for paper in papers:
+            path = corpus / paper["filename"]
+            with stage.measure():
+                if path.suffix == ".pdf":
+                    raw_texts.append(extract_text_from_pdf(str(path))["text"])
+                else:
+                    raw_texts.append(path.read_text(encoding="utf-8"))
+    stages[stage.name] = stage
+
+    # 3️⃣ Cleaning
+    clean_texts = []
+    with Stage("clean") as stage:
+        for text in raw_texts:
+            with stage.measure():
+                clean_texts.append(clean_extracted_text(text))
+    stages[stage.name] = stage
+    del raw_texts
+
+    # 4️⃣ Chunking
+    encoder = load_encoder("gpt-4")
+    chunker = TokenChunker(chunk_size=chunk_size, chunk_overlap=chunk_overlap, encoder=encoder)
+
+    records = []
+    with Stage("chunk") as stage:
+        for paper, text in zip(papers, clean_texts):
+            with stage.measure():
+                meta = build_paper_metadata(paper)
+                chunks = chunker.chunk_text(text, metadata=meta)
+                records.append(build_chunk_records(paper, meta, chunks))
+    stages[stage.name] = stage
+    del clean_texts
+
+    # 5️⃣ Embedding (fake backend, real batching)
+    embedder = FakeEmbedder()
+    documents = [doc for _, docs, _ in records for doc in docs]
+    embeddings = []
+    with Stage("embed") as stage:
+        for i in range(0, len(documents), embed_batch_size):
+            batch = documents[i:i + embed_batch_size]
+            with stage.measure(len(batch)):
+                embeddings.extend(embedder.embed_texts(batch))
+    stages[stage.name] = stage
+
+    # 6️⃣ Vector store upsert (real ChromaDB, temporary directory)
+    store = ChromaVectorStore(persist_directory=str(Path(workdir.name) / "chroma"))
+    store.create_collection("bench")
+    offset = 0
+    with Stage("upsert") as stage:
+        for ids, docs, metas in records:
+            if not ids:
+                continue
+            with stage.measure(len(ids)):
+                store.add_documents(ids, docs, embeddings[offset:offset + len(ids)], metas)
+            offset += len(ids)
+    stages[stage.name] = stage
+
+    # 7️⃣ Retrieval (query embedding + vector search)
+    retriever = Retriever(collection_name="bench", embedder=embedder, vectorstore=store)
+    queries = [
+        f"What does the literature say about {TOPICS[i % len(TOPICS)]} and {TOPICS[(i * 7 + 3) % len(TOPICS)]}?"
+        for i in range(n_queries)
+    ]
+    with Stage("retrieve") as stage:
+        for query in queries:
+            with stage.measure():
+                retriever.retrieve(query, top_k=top_k)
+    stages[stage.name] = stage
+
+    # 8️⃣ Full pipeline answer (fake LLM)
+    registry = PromptRegistry(reload_interval=0, encoder=load_encoder("gpt-4o-mini"))
+    pipeline = RAGPipeline(
+        retriever=retriever,
+        generator=Generator(prompt_registry=registry, llm=FakeLLM())
+    )
+    with Stage("answer") as stage:
+        for query in queries:
+            with stage.measure():
+                pipeline.query(query)
+    stages[stage.name] = stage
+
+    workdir.cleanup()
+
+    return {
+        "benchmark": "pipeline",
+        "timestamp": datetime.now(timezone.utc).isoformat(),
+        "git_commit": git_commit(),
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "tokenizer": getattr(encoder, "name", "unknown"),
+        "config": {
+            "papers": len(papers),
+            "format": fmt,
+            "pages": pages,
+            "chunk_size": chunk_size,
+            "chunk_overlap": chunk_overlap,
+            "queries": n_queries,
+            "top_k": top_k,
+            "chunks": len(documents),
+        },
+        "stages": {name: stage.report() for name, stage in stages.items()},
+    }
+
+
+# ---------------------------------------------------
+# Regression comparison
+# ---------------------------------------------------
+def compare_to_baseline(result: dict, baseline: dict, tolerance: float) -> list[str]:
+    """
+    Print per-stage ratios and return the stages that regressed.
+    """
+    regressions = []
+    print(f"\n{'stage':<16}{'throughput':>14}{'p99':>10}")
+
+    for name, current in result["stages"].items():
+        previous = baseline.get("stages", {}).get(name)
+        if not previous or not previous.get("throughput_per_s") or not current.get("throughput_per_s"):
+            continue
+
+        throughput_ratio = current["throughput_per_s"] / previous["throughput_per_s"]
+        p99_ratio = current["p99_ms"] / previous["p99_ms"] if previous["p99_ms"] else 1.0
+        print(f"{name:<16}{throughput_ratio:>13.2f}x{p99_ratio:>9.2f}x")
+
+        if throughput_ratio < 1 - tolerance:
+            regressions.append(name)
+
+    return regressions
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Offline RAG pipeline benchmark")
+    parser.add_argument("--papers", type=int, default=20)
+    parser.add_argument("--format", choices=["pdf", "text"], default="pdf")
+    parser.add_argument("--pages", type=int, default=6)
+    parser.add_argument("--chunk-size", type=int, default=512)
+    parser.add_argument("--chunk-overlap", type=int, default=50)
+    parser.add_argument("--queries", type=int, default=100)
+    parser.add_argument("--top-k", type=int, default=20)
+    parser.add_argument("--corpus-dir", default=None, help="Reuse a generated corpus")
+    parser.add_argument("--out", default=None, help="Result JSON path")
+    parser.add_argument("--baseline", default=None, help="Previous result JSON to compare against")
+    parser.add_argument("--tolerance", type=float, default=0.2, help="Allowed throughput drop vs baseline")
+
+    args = parser.parse_args()
+
+    # Fake LLM traffic stays out of the app's usage log
+    configure_usage_store(enabled=False, source="benchmark")
+
+    result = run_benchmark(
+        n_papers=args.papers,
+        fmt=args.format,
+        pages=args.pages,
+        chunk_size=args.chunk_size,
+        chunk_overlap=args.chunk_overlap,
+        n_queries=args.queries,
+        top_k=args.top_k,
+        corpus_dir=args.corpus_dir,
+    )
+
+    out = Path(args.out) if args.out else RESULTS_DIR / f"pipeline_{args.papers}_{int(time.time())}.json"
+    out.parent.mkdir(parents=True, exist_ok=True)
+    out.write_text(json.dumps(result, indent=2), encoding="utf-8")
+
+    print(json.dumps(result["stages"], indent=2))
+    print(f"\nResults written to {out}")
+
+    if args.baseline:
+        baseline = json.loads(Path(args.baseline).read_text(encoding="utf-8"))
+        regressions = compare_to_baseline(result, baseline, args.tolerance)
+        if regressions:
+            print(f"\nRegressed stages: {', '.join(regressions)}")
+            sys.exit(1)
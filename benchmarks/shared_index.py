@@ -0,0 +1,144 @@
+"""
+shared_index.py — Memory per worker: Chroma vs the shared mmap snapshot.
+
+Builds a synthetic collection, exports it as an mmap snapshot, then starts
+N worker processes per backend that open the store and run queries, the
+way N uvicorn workers would. While all workers are alive, each reports
+its RSS, USS (private) and PSS (shared pages split between the processes
+mapping them) from /proc/<pid>/smaps_rollup. With the mmap backend the
+vectors are shared through the page cache, so per-worker USS stays flat.
+
+Linux only (smaps_rollup).
+
+Usage:
+    python -m benchmarks.shared_index
+    python -m benchmarks.shared_index --vectors 50000 --dim 1536 --workers 1 2 4 8
+"""
+
+import argparse
+import json
+import multiprocessing as mp
+import tempfile
+import time
+
+import numpy as np
+
+
+def memory_kb() -> dict:
+    values = {}
+    with open("/proc/self/smaps_rollup") as f:
+        for line in f:
+            parts = line.split()
+            if parts[0] in ("Rss:", "Pss:", "Private_Clean:", "Private_Dirty:"):
+                values[parts[0][:-1]] = int(parts[1])
+    return {
+        "rss_mb": round(values["Rss"] / 1024, 1),
+        "pss_mb": round(values["Pss"] / 1024, 1),
+        "uss_mb": round((values["Private_Clean"] + values["Private_Dirty"]) / 1024, 1),
+    }
+
+
+def worker(backend: str, directory: str, dim: int, n_queries: int, ready, release, results):
+    from src.retrieval.retriever import Retriever
+    from src.vectorstore.chroma_store import ChromaVectorStore
+    from src.vectorstore.mmap_store import MmapVectorStore
+
+    store = MmapVectorStore(directory) if backend == "mmap" else ChromaVectorStore(directory)
+    retriever = Retriever(collection_name="bench", embedder=_RandomEmbedder(dim), vectorstore=store, batch_window_ms=0)
+
+    latencies = []
+    for i in range(n_queries):
+        start = time.perf_counter()
+        retriever.retrieve(f"query {i}", top_k=10)
+        latencies.append((time.perf_counter() - start) * 1000)
+
+    ready.release()
+    release.wait()
+    results.put({**memory_kb(), "query_ms_p50": round(float(np.median(latencies)), 3)})
+
+
+class _RandomEmbedder:
+
+    def __init__(self, dim: int):
+        self.dim = dim
+        self.model = "random"
+        self.rng = np.random.default_rng()
+
+    def embed_texts(self, texts, model=None):
+        return self.rng.standard_normal((len(texts), self.dim)).astype(np.float32).tolist()
+
+    def embed_query(self, query, model=None):
+        return self.embed_texts([query])[0]
+
+
+def build_index(directory: str, n_vectors: int, dim: int):
+    from src.vectorstore.chroma_store import ChromaVectorStore
+    from src.vectorstore.mmap_store import export_snapshot
+
+    store = ChromaVectorStore(directory)
+    collection = store.create_collection("bench")
+    rng = np.random.default_rng(0)
+
+    for start in range(0, n_vectors, 5000):
+        n = min(5000, n_vectors - start)
+        collection.add(
+            ids=[f"c{start + i}" for i in range(n)],
+            embeddings=rng.standard_normal((n, dim)).astype(np.float32),
+            documents=[f"chunk {start + i}" for i in range(n)],
+            metadatas=[{"paper_id": f"paper_{(start + i) % 500:03d}", "chunk_id": i, "token_count": 500} for i in range(n)]
+        )
+
+    return export_snapshot(collection, directory, alias="bench")
+
+
+def measure(backend: str, directory: str, dim: int, workers: int, n_queries: int) -> dict:
+    ctx = mp.get_context("spawn")
+    ready, release, results = ctx.Semaphore(0), ctx.Event(), ctx.Queue()
+
+    processes = [
+        ctx.Process(target=worker, args=(backend, directory, dim, n_queries, ready, release, results))
+        for _ in range(workers)
+    ]
+    for process in processes:
+        process.start()
+    for _ in processes:
+        ready.acquire()
+
+    # Every worker is alive and has queried: now they all sample memory
+    release.set()
+    samples = [results.get() for _ in processes]
+    for process in processes:
+        process.join()
+
+    def mean(key):
+        return round(sum(sample[key] for sample in samples) / len(samples), 1)
+
+    return {
+        "backend": backend,
+        "workers": workers,
+        "rss_mb_per_worker": mean("rss_mb"),
+        "uss_mb_per_worker": mean("uss_mb"),
+        "pss_mb_total": round(sum(sample["pss_mb"] for sample in samples), 1),
+        "query_ms_p50": mean("query_ms_p50"),
+    }
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Per-worker memory of the Chroma and mmap backends")
+    parser.add_argument("--vectors", type=int, default=20000)
+    parser.add_argument("--dim", type=int, default=1536)
+    parser.add_argument("--workers", type=int, nargs="+", default=[1, 2, 4])
+    parser.add_argument("--queries", type=int, default=50)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as directory:
+        manifest = build_index(directory, args.vectors, args.dim)
+        print(f"index: {manifest['count']} x {manifest['dim']} float32 "
+              f"({manifest['count'] * manifest['dim'] * 4 / 2**20:.0f} MB of vectors)")
+
+        rows = []
+        for backend in ("chroma", "mmap"):
+            for workers in args.workers:
+                row = measure(backend, directory, args.dim, workers, args.queries)
+                rows.append(row)
+                print(json.dumps(row))
@@ -0,0 +1,181 @@
+"""
+stub_openai.py — Local stand-in for the OpenAI embeddings and chat endpoints.
+
+Serves OpenAI-shaped responses after a configurable delay, so the API can
+be load tested without network access or spend. Point the app at it with:
+
+    OPENAI_BASE_URL=http://127.0.0.1:8900/v1 OPENAI_API_KEY=stub uvicorn src.main:app
+
+With --rpm / --tpm the stub enforces OpenAI-style per-model limits: every
+response carries x-ratelimit-* headers and requests over the limit get a
+429 with retry-after.
+
+Usage:
+    python -m benchmarks.stub_openai --port 8900 --embed-latency-ms 80 --chat-latency-ms 1200
+    python -m benchmarks.stub_openai --port 8900 --rpm 600 --tpm 100000
+"""
+
+import argparse
+import asyncio
+import random
+import time
+
+from fastapi import FastAPI, Request, Response
+from fastapi.responses import JSONResponse
+
+from benchmarks.fakes import FakeEmbedder
+
+
+def create_app(
+    embed_latency_ms: float = 80.0,
+    chat_latency_ms: float = 1200.0,
+    jitter_ms: float = 0.0,
+    error_rate: float = 0.0,
+    dim: int = 1536,
+    rpm: float = 0.0,
+    tpm: float = 0.0
+) -> FastAPI:
+
+    app = FastAPI(title="OpenAI stub")
+    embedder = FakeEmbedder(dim=dim)
+    rng = random.Random(0)
+    buckets = {}   # model -> [requests left, tokens left, last refill]
+
+    def rate_limit(model: str, tokens: int, response: Response):
+        """Token buckets refilled over a minute, like the real API."""
+        if not rpm or not tpm:
+            return None
+
+        now = time.monotonic()
+        bucket = buckets.setdefault(model, [rpm, tpm, now])
+        elapsed = now - bucket[2]
+        bucket[0] = min(rpm, bucket[0] + elapsed * rpm / 60)
+        bucket[1] = min(tpm, bucket[1] + elapsed * tpm / 60)
+        bucket[2] = now
+
+        limited = bucket[0] < 1 or bucket[1] < tokens
+        if not limited:
+            bucket[0] -= 1
+            bucket[1] -= tokens
+
+        reset_requests = max(1 - bucket[0], 0) * 60 / rpm
+        reset_tokens = max(tokens - bucket[1], 0) * 60 / tpm
+        headers = {
+            "x-ratelimit-limit-requests": str(int(rpm)),
+            "x-ratelimit-limit-tokens": str(int(tpm)),
+            "x-ratelimit-remaining-requests": str(int(bucket[0])),
+            "x-ratelimit-remaining-tokens": str(int(bucket[1])),
+            "x-ratelimit-reset-requests": f"{reset_requests:.3f}s",
+            "x-ratelimit-reset-tokens": f"{reset_tokens:.3f}s",
+        }
+        response.headers.update(headers)
+
+        if limited:
+            return JSONResponse(
+                status_code=429,
+                content={"error": {"message": "Stub rate limit reached", "type": "rate_limit_error"}},
+                headers={**headers, "retry-after": f"{max(reset_requests, reset_tokens):.3f}"}
+            )
+        return None
+
+    async def delay(base_ms: float):
+        await asyncio.sleep(max(base_ms + rng.uniform(-jitter_ms, jitter_ms), 0) / 1000)
+
+    def maybe_error():
+        if error_rate and rng.random() < error_rate:
+            return JSONResponse(
+                status_code=429,
+                content={"error": {"message": "Stub rate limit", "type": "rate_limit_error"}},
+                headers={"retry-after": "0.1"}
+            )
+        return None
+
+    @app.post("/v1/embeddings")
+    async def embeddings(request: Request, response: Response):
+        body = await request.json()
+        texts = body["input"] if isinstance(body["input"], list) else [body["input"]]
+        tokens = sum(len(text.split()) for text in texts)
+
+        if (limited := rate_limit(body.get("model", "text-embedding-3-small"), tokens, response)) is not None:
+            return limited
+
+        await delay(embed_latency_ms)
+        if (error := maybe_error()) is not None:
+            return error
+
+        return {
+            "object": "list",
+            "model": body.get("model", "text-embedding-3-small"),
+            "data": [
+                {"object": "embedding", "index": i, "embedding": embedder._embed(text)}
+                for i, text in enumerate(texts)
+            ],
+            "usage": {"prompt_tokens": tokens, "total_tokens": tokens}
+        }
+
+    @app.post("/v1/chat/completions")
+    async def chat_completions(request: Request, response: Response):
+        body = await request.json()
+        prompt = "".join(str(m.get("content", "")) for m in body.get("messages", []))
+        answer = "Stub answer based on the provided context."
+        prompt_tokens = len(prompt.split())
+        completion_tokens = len(answer.split())
+
+        model = body.get("model", "gpt-4o-mini")
+        if (limited := rate_limit(model, prompt_tokens + completion_tokens, response)) is not None:
+            return limited
+
+        await delay(chat_latency_ms)
+        if (error := maybe_error()) is not None:
+            return error
+
+        return {
+            "id": f"chatcmpl-stub-{time.time_ns()}",
+            "object": "chat.completion",
+            "created": int(time.time()),
+            "model": body.get("model", "gpt-4o-mini"),
+            "choices": [{
+                "index": 0,
+                "message": {"role": "assistant", "content": answer},
+                "finish_reason": "stop"
+            }],
+            "usage": {
+                "prompt_tokens": prompt_tokens,
+                "completion_tokens": completion_tokens,
+                "total_tokens": prompt_tokens + completion_tokens
+            }
+        }
+
+    return app
+
+
+if __name__ == "__main__":
+    import uvicorn
+
+    parser = argparse.ArgumentParser(description="Local OpenAI stub server")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8900)
+    parser.add_argument("--embed-latency-ms", type=float, default=80.0)
+    parser.add_argument("--chat-latency-ms", type=float, default=1200.0)
+    parser.add_argument("--jitter-ms", type=float, default=0.0)
+    parser.add_argument("--error-rate", type=float, default=0.0)
+    parser.add_argument("--dim", type=int, default=1536)
+    parser.add_argument("--rpm", type=float, default=0.0, help="Requests per minute per model (0 = unlimited)")
+    parser.add_argument("--tpm", type=float, default=0.0, help="Tokens per minute per model (0 = unlimited)")
+
+    args = parser.parse_args()
+
+    uvicorn.run(
+        create_app(
+            args.embed_latency_ms,
+            args.chat_latency_ms,
+            args.jitter_ms,
+            args.error_rate,
+            args.dim,
+            args.rpm,
+            args.tpm
+        ),
+        host=args.host,
+        port=args.port,
+        log_level="warning"
+    )
@@ -0,0 +1,153 @@
+"""
+synthetic.py — Deterministic synthetic corpus generator.
+
+Writes a paper_catalog.json with the same schema as papers/paper_catalog.json
+plus one PDF (or .txt) per paper, at any scale.
+
+Usage:
+    python -m benchmarks.synthetic --papers 1000 --out bench_corpus
+    python -m benchmarks.synthetic --papers 10000 --format text --out bench_corpus
+"""
+
+import argparse
+import json
+import random
+from pathlib import Path
+
+
+TOPICS = [
+    "sport governance", "physical activity", "sports policy", "gender equality",
+    "olympic games", "anti-doping", "sustainability", "sport development",
+    "public health", "elite athletes", "sport events", "municipal sports",
+    "human rights", "social media", "machine learning", "climate change",
+]
+
+TOPIC_WORDS = {
+    topic: topic.replace("-", " ").split() + extra
+    for topic, extra in zip(TOPICS, [
+        ["federation", "board", "accountability"], ["exercise", "children", "steps"],
+        ["legislation", "government", "funding"], ["women", "participation", "equity"],
+        ["ioc", "host", "legacy"], ["wada", "testing", "substances"],
+        ["environmental", "carbon", "goals"], ["grassroots", "clubs", "programmes"],
+        ["wellbeing", "obesity", "prevention"], ["performance", "career", "coaches"],
+        ["mega", "tourism", "impact"], ["local", "facilities", "citizens"],
+        ["rights", "labour", "freedom"], ["twitter", "instagram", "coverage"],
+        ["algorithms", "prediction", "data"], ["emissions", "adaptation", "weather"],
+    ])
+}
+
+FILLER = (
+    "the study results analysis model data survey participants method findings "
+    "evidence approach framework literature review research context significant "
+    "effect relationship sample policy practice outcome level national regional "
+    "international factors perspective discussion interviews qualitative quantitative"
+).split()
+
+SURNAMES = [
+    "Garcia", "Smith", "Muller", "Rossi", "Silva", "Kim", "Sato", "Novak",
+    "Meier", "Costa", "Ali", "Bauer", "Knott", "Moon", "Fang", "Beck",
+]
+
+BOILERPLATE = (
+    "This is an open-access article distributed under the terms of the "
+    "Creative Commons Attribution License (CC BY). Frontiers in Sports and "
+    "Active Living. The authors declare that the research was conducted in the "
+    "absence of any commercial or financial relationships."
+)
+
+
+def _sentence(rng: random.Random, topics: list[str], words: int = 18) -> str:
+    vocabulary = FILLER + [w for t in topics for w in TOPIC_WORDS[t]] * 3
+    return " ".join(rng.choice(vocabulary) for _ in range(words)).capitalize() + "."
+
+
+def make_paper(index: int, rng: random.Random, pages: int) -> tuple[dict, list[str]]:
+    """
+    Build one catalog record and its page texts.
+    """
+    topics = rng.sample(TOPICS, rng.randint(2, 4))
+    year = rng.randint(2015, 2026)
+    authors = [
+        f"{rng.choice(SURNAMES)}, {rng.choice('ABCDEFGHJKLMNPRST')}."
+        for _ in range(rng.randint(1, 4))
+    ]
+    title = f"{topics[0].capitalize()} and {topics[1]}: evidence from study {index}"
+    slug = f"{authors[0].split(',')[0].lower()}{year}_synthetic_{index:05d}"
+
+    paper = {
+        "id": f"paper_{index:05d}",
+        "title": title,
+        "authors": authors,
+        "year": year,
+        "venue": "Frontiers in Sports and Active Living",
+        "section": rng.choice(["Sports Politics, Policy and Law", "Physical Activity in the Prevention and Management of Disease"]),
+        "volume": year - 2018,
+        "doi": f"10.0000/synthetic.{index:05d}",
+        "filename": f"{slug}.pdf",
+        "topics": topics,
+        "abstract": " ".join(_sentence(rng, topics) for _ in range(4)),
+    }
+
+    page_texts = []
+    for page in range(pages):
+        body = " ".join(_sentence(rng, topics) for _ in range(20))
+        page_texts.append(f"{BOILERPLATE}\n\n{body}" if page == 0 else body)
+
+    return paper, page_texts
+
+
+def write_pdf(path: Path, page_texts: list[str]):
+    import fitz  # PyMuPDF
+
+    doc = fitz.open()
+    for text in page_texts:
+        page = doc.new_page()
+        page.insert_textbox(page.rect + (50, 50, -50, -50), text, fontsize=9)
+    doc.save(str(path))
+    doc.close()
+
+
+def generate_corpus(
+    n_papers: int,
+    out_dir: str,
+    fmt: str = "pdf",
+    pages: int = 6,
+    seed: int = 42
+) -> Path:
+    """
+    Generate catalog + documents. Returns the catalog path.
+    """
+    out = Path(out_dir)
+    out.mkdir(parents=True, exist_ok=True)
+    rng = random.Random(seed)
+
+    papers = []
+    for i in range(1, n_papers + 1):
+        paper, page_texts = make_paper(i, rng, pages)
+
+        if fmt == "pdf":
+            write_pdf(out / paper["filename"], page_texts)
+        else:
+            paper["filename"] = paper["filename"].replace(".pdf", ".txt")
+            (out / paper["filename"]).write_text("\n".join(page_texts), encoding="utf-8")
+
+        papers.append(paper)
+
+    catalog_path = out / "paper_catalog.json"
+    catalog_path.write_text(json.dumps({"papers": papers}, indent=1), encoding="utf-8")
+
+    return catalog_path
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Generate a synthetic paper corpus")
+    parser.add_argument("--papers", type=int, default=20)
+    parser.add_argument("--pages", type=int, default=6)
+    parser.add_argument("--format", choices=["pdf", "text"], default="pdf")
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--out", default="bench_corpus")
+
+    args = parser.parse_args()
+
+    path = generate_corpus(args.papers, args.out, args.format, args.pages, args.seed)
+    print(f"Wrote {args.papers} papers to {path.parent}")
@@ -0,0 +1,185 @@
+"""
+snapshot.py — Columnar analytics snapshot written at ingest time.
+
+Layout (inside <chroma dir>/analytics/):
+    papers.parquet      one row per catalog paper + its index stats
+    chunks.parquet      one row per stored chunk (paper_id, chunk_id, token_count)
+    aggregates.parquet  long-format catalog counts (dimension, value, count)
+    manifest.json       index_version and ingest parameters, written last
+"""
+
+import json
+import os
+import statistics
+import uuid
+from collections import Counter
+from datetime import datetime, timezone
+from pathlib import Path
+
+import pyarrow as pa
+import pyarrow.parquet as pq
+
+from src.config import CHROMA_DIR
+
+
+MANIFEST_NAME = "manifest.json"
+
+
+def analytics_dir(persist_directory=CHROMA_DIR) -> Path:
+    return Path(persist_directory) / "analytics"
+
+
+# ---------------------------------------------------
+# Catalog aggregates (shared with the dashboard fallback)
+# ---------------------------------------------------
+def catalog_aggregates(papers: list[dict]) -> list[dict]:
+    counters = {
+        "year": Counter(),
+        "venue": Counter(),
+        "section": Counter(),
+        "topic": Counter(),
+        "author": Counter(),
+    }
+
+    for paper in papers:
+        if paper.get("year") is not None:
+            counters["year"][str(paper["year"])] += 1
+        if paper.get("venue"):
+            counters["venue"][paper["venue"]] += 1
+        if paper.get("section"):
+            counters["section"][paper["section"]] += 1
+        counters["topic"].update(paper.get("topics") or [])
+        counters["author"].update(paper.get("authors") or [])
+
+    return [
+        {"dimension": dimension, "value": value, "count": count}
+        for dimension, counter in counters.items()
+        for value, count in counter.most_common()
+    ]
+
+
+# ---------------------------------------------------
+# Writer
+# ---------------------------------------------------
+class SnapshotWriter:
+    """
+    Collects per-paper index stats during ingest and writes them as Parquet.
+    """
+
+    def __init__(self, papers: list[dict]):
+        self.papers = papers
+        self.stats = {}
+        self.chunk_rows = []
+
+    def record_paper(
+        self,
+        paper_id: str,
+        chunk_ids: list[int],
+        token_counts: list[int],
+        pages: int,
+        extraction_ms: float,
+        chunking_ms: float,
+        embedding_ms: float
+    ):
+        self.stats[paper_id] = {
+            "indexed": True,
+            "pages": pages,
+            "chunk_count": len(token_counts),
+            "tokens_total": sum(token_counts),
+            "tokens_mean": round(statistics.fmean(token_counts), 1) if token_counts else 0.0,
+            "tokens_median": float(statistics.median(token_counts)) if token_counts else 0.0,
+            "tokens_max": max(token_counts, default=0),
+            "extraction_ms": round(extraction_ms, 1),
+            "chunking_ms": round(chunking_ms, 1),
+            "embedding_ms": round(embedding_ms, 1),
+        }
+
+        # The chunks' own ids, so rows join to the index metadata even
+        # when dedup skipped some of them
+        self.chunk_rows.extend(
+            {"paper_id": paper_id, "chunk_id": chunk_id, "token_count": count}
+            for chunk_id, count in zip(chunk_ids, token_counts)
+        )
+
+    def _paper_rows(self) -> list[dict]:
+        empty = {
+            "indexed": False, "pages": 0, "chunk_count": 0, "tokens_total": 0,
+            "tokens_mean": 0.0, "tokens_median": 0.0, "tokens_max": 0,
+            "extraction_ms": 0.0, "chunking_ms": 0.0, "embedding_ms": 0.0,
+        }
+
+        return [
+            {
+                "id": str(paper["id"]),
+                "title": paper.get("title", ""),
+                "authors": list(paper.get("authors") or []),
+                "year": paper.get("year"),
+                "venue": paper.get("venue", ""),
+                "section": paper.get("section", ""),
+                "topics": list(paper.get("topics") or []),
+                **self.stats.get(str(paper["id"]), empty),
+            }
+            for paper in self.papers
+        ]
+
+    def write(self, persist_directory, params: dict) -> str:
+        """
+        Write all tables, then the manifest. Returns the new index version.
+        """
+        out = analytics_dir(persist_directory)
+        out.mkdir(parents=True, exist_ok=True)
+
+        chunk_schema = pa.schema([
+            ("paper_id", pa.string()),
+            ("chunk_id", pa.int32()),
+            ("token_count", pa.int32()),
+        ])
+
+        tables = {
+            "papers.parquet": pa.Table.from_pylist(self._paper_rows()),
+            "chunks.parquet": pa.Table.from_pylist(self.chunk_rows, schema=chunk_schema),
+            "aggregates.parquet": pa.Table.from_pylist(catalog_aggregates(self.papers)),
+        }
+
+        for name, table in tables.items():
+            tmp = out / f".{name}.tmp"
+            pq.write_table(table, tmp)
+            os.replace(tmp, out / name)
+
+        index_version = uuid.uuid4().hex[:12]
+        manifest = {
+            "index_version": index_version,
+            "created_at": datetime.now(timezone.utc).isoformat(),
+            "papers": len(self.papers),
+            "papers_indexed": len(self.stats),
+            "chunks": len(self.chunk_rows),
+            **params,
+        }
+
+        tmp = out / f".{MANIFEST_NAME}.tmp"
+        tmp.write_text(json.dumps(manifest, indent=2), encoding="utf-8")
+        os.replace(tmp, out / MANIFEST_NAME)
+
+        return index_version
+
+
+# ---------------------------------------------------
+# Reader
+# ---------------------------------------------------
+def read_manifest(persist_directory=CHROMA_DIR):
+    path = analytics_dir(persist_directory) / MANIFEST_NAME
+    if not path.exists():
+        return None
+    return json.loads(path.read_text(encoding="utf-8"))
+
+
+def load_snapshot(persist_directory=CHROMA_DIR) -> dict:
+    """
+    Load every snapshot table as a pandas DataFrame.
+    """
+    out = analytics_dir(persist_directory)
+    return {
+        "papers": pq.read_table(out / "papers.parquet").to_pandas(),
+        "chunks": pq.read_table(out / "chunks.parquet").to_pandas(),
+        "aggregates": pq.read_table(out / "aggregates.parquet").to_pandas(),
+    }
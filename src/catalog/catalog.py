@@ -0,0 +1,220 @@
+import os
+import re
+import threading
+import time
+from dataclasses import dataclass, field, fields
+from pathlib import Path
+
+import orjson
+
+from src.catalog.paper_index import PaperIndex, normalize
+from src.config import CATALOG_PATH
+
+
+@dataclass(frozen=True, slots=True)
+class Paper:
+    """
+    Compact, immutable catalog record. Supports paper["key"] and
+    paper.get("key") so code written against the raw JSON dicts keeps working.
+    """
+
+    id: str
+    title: str = ""
+    authors: tuple = ()
+    year: int = None
+    venue: str = ""
+    section: str = ""
+    volume: int = None
+    doi: str = ""
+    filename: str = ""
+    topics: tuple = ()
+    abstract: str = None
+    extra: dict = field(default_factory=dict)
+
+    @classmethod
+    def from_dict(cls, data: dict) -> "Paper":
+        known = {f.name for f in fields(cls)} - {"extra"}
+        values = {k: v for k, v in data.items() if k in known}
+        values["authors"] = tuple(values.get("authors") or ())
+        values["topics"] = tuple(values.get("topics") or ())
+        extra = {k: v for k, v in data.items() if k not in known}
+        return cls(extra=extra, **values)
+
+    def to_dict(self) -> dict:
+        data = {
+            f.name: getattr(self, f.name)
+            for f in fields(self)
+            if f.name != "extra" and getattr(self, f.name) is not None
+        }
+        data["authors"] = list(self.authors)
+        data["topics"] = list(self.topics)
+        return {**data, **self.extra}
+
+    def get(self, key: str, default=None):
+        if key in self.extra:
+            return self.extra[key]
+        value = getattr(self, key, None) if key != "extra" else None
+        return default if value is None else value
+
+    def __getitem__(self, key: str):
+        value = self.get(key)
+        if value is None:
+            raise KeyError(key)
+        return value
+
+
+class Catalog:
+    """
+    Single source of truth for paper_catalog.json.
+    Parsed once with orjson, indexed by id, filename, author, year and
+    topic, and reloaded when the file's mtime changes.
+    """
+
+    def __init__(self, path: Path = CATALOG_PATH, check_interval: float = 1.0):
+        self.path = Path(path)
+        self.check_interval = check_interval
+        self.version = None
+
+        self._lock = threading.Lock()
+        self._checked_at = 0.0
+        self._browser_index = None
+
+        self.papers = ()
+        self._load()
+
+    # --------------------------------------------------
+    # Loading
+    # --------------------------------------------------
+    def _load(self):
+        stat = self.path.stat()
+        data = orjson.loads(self.path.read_bytes())
+        papers = tuple(Paper.from_dict(p) for p in data.get("papers", []))
+
+        by_id, by_filename = {}, {}
+        by_author, by_author_key, by_year, by_topic = {}, {}, {}, {}
+
+        for paper in papers:
+            by_id[paper.id] = paper
+            if paper.filename:
+                by_filename[paper.filename] = paper
+            for author in paper.authors:
+                by_author.setdefault(author, []).append(paper)
+                # Surname key: "Meier, H. E." -> "meier"
+                by_author_key.setdefault(normalize(author.split(",")[0].strip()), []).append(paper)
+            if paper.year is not None:
+                by_year.setdefault(int(paper.year), []).append(paper)
+            for topic in paper.topics:
+                by_topic.setdefault(normalize(topic), []).append(paper)
+
+        # Swap everything at once so readers never see a half-built catalog
+        self.papers = papers
+        self.by_id = by_id
+        self.by_filename = by_filename
+        self.by_author = {k: tuple(v) for k, v in by_author.items()}
+        self.by_author_key = {k: tuple(v) for k, v in by_author_key.items()}
+        self.by_year = {k: tuple(v) for k, v in by_year.items()}
+        self.by_topic = {k: tuple(v) for k, v in by_topic.items()}
+        self._browser_index = None
+        self.version = stat.st_mtime_ns
+
+    def refresh(self) -> bool:
+        """
+        Reload if the file changed. Stats the file at most once per
+        check_interval. Returns True when a reload happened.
+        """
+        now = time.monotonic()
+        if now - self._checked_at < self.check_interval:
+            return False
+
+        with self._lock:
+            self._checked_at = now
+            try:
+                mtime = self.path.stat().st_mtime_ns
+            except FileNotFoundError:
+                return False
+
+            if mtime == self.version:
+                return False
+
+            self._load()
+            return True
+
+    # --------------------------------------------------
+    # Lookups
+    # --------------------------------------------------
+    def get(self, paper_id: str):
+        return self.by_id.get(paper_id)
+
+    def by_author_name(self, name: str) -> tuple:
+        """
+        Papers by an author given as surname or full catalog form
+        ("Meier" or "Meier, H. E."), case- and accent-insensitive.
+        """
+        return self.by_author.get(name) or self.by_author_key.get(
+            normalize(name.split(",")[0].strip()), ()
+        )
+
+    def by_topic_name(self, topic: str) -> tuple:
+        return self.by_topic.get(normalize(topic), ())
+
+    def next_paper_id(self, reserved=()) -> str:
+        """Next free "paper_NNN" id, skipping ids reserved by pending jobs."""
+        taken = set(self.by_id) | set(reserved)
+        numbers = [int(m.group(1)) for pid in taken if (m := re.fullmatch(r"paper_(\d+)", pid))]
+        return f"paper_{max(numbers, default=0) + 1:03d}"
+
+    # --------------------------------------------------
+    # Writes
+    # --------------------------------------------------
+    def add_paper(self, paper: dict) -> Paper:
+        """
+        Add (or replace, by id) a paper and rewrite the catalog file
+        atomically; readers never see a partial file.
+        """
+        record = Paper.from_dict(paper)
+
+        with self._lock:
+            data = orjson.loads(self.path.read_bytes())
+            entries = [p for p in data.get("papers", []) if p.get("id") != record.id]
+            entries.append(record.to_dict())
+            data["papers"] = entries
+
+            tmp = self.path.with_name(f".{self.path.name}.tmp")
+            tmp.write_bytes(orjson.dumps(data, option=orjson.OPT_INDENT_2) + b"\n")
+            os.replace(tmp, self.path)
+
+            self._load()
+            self._checked_at = time.monotonic()
+
+        return self.by_id[record.id]
+
+    def browser_index(self) -> PaperIndex:
+        """Inverted indexes for the Paper Browser, built once per version."""
+        if self._browser_index is None:
+            self._browser_index = PaperIndex(self.papers)
+        return self._browser_index
+
+    def __len__(self):
+        return len(self.papers)
+
+
+_catalogs = {}
+_catalogs_lock = threading.Lock()
+
+
+def get_catalog(path: Path = CATALOG_PATH) -> Catalog:
+    """
+    Process-wide catalog for a path, refreshed if the file changed.
+    """
+    path = Path(path).resolve()
+    catalog = _catalogs.get(path)
+
+    if catalog is None:
+        with _catalogs_lock:
+            catalog = _catalogs.get(path)
+            if catalog is None:
+                catalog = _catalogs[path] = Catalog(path)
+                return catalog
+
+    catalog.refresh()
+    return catalog
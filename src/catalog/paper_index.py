@@ -0,0 +1,118 @@
+import re
+import unicodedata
+from bisect import bisect_left
+
+
+TOKEN_PATTERN = re.compile(r"\w+")
+
+
+def normalize(text: str) -> str:
+    """Lowercase and strip accents so 'Grabmüllerová' matches 'grabmullerova'."""
+    decomposed = unicodedata.normalize("NFKD", text.lower())
+    return "".join(c for c in decomposed if not unicodedata.combining(c))
+
+
+def tokenize(text: str) -> list[str]:
+    return TOKEN_PATTERN.findall(normalize(text))
+
+
+class PaperIndex:
+    """
+    Precomputed inverted indexes over the paper catalog.
+    Filters resolve to set intersections over paper positions and the
+    search box uses a token index over titles and abstracts, so cost
+    depends on the size of the result, not of the catalog.
+    """
+
+    FIELDS = ("title", "author", "year", "topic")
+
+    def __init__(self, papers: list[dict]):
+        self.papers = papers
+        self.fields = {field: {} for field in self.FIELDS}
+        self.tokens = {}
+
+        for position, paper in enumerate(papers):
+            self._add(position, paper)
+
+        # Sorted options for the filter widgets and vocabulary for prefix search
+        self.options = {field: sorted(values) for field, values in self.fields.items()}
+        self.vocabulary = sorted(self.tokens)
+
+    def _add(self, position: int, paper: dict):
+        values = {
+            "title": [paper.get("title", "")],
+            "author": paper.get("authors", []),
+            "year": [paper.get("year")] if paper.get("year") is not None else [],
+            "topic": paper.get("topics", []),
+        }
+
+        for field, field_values in values.items():
+            for value in field_values:
+                self.fields[field].setdefault(value, set()).add(position)
+
+        text = f"{paper.get('title', '')} {paper.get('abstract', '')}"
+        for token in set(tokenize(text)):
+            self.tokens.setdefault(token, set()).add(position)
+
+    # --------------------------------------------------
+    # Full-text search
+    # --------------------------------------------------
+    def _prefix_matches(self, prefix: str) -> set:
+        matches = set()
+        start = bisect_left(self.vocabulary, prefix)
+
+        for token in self.vocabulary[start:]:
+            if not token.startswith(prefix):
+                break
+            matches |= self.tokens[token]
+
+        return matches
+
+    def search(self, text: str):
+        """
+        Papers containing every query word; the last word also matches as
+        a prefix so results update while typing. None means no query.
+        """
+        words = tokenize(text)
+        if not words:
+            return None
+
+        sets = [self.tokens.get(word, set()) for word in words[:-1]]
+        sets.append(self._prefix_matches(words[-1]))
+
+        return set.intersection(*sorted(sets, key=len))
+
+    # --------------------------------------------------
+    # Filtering & paging
+    # --------------------------------------------------
+    def filter(
+        self,
+        titles=(),
+        authors=(),
+        years=(),
+        topics=(),
+        text: str = ""
+    ) -> list[int]:
+        """
+        Positions of matching papers, in catalog order.
+        Values within a field are OR-ed, fields are AND-ed.
+        """
+        candidate_sets = []
+
+        for field, selected in zip(self.FIELDS, (titles, authors, years, topics)):
+            if selected:
+                index = self.fields[field]
+                candidate_sets.append(set().union(*(index.get(v, set()) for v in selected)))
+
+        text_matches = self.search(text)
+        if text_matches is not None:
+            candidate_sets.append(text_matches)
+
+        if not candidate_sets:
+            return list(range(len(self.papers)))
+
+        return sorted(set.intersection(*sorted(candidate_sets, key=len)))
+
+    def page(self, positions: list[int], page: int, page_size: int) -> list[dict]:
+        start = (page - 1) * page_size
+        return [self.papers[p] for p in positions[start:start + page_size]]
@@ -1,4 +1,3 @@
-import tiktoken
 import re
 
 
@@ -12,11 +11,16 @@ class TokenChunker:
         self,
         chunk_size: int = 512,
         chunk_overlap: int = 50,
-        model: str = "gpt-4"
+        model: str = "gpt-4",
+        encoder=None
     ):
         self.chunk_size = chunk_size
         self.chunk_overlap = chunk_overlap
-        self.encoder = tiktoken.encoding_for_model(model)
+
+        if encoder is None:
+            import tiktoken
+            encoder = tiktoken.encoding_for_model(model)
+        self.encoder = encoder
 
     # --------------------------------------------------
     # Clean unwanted paper sections BEFORE chunking
@@ -0,0 +1,140 @@
+"""
+single_flight.py — Coalesce identical in-flight computations.
+
+Concurrent callers with the same key share one execution and all receive
+its result (or its exception). Nothing is cached: the entry is dropped as
+soon as the computation finishes, so a later call always recomputes.
+"""
+
+import asyncio
+import threading
+
+
+def normalize_question(question: str) -> str:
+    """Case, whitespace and trailing punctuation do not change the answer."""
+    return " ".join(question.lower().split()).strip("¿¡?!. ")
+
+
+def flight_key(question: str, *parts) -> tuple:
+    return (normalize_question(question), *parts)
+
+
+class _Counters:
+
+    def __init__(self):
+        self.calls = 0
+        self.executions = 0
+        self.collapsed = 0
+        self.errors = 0
+
+    def snapshot(self, in_flight: int) -> dict:
+        return {
+            "calls": self.calls,
+            "executions": self.executions,
+            "collapsed": self.collapsed,
+            "errors": self.errors,
+            "in_flight": in_flight,
+        }
+
+
+# ---------------------------------------------------
+# Threads (RAGPipeline, Streamlit sessions)
+# ---------------------------------------------------
+class _Call:
+    __slots__ = ("done", "result", "error")
+
+    def __init__(self):
+        self.done = threading.Event()
+        self.result = None
+        self.error = None
+
+
+class SingleFlight:
+    """
+    Thread version. The first caller for a key runs fn; callers arriving
+    while it runs block until it finishes and get the same result object,
+    which must therefore be treated as read-only.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._calls = {}
+        self._counters = _Counters()
+
+    def do(self, key, fn, *args, **kwargs):
+        """Returns (result, collapsed)."""
+        with self._lock:
+            self._counters.calls += 1
+            call = self._calls.get(key)
+
+            if call is not None:
+                self._counters.collapsed += 1
+                leader = False
+            else:
+                call = self._calls[key] = _Call()
+                self._counters.executions += 1
+                leader = True
+
+        if not leader:
+            call.done.wait()
+            if call.error is not None:
+                raise call.error
+            return call.result, True
+
+        try:
+            call.result = fn(*args, **kwargs)
+        except BaseException as e:
+            call.error = e
+            with self._lock:
+                self._counters.errors += 1
+            raise
+        finally:
+            with self._lock:
+                del self._calls[key]
+            call.done.set()
+
+        return call.result, False
+
+    def stats(self) -> dict:
+        with self._lock:
+            return self._counters.snapshot(len(self._calls))
+
+
+# ---------------------------------------------------
+# asyncio (FastAPI)
+# ---------------------------------------------------
+class AsyncSingleFlight:
+    """
+    asyncio version. The computation runs as its own task, so a client
+    disconnecting (cancelling its request) never cancels the work the
+    other waiters are sharing.
+    """
+
+    def __init__(self):
+        self._tasks = {}
+        self._counters = _Counters()
+
+    async def do(self, key, coro_fn, *args, **kwargs):
+        """Returns (result, collapsed)."""
+        self._counters.calls += 1
+        task = self._tasks.get(key)
+        collapsed = task is not None
+
+        if collapsed:
+            self._counters.collapsed += 1
+        else:
+            task = asyncio.ensure_future(coro_fn(*args, **kwargs))
+            self._tasks[key] = task
+            self._counters.executions += 1
+            task.add_done_callback(lambda t: self._finish(key, t))
+
+        return await asyncio.shield(task), collapsed
+
+    def _finish(self, key, task: asyncio.Task):
+        if self._tasks.get(key) is task:
+            del self._tasks[key]
+        if task.cancelled() or task.exception() is not None:
+            self._counters.errors += 1
+
+    def stats(self) -> dict:
+        return self._counters.snapshot(len(self._tasks))
@@ -1,7 +1,98 @@
+import json
 import os
+from pathlib import Path
 from dotenv import load_dotenv
 
 
+load_dotenv()
+
+
+# --------------------------------------------------
+# Project paths (independent of the working directory)
+# --------------------------------------------------
+PROJECT_ROOT = Path(__file__).resolve().parent.parent
+PROMPTS_DIR = PROJECT_ROOT / "prompts"
+PAPERS_DIR = PROJECT_ROOT / "papers"
+CATALOG_PATH = PAPERS_DIR / "paper_catalog.json"
+CHROMA_DIR = Path(os.getenv("RC_CHROMA_DIR", PROJECT_ROOT / "chroma_db"))
+
+
+# --------------------------------------------------
+# Query embedding micro-batching (0 ms window = off)
+# --------------------------------------------------
+EMBED_BATCH_WINDOW_MS = float(os.getenv("RC_EMBED_BATCH_WINDOW_MS", "0"))
+EMBED_BATCH_MAX_SIZE = int(os.getenv("RC_EMBED_BATCH_MAX_SIZE", "32"))
+EMBED_BATCH_SEARCH = os.getenv("RC_EMBED_BATCH_SEARCH", "0") == "1"
+
+
+# --------------------------------------------------
+# Shared HTTP transport for the OpenAI clients
+# --------------------------------------------------
+OPENAI_BASE_URL = os.getenv("OPENAI_BASE_URL") or None  # e.g. a local stub for testing
+HTTP_MAX_CONNECTIONS = int(os.getenv("RC_HTTP_MAX_CONNECTIONS", "100"))
+HTTP_MAX_KEEPALIVE = int(os.getenv("RC_HTTP_MAX_KEEPALIVE", "20"))
+HTTP_KEEPALIVE_EXPIRY = float(os.getenv("RC_HTTP_KEEPALIVE_EXPIRY", "30"))
+HTTP_CONNECT_TIMEOUT = float(os.getenv("RC_HTTP_CONNECT_TIMEOUT", "5"))
+HTTP_READ_TIMEOUT = float(os.getenv("RC_HTTP_READ_TIMEOUT", "60"))
+HTTP_POOL_TIMEOUT = float(os.getenv("RC_HTTP_POOL_TIMEOUT", "10"))
+HTTP_MAX_RETRIES = int(os.getenv("RC_HTTP_MAX_RETRIES", "3"))
+
+
+# --------------------------------------------------
+# Rate-limit scheduler for OpenAI requests (RPM / TPM token buckets per
+# model, adapted from x-ratelimit-* headers). RC_RATE_LIMITS overrides
+# per model, e.g. {"text-embedding-3-small": {"rpm": 3000, "tpm": 1000000}}
+# --------------------------------------------------
+RATE_LIMIT_ENABLED = os.getenv("RC_RATE_LIMIT", "1") == "1"
+RATE_RPM = float(os.getenv("RC_RATE_RPM", "500"))
+RATE_TPM = float(os.getenv("RC_RATE_TPM", "200000"))
+RATE_LIMITS = json.loads(os.getenv("RC_RATE_LIMITS", "{}"))
+RATE_RESERVE = float(os.getenv("RC_RATE_RESERVE", "0.2"))  # share batch/eval traffic leaves to interactive
+
+
+# --------------------------------------------------
+# Vector backend for queries: chroma | mmap (shared read-only snapshot)
+# --------------------------------------------------
+VECTOR_BACKEND = os.getenv("RC_VECTOR_BACKEND", "chroma")
+
+
+# --------------------------------------------------
+# Near-duplicate chunks (MinHash/LSH) are not embedded twice
+# --------------------------------------------------
+DEDUP_ENABLED = os.getenv("RC_DEDUP", "1") == "1"
+DEDUP_THRESHOLD = float(os.getenv("RC_DEDUP_THRESHOLD", "0.85"))
+
+
+# --------------------------------------------------
+# Profiling of pipeline queries: off | request (X-Profile header) | all,
+# plus automatic capture of calls slower than RC_PROFILE_SLOW_MS (0 = off)
+# --------------------------------------------------
+PROFILE_MODE = os.getenv("RC_PROFILE", "off").lower()
+PROFILE_SLOW_MS = float(os.getenv("RC_PROFILE_SLOW_MS", "0"))
+PROFILE_DIR = Path(os.getenv("RC_PROFILE_DIR", PROJECT_ROOT / "profiles"))
+PROFILE_KEEP = int(os.getenv("RC_PROFILE_KEEP", "50"))
+PROFILE_INTERVAL_MS = float(os.getenv("RC_PROFILE_INTERVAL_MS", "5"))
+
+
+# --------------------------------------------------
+# Token / cost accounting: per-query and per-ingest usage log (SQLite).
+# RC_USAGE_PRICES adds or overrides USD per 1M tokens, e.g.
+# {"gpt-4o-mini": {"input": 0.15, "output": 0.6}}
+# RC_USAGE_SOURCE tags every row; the Analytics page only shows "app".
+# --------------------------------------------------
+USAGE_STORE = os.getenv("RC_USAGE_STORE", "1") == "1"
+USAGE_DB = Path(os.getenv("RC_USAGE_DB", PROJECT_ROOT / "metrics" / "usage.db"))
+USAGE_SOURCE = os.getenv("RC_USAGE_SOURCE", "app")
+USAGE_PRICES = json.loads(os.getenv("RC_USAGE_PRICES", "{}"))
+
+
+# --------------------------------------------------
+# Background ingestion of uploaded papers
+# --------------------------------------------------
+INGEST_WORKERS = int(os.getenv("RC_INGEST_WORKERS", "2"))
+UPLOAD_MAX_MB = float(os.getenv("RC_UPLOAD_MAX_MB", "50"))
+
+
 def load_config():
     """
     Load environment variables from .env
@@ -18,4 +109,4 @@ def load_config():
 
     return {
         "openai_api_key": api_key
-    }
\ No newline at end of file
+    }
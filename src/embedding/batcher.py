@@ -0,0 +1,178 @@
+"""
+batcher.py — Dynamic micro-batching for concurrent query embeddings.
+
+Callers arriving within a short window (or until the batch is full) are
+sent to the API as one request. There is no background thread: the first
+caller of a batch waits out the window, runs it, and hands every other
+caller its own result.
+"""
+
+import threading
+import time
+from collections import Counter, deque
+
+from src.observability.usage import apportion, attribute, track_usage
+
+
+class _Batch:
+    __slots__ = ("items", "results", "error", "full", "done", "dispatched", "size")
+
+    def __init__(self):
+        self.items = []
+        self.results = None
+        self.error = None
+        self.full = threading.Event()
+        self.done = threading.Event()
+        self.dispatched = None
+        self.size = 0
+
+
+class MicroBatcher:
+    """
+    Collects submit() calls for up to max_wait_ms or max_batch_size items,
+    then calls batch_fn(items) once. batch_fn must return one result per
+    item, in order. Errors are raised in every caller of the batch.
+    """
+
+    def __init__(self, batch_fn, max_wait_ms: float = 5.0, max_batch_size: int = 32, window: int = 1000):
+        self.batch_fn = batch_fn
+        self.max_wait_ms = max_wait_ms
+        self.max_batch_size = max_batch_size
+
+        self._lock = threading.Lock()
+        self._open = None
+
+        self.batches = 0
+        self.items = 0
+        self.size_histogram = Counter()
+        self.wait_ms = deque(maxlen=window)
+
+    def submit(self, item):
+        """
+        Returns (result, batch_size, wait_ms), where wait_ms is the delay
+        batching added before the request was sent.
+        """
+        submitted = time.perf_counter()
+
+        with self._lock:
+            batch = self._open
+            leader = batch is None
+            if leader:
+                batch = self._open = _Batch()
+
+            index = len(batch.items)
+            batch.items.append(item)
+
+            if len(batch.items) >= self.max_batch_size:
+                self._open = None
+                batch.full.set()
+
+        if leader:
+            batch.full.wait(self.max_wait_ms / 1000)
+            self._run(batch)
+        else:
+            batch.done.wait()
+
+        wait_ms = max((batch.dispatched - submitted) * 1000, 0.0)
+        with self._lock:
+            self.wait_ms.append(wait_ms)
+
+        if batch.error is not None:
+            raise batch.error
+
+        return batch.results[index], batch.size, wait_ms
+
+    def _run(self, batch: _Batch):
+        with self._lock:
+            if self._open is batch:
+                self._open = None
+            items = list(batch.items)
+
+        batch.size = len(items)
+        batch.dispatched = time.perf_counter()
+
+        with self._lock:
+            self.batches += 1
+            self.items += batch.size
+            self.size_histogram[batch.size] += 1
+
+        try:
+            results = self.batch_fn(items)
+            if len(results) != len(items):
+                raise ValueError(f"batch_fn returned {len(results)} results for {len(items)} items")
+            batch.results = results
+        except Exception as e:
+            batch.error = e
+        finally:
+            batch.done.set()
+
+    def stats(self) -> dict:
+        with self._lock:
+            waits = sorted(self.wait_ms)
+            histogram = dict(sorted(self.size_histogram.items()))
+            batches, items = self.batches, self.items
+
+        def pct(q):
+            if not waits:
+                return 0.0
+            return round(waits[min(int(q / 100 * len(waits)), len(waits) - 1)], 3)
+
+        return {
+            "batches": batches,
+            "items": items,
+            "mean_batch_size": round(items / batches, 2) if batches else 0.0,
+            "batch_size_histogram": histogram,
+            "wait_p50_ms": pct(50),
+            "wait_p99_ms": pct(99),
+            "max_wait_ms": self.max_wait_ms,
+            "max_batch_size": self.max_batch_size,
+        }
+
+
+class BatchingEmbedder:
+    """
+    Drop-in wrapper for an embedder: embed_query() calls from concurrent
+    threads are coalesced into one embed_texts() request.
+    """
+
+    def __init__(self, embedder, max_wait_ms: float = 5.0, max_batch_size: int = 32):
+        self.embedder = embedder
+        self.batcher = MicroBatcher(self._embed_batch, max_wait_ms, max_batch_size)
+
+    def __getattr__(self, name):
+        # Everything else (client, ...) is the wrapped embedder's
+        return getattr(self.embedder, name)
+
+    @property
+    def model(self):
+        return self.embedder.model
+
+    @model.setter
+    def model(self, model):
+        self.embedder.model = model
+
+    def embed_texts(self, texts: list[str], model: str = None) -> list[list[float]]:
+        return self.embedder.embed_texts(texts, model=model)
+
+    def _embed_batch(self, items: list[tuple]) -> list[tuple]:
+        """One request per model among the (query, model) items."""
+        results = [None] * len(items)
+        by_model = {}
+        for i, (_, model) in enumerate(items):
+            by_model.setdefault(model or self.model, []).append(i)
+
+        for model, positions in by_model.items():
+            texts = [items[i][0] for i in positions]
+            # Runs in the first caller's thread: its meter must not absorb the
+            # whole batch, so each caller is charged its share afterwards
+            with track_usage(isolated=True) as usage:
+                embeddings = self.embedder.embed_texts(texts, model=model)
+            shares = apportion(usage.tokens("embedding"), texts)
+            for i, embedding, share in zip(positions, embeddings, shares):
+                results[i] = (embedding, share, usage.estimated)
+        return results
+
+    def embed_query(self, query: str, model: str = None) -> list[float]:
+        (embedding, tokens, estimated), _, _ = self.batcher.submit((query, model))
+        attribute("embedding", model or self.model, tokens, estimated=estimated)
+        return embedding
@@ -1,6 +1,7 @@
 from dotenv import load_dotenv
-import os
-from openai import OpenAI
+import threading
+
+from src.observability.usage import count_tokens, record
 
 
 # Carga variables desde .env
@@ -13,23 +14,71 @@ class OpenAIEmbedder:
     """
 
     def __init__(self, model: str = "text-embedding-3-small"):
-        # OpenAI automáticamente lee OPENAI_API_KEY desde el entorno
-        self.client = OpenAI()
         self.model = model
+        self._client = None
+        self._lock = threading.Lock()
+
+    @property
+    def client(self):
+        """
+        Process-wide OpenAI client on the shared HTTP transport,
+        created on first use so importing the embedder stays cheap.
+        """
+        if self._client is None:
+            with self._lock:
+                if self._client is None:
+                    from src.transport.http import get_openai_client
 
-    def embed_texts(self, texts: list[str]) -> list[list[float]]:
+                    # OpenAI automáticamente lee OPENAI_API_KEY desde el entorno
+                    self._client = get_openai_client()
+        return self._client
+
+    @property
+    def async_client(self):
+        from src.transport.http import get_async_openai_client
+
+        return get_async_openai_client()
+
+    def embed_texts(self, texts: list[str], model: str = None) -> list[list[float]]:
         """
         Generate embeddings for multiple texts.
+        `model` overrides self.model for this call only.
         """
+        model = model or self.model
         response = self.client.embeddings.create(
-            model=self.model,
+            model=model,
             input=texts
         )
+        self._record_usage(response, texts, model)
 
         return [item.embedding for item in response.data]
 
-    def embed_query(self, query: str) -> list[float]:
+    def _record_usage(self, response, texts: list[str], model: str):
+        """API-reported tokens, or a tiktoken estimate if there are none."""
+        tokens = getattr(getattr(response, "usage", None), "prompt_tokens", None)
+        if tokens is None:
+            record("embedding", model, count_tokens(texts, model), estimated=True)
+        else:
+            record("embedding", model, tokens)
+
+    def embed_query(self, query: str, model: str = None) -> list[float]:
         """
         Generate embedding for a single query.
         """
-        return self.embed_texts([query])[0]
\ No newline at end of file
+        return self.embed_texts([query], model=model)[0]
+
+    async def aembed_texts(self, texts: list[str], model: str = None) -> list[list[float]]:
+        """
+        Async variant, on the shared async transport.
+        """
+        model = model or self.model
+        response = await self.async_client.embeddings.create(
+            model=model,
+            input=texts
+        )
+        self._record_usage(response, texts, model)
+
+        return [item.embedding for item in response.data]
+
+    async def aembed_query(self, query: str, model: str = None) -> list[float]:
+        return (await self.aembed_texts([query], model=model))[0]
\ No newline at end of file
@@ -1,56 +1,116 @@
-from langchain_openai import ChatOpenAI
-from langchain_core.messages import HumanMessage
-import os
 import json
+import threading
+
+from src.generation.prompt_registry import get_prompt_registry
+from src.observability.usage import record
+from src.observability.tracing import get_tracer
+
+
+tracer = get_tracer()
 
 
 class Generator:
     """
     Generates answers using GPT-4o-mini with multiple prompt strategies.
-    Handles context formatting, APA citations, JSON output,
-    and optional debugging of retrieved metadata.
+    Handles context formatting, APA citations and JSON output.
+    Each stage is traced (see src/observability/tracing.py).
     """
 
-    def __init__(self, debug: bool = False):
-        self.llm = ChatOpenAI(
-            model="gpt-4o-mini",
-            temperature=0
-        )
-        self.debug = debug
+    def __init__(
+        self,
+        prompt_registry=None,
+        max_prompt_tokens: int = 16000,
+        llm=None
+    ):
+        self._llm = llm
+        self._prompts = prompt_registry
+        self._lock = threading.Lock()
+        self.max_prompt_tokens = max_prompt_tokens
+
+    # --------------------------------------------------
+    # Lazily built components (langchain, tiktoken)
+    # --------------------------------------------------
+    @property
+    def llm(self):
+        if self._llm is None:
+            with self._lock:
+                if self._llm is None:
+                    from langchain_openai import ChatOpenAI
+                    from src.transport.http import (
+                        get_async_http_client,
+                        get_http_client,
+                        openai_client_kwargs,
+                    )
+
+                    # Same pooled transport as the embedder
+                    self._llm = ChatOpenAI(
+                        model="gpt-4o-mini",
+                        temperature=0,
+                        http_client=get_http_client(),
+                        http_async_client=get_async_http_client(),
+                        **openai_client_kwargs()
+                    )
+        return self._llm
+
+    @property
+    def prompts(self):
+        if self._prompts is None:
+            self._prompts = get_prompt_registry()
+        return self._prompts
 
     # --------------------------------------------------
     # Load Prompt Strategy
     # --------------------------------------------------
     def load_prompt(self, strategy: str) -> str:
-        path = os.path.join("prompts", f"{strategy}.txt")
-
-        if not os.path.exists(path):
-            raise ValueError(f"Prompt strategy '{strategy}' not found at {path}.")
-
-        with open(path, "r", encoding="utf-8") as f:
-            return f.read()
+        return self.prompts.get(strategy).source
 
     # --------------------------------------------------
-    # Debug Metadata (NEW)
+    # Format Context
     # --------------------------------------------------
-    def _debug_metadata(self, context_chunks: list):
-        if not self.debug:
-            return
+    CHUNK_SEPARATOR = "\n\n---\n\n"
 
-        print("\n🔎 DEBUG — Retrieved Context Metadata\n" + "-" * 50)
+    def _format_chunk(self, idx: int, chunk) -> str | None:
 
-        for i, chunk in enumerate(context_chunks[:3]):  # limit to first 3
-            metadata = chunk.get("metadata", {})
-            print(f"\nSource {i + 1}:")
-            print("Title  :", metadata.get("title"))
-            print("Authors:", metadata.get("authors"))
-            print("Year   :", metadata.get("year"))
+        if isinstance(chunk, dict):
+            text = chunk.get("document", "") or chunk.get("text", "") or ""
+            metadata = chunk.get("metadata", {}) or {}
+            score = chunk.get("similarity_score")
 
-        print("-" * 50 + "\n")
+        elif hasattr(chunk, "page_content"):
+            text = chunk.page_content
+            metadata = getattr(chunk, "metadata", {}) or {}
+            score = getattr(chunk, "score", None)
+
+        elif isinstance(chunk, str):
+            text = chunk
+            metadata = {}
+            score = None
+
+        else:
+            return None
+
+        title   = metadata.get("title", "")
+        authors = metadata.get("authors", "")
+        year    = metadata.get("year", "")
+        score_text = f"Similarity: {round(score, 3)}\n" if score else ""
+
+        header_parts = []
+        if title:
+            header_parts.append(f"Title: {title}")
+        if authors:
+            header_parts.append(f"Authors: {authors}")
+        if year:
+            header_parts.append(f"Year: {year}")
+
+        header = "\n".join(header_parts)
+
+        return (
+            f"[Source {idx + 1}]\n"
+            f"{header}\n"
+            f"{score_text}\n"
+            f"{text.strip()}"
+        )
 
-    # --------------------------------------------------
-    # Format Context
-    # --------------------------------------------------
     def format_context(self, context_chunks: list) -> str:
 
         if not context_chunks:
@@ -59,48 +119,60 @@ class Generator:
         formatted_chunks = []
 
         for idx, chunk in enumerate(context_chunks):
+            formatted = self._format_chunk(idx, chunk)
+            if formatted is not None:
+                formatted_chunks.append(formatted)
 
-            if isinstance(chunk, dict):
-                text = chunk.get("document", "") or chunk.get("text", "") or ""
-                metadata = chunk.get("metadata", {}) or {}
-                score = chunk.get("similarity_score")
+        return self.CHUNK_SEPARATOR.join(formatted_chunks)
 
-            elif hasattr(chunk, "page_content"):
-                text = chunk.page_content
-                metadata = getattr(chunk, "metadata", {}) or {}
-                score = getattr(chunk, "score", None)
+    # --------------------------------------------------
+    # Pack Context into the token budget
+    # --------------------------------------------------
+    def context_budget(self, question: str, strategy: str) -> int:
+        """
+        Tokens left for context once the template's static text and
+        the question are accounted for.
+        """
+        template = self.prompts.get(strategy)
+        question_tokens = (
+            self.prompts.count_tokens(question)
+            * template.placeholder_counts["question"]
+        )
+        budget = self.max_prompt_tokens - template.static_tokens - question_tokens
+        return max(budget // template.placeholder_counts["context"], 0)
 
-            elif isinstance(chunk, str):
-                text = chunk
-                metadata = {}
-                score = None
+    def pack_context(self, question: str, context_chunks: list, strategy: str):
+        """
+        Keep retrieved chunks (in rank order) while they fit the budget.
+        Returns the context string and the chunks actually used.
+        """
+        budget = self.context_budget(question, strategy)
+        separator_tokens = self.prompts.count_tokens(self.CHUNK_SEPARATOR)
 
-            else:
+        formatted_chunks = []
+        used_chunks = []
+        used_tokens = 0
+
+        for chunk in context_chunks:
+            formatted = self._format_chunk(len(formatted_chunks), chunk)
+            if formatted is None:
                 continue
 
-            title   = metadata.get("title", "")
-            authors = metadata.get("authors", "")
-            year    = metadata.get("year", "")
-            score_text = f"Similarity: {round(score, 3)}\n" if score else ""
-
-            header_parts = []
-            if title:
-                header_parts.append(f"Title: {title}")
-            if authors:
-                header_parts.append(f"Authors: {authors}")
-            if year:
-                header_parts.append(f"Year: {year}")
-
-            header = "\n".join(header_parts)
-
-            formatted_chunks.append(
-                f"[Source {idx + 1}]\n"
-                f"{header}\n"
-                f"{score_text}\n"
-                f"{text.strip()}"
-            )
+            cost = self.prompts.count_tokens(formatted)
+            if formatted_chunks:
+                cost += separator_tokens
+
+            if used_tokens + cost > budget:
+                break
+
+            formatted_chunks.append(formatted)
+            used_chunks.append(chunk)
+            used_tokens += cost
 
-        return "\n\n---\n\n".join(formatted_chunks)
+        if not formatted_chunks:
+            return "No context available.", []
+
+        return self.CHUNK_SEPARATOR.join(formatted_chunks), used_chunks
 
     # --------------------------------------------------
     # APA Citations
@@ -155,6 +227,27 @@ class Generator:
                 "raw_output": raw
             }
 
+    # --------------------------------------------------
+    # Token usage (API counts, tiktoken estimate as fallback)
+    # --------------------------------------------------
+    def _usage_from_response(self, response, final_prompt: str) -> dict:
+        usage = getattr(response, "usage_metadata", None) or {}
+
+        prompt_tokens = usage.get("input_tokens")
+        completion_tokens = usage.get("output_tokens")
+        estimated = prompt_tokens is None or completion_tokens is None
+
+        if prompt_tokens is None:
+            prompt_tokens = self.prompts.count_tokens(final_prompt)
+        if completion_tokens is None:
+            completion_tokens = self.prompts.count_tokens(str(response.content))
+
+        return {
+            "prompt_tokens": prompt_tokens,
+            "completion_tokens": completion_tokens,
+            "estimated": estimated
+        }
+
     # --------------------------------------------------
     # Main Generate
     # --------------------------------------------------
@@ -172,42 +265,59 @@ class Generator:
                     "a topic covered in the collection."
                 ),
                 "citations": [],
-                "citation_map": {}
+                "citation_map": {},
+                "usage": {"prompt_tokens": 0, "completion_tokens": 0, "estimated": False}
             }
 
-        # 🔎 DEBUG HERE (before generation)
-        self._debug_metadata(context_chunks)
+        with tracer.start_as_current_span("generation.format_context") as span:
+            template = self.prompts.get(strategy)
+            span.set_attribute("prompt.strategy", strategy)
+            span.set_attribute("prompt.static_tokens", template.static_tokens)
+            span.set_attribute("context.chunks_in", len(context_chunks))
 
-        template = self.load_prompt(strategy)
-        context  = self.format_context(context_chunks)
+            context, context_chunks = self.pack_context(
+                question,
+                context_chunks,
+                strategy
+            )
 
-        try:
-            final_prompt = template.format(
+            final_prompt = template.render(
                 question=question,
                 context=context
             )
-        except KeyError:
-            final_prompt = (
-                f"{template}\n\n"
-                f"Question:\n{question}\n\n"
-                f"Context:\n{context}"
-            )
 
-        response = self.llm.invoke(
-            [HumanMessage(content=final_prompt)]
-        )
+            span.set_attribute("context.chunks_used", len(context_chunks))
+            span.set_attribute("context.titles", [
+                str(chunk.get("metadata", {}).get("title", ""))
+                for chunk in context_chunks[:3] if isinstance(chunk, dict)
+            ])
+
+        with tracer.start_as_current_span("generation.llm_call") as span:
+            from langchain_core.messages import HumanMessage
+
+            span.set_attribute("llm.model", self.llm.model_name)
+            response = self.llm.invoke(
+                [HumanMessage(content=final_prompt)]
+            )
 
-        raw_answer = response.content
+            raw_answer = response.content
+            usage = self._usage_from_response(response, final_prompt)
+            record("chat", self.llm.model_name, usage["prompt_tokens"], usage["completion_tokens"], usage["estimated"])
+            span.set_attribute("llm.prompt_tokens", usage["prompt_tokens"])
+            span.set_attribute("llm.completion_tokens", usage["completion_tokens"])
 
         if "json" in strategy.lower():
             answer = self._parse_json_answer(raw_answer)
         else:
             answer = raw_answer
 
-        citations, citation_map = self.format_apa_citations(context_chunks)
+        with tracer.start_as_current_span("generation.citations") as span:
+            citations, citation_map = self.format_apa_citations(context_chunks)
+            span.set_attribute("citations.count", len(citations))
 
         return {
             "answer": answer,
             "citations": citations,
-            "citation_map": citation_map
+            "citation_map": citation_map,
+            "usage": usage
         }
\ No newline at end of file
@@ -0,0 +1,201 @@
+import re
+import threading
+from pathlib import Path
+
+from loguru import logger
+
+from src.config import PROMPTS_DIR
+
+
+# Only these names are placeholders; every other brace (e.g. the JSON
+# schema in v2_json_output) is literal template text.
+PLACEHOLDER_PATTERN = re.compile(r"\{(context|question)\}")
+REQUIRED_PLACEHOLDERS = ("context", "question")
+
+
+class PromptTemplate:
+    """
+    A prompt strategy compiled once into literal segments and placeholders.
+    Keeps the token cost of the static text so callers can budget context.
+    """
+
+    def __init__(self, name: str, source: str, mtime: float, encoder):
+        self.name = name
+        self.source = source
+        self.mtime = mtime
+
+        self.segments = []  # list of (is_placeholder, value)
+        position = 0
+
+        for match in PLACEHOLDER_PATTERN.finditer(source):
+            if match.start() > position:
+                self.segments.append((False, source[position:match.start()]))
+            self.segments.append((True, match.group(1)))
+            position = match.end()
+
+        if position < len(source):
+            self.segments.append((False, source[position:]))
+
+        found = {value for is_field, value in self.segments if is_field}
+        missing = [p for p in REQUIRED_PLACEHOLDERS if p not in found]
+
+        if missing:
+            raise ValueError(
+                f"Prompt strategy '{name}' is missing placeholder(s): "
+                + ", ".join(f"{{{p}}}" for p in missing)
+            )
+
+        static_text = "".join(value for is_field, value in self.segments if not is_field)
+        self.static_tokens = len(encoder.encode(static_text))
+
+        # Placeholders may appear more than once; each occurrence costs tokens.
+        self.placeholder_counts = {
+            p: sum(1 for is_field, value in self.segments if is_field and value == p)
+            for p in REQUIRED_PLACEHOLDERS
+        }
+
+    def render(self, question: str, context: str) -> str:
+        values = {"question": question, "context": context}
+        return "".join(
+            values[value] if is_field else value
+            for is_field, value in self.segments
+        )
+
+
+class PromptRegistry:
+    """
+    Loads, validates and precompiles every prompt strategy at startup.
+    A background watcher hot-reloads templates whose files change, so
+    lookups on the request path never touch the filesystem.
+    """
+
+    def __init__(
+        self,
+        prompts_dir: Path = PROMPTS_DIR,
+        model: str = "gpt-4o-mini",
+        reload_interval: float = 2.0,
+        encoder=None
+    ):
+        self.prompts_dir = Path(prompts_dir)
+
+        if encoder is None:
+            import tiktoken
+            encoder = tiktoken.encoding_for_model(model)
+        self.encoder = encoder
+        self.reload_interval = reload_interval
+
+        self._templates = {}
+        self._lock = threading.Lock()
+        self._stop = threading.Event()
+        self._watcher = None
+
+        self.load_all()
+
+        if reload_interval:
+            self._watcher = threading.Thread(
+                target=self._watch,
+                name="prompt-registry-watcher",
+                daemon=True
+            )
+            self._watcher.start()
+
+    # --------------------------------------------------
+    # Loading
+    # --------------------------------------------------
+    def _compile(self, path: Path) -> PromptTemplate:
+        mtime = path.stat().st_mtime
+        source = path.read_text(encoding="utf-8")
+        return PromptTemplate(path.stem, source, mtime, self.encoder)
+
+    def load_all(self):
+        """
+        Compile every prompts/*.txt. Fails fast on an invalid template.
+        """
+        paths = sorted(self.prompts_dir.glob("*.txt"))
+
+        if not paths:
+            raise ValueError(f"No prompt strategies found in {self.prompts_dir}.")
+
+        templates = {path.stem: self._compile(path) for path in paths}
+
+        with self._lock:
+            self._templates = templates
+
+        logger.info(f"Loaded {len(templates)} prompt strategies: {', '.join(templates)}")
+
+    # --------------------------------------------------
+    # Lookup (no filesystem access)
+    # --------------------------------------------------
+    def get(self, strategy: str) -> PromptTemplate:
+        template = self._templates.get(strategy)
+
+        if template is None:
+            raise ValueError(
+                f"Prompt strategy '{strategy}' not found. "
+                f"Available: {', '.join(self.strategies())}."
+            )
+
+        return template
+
+    def strategies(self) -> list[str]:
+        return sorted(self._templates)
+
+    def count_tokens(self, text: str) -> int:
+        return len(self.encoder.encode(text)) if text else 0
+
+    # --------------------------------------------------
+    # Hot reload
+    # --------------------------------------------------
+    def _reload_changed(self):
+        current = dict(self._templates)
+        changed = False
+
+        for path in self.prompts_dir.glob("*.txt"):
+            try:
+                mtime = path.stat().st_mtime
+            except FileNotFoundError:
+                continue
+
+            known = current.get(path.stem)
+            if known is not None and known.mtime == mtime:
+                continue
+
+            try:
+                current[path.stem] = self._compile(path)
+                changed = True
+                logger.info(f"Reloaded prompt strategy '{path.stem}'")
+            except (OSError, ValueError) as e:
+                # Keep serving the last valid version
+                logger.warning(f"Ignoring invalid prompt '{path.stem}': {e}")
+
+        if changed:
+            with self._lock:
+                self._templates = current
+
+    def _watch(self):
+        while not self._stop.wait(self.reload_interval):
+            try:
+                self._reload_changed()
+            except Exception as e:
+                logger.warning(f"Prompt watcher error: {e}")
+
+    def close(self):
+        self._stop.set()
+
+
+_registry = None
+_registry_lock = threading.Lock()
+
+
+def get_prompt_registry() -> PromptRegistry:
+    """
+    Process-wide registry shared by every Generator.
+    """
+    global _registry
+
+    if _registry is None:
+        with _registry_lock:
+            if _registry is None:
+                _registry = PromptRegistry()
+
+    return _registry
@@ -6,14 +6,18 @@ Usage:
     python -m src.ingest --chunk-size 256
     python -m src.ingest --chunk-size 1024
     python -m src.ingest --reset
+
+--reset rebuilds into a new versioned collection and only switches
+queries over once it validates (see src/reindex.py); without it,
+papers are upserted into the active collection.
 """
 
 from dotenv import load_dotenv
 load_dotenv()
 
 import json
+import time
 import argparse
-from pathlib import Path
 from tqdm import tqdm
 from loguru import logger
 
@@ -22,11 +26,17 @@ from src.ingestion.text_cleaner import clean_extracted_text
 from src.chunking.chunker import TokenChunker
 from src.embedding.embedder import OpenAIEmbedder
 from src.vectorstore.chroma_store import ChromaVectorStore
+from src.vectorstore.collections import prune_versions, validate_collection, version_name
+from src.vectorstore.mmap_store import export_snapshot, read_current, snapshot_root
+from src.analytics.snapshot import SnapshotWriter, analytics_dir
+from src.ingestion.dedup import ChunkDeduplicator
+from src.catalog.catalog import get_catalog
+from src.observability.usage import track_usage
+from src.transport.rate_limit import request_priority
+from src.config import DEDUP_ENABLED, DEDUP_THRESHOLD, PAPERS_DIR, VECTOR_BACKEND, CHROMA_DIR as CHROMA_PATH
 
 
-PAPERS_DIR = Path("papers")
-CATALOG_PATH = PAPERS_DIR / "paper_catalog.json"
-CHROMA_DIR = "./chroma_db"
+CHROMA_DIR = str(CHROMA_PATH)
 COLLECTION_NAME = "papers"
 
 
@@ -57,136 +67,416 @@ def clean_metadata(meta: dict) -> dict:
     return cleaned
 
 
-def load_catalog() -> list[dict]:
-    """Load paper metadata from catalog JSON."""
-    with open(CATALOG_PATH, "r", encoding="utf-8") as f:
-        data = json.load(f)
-    return data["papers"]
+def build_paper_metadata(paper: dict) -> dict:
+    """Flatten a catalog entry into Chroma-compatible chunk metadata."""
+    paper_metadata = {
+        "paper_id": str(paper["id"]),
+        "title": str(paper["title"]),  # ✅ FIXED (consistent with generator)
+        "authors": ", ".join(map(str, paper.get("authors", []))),
+        "year": int(paper["year"]) if paper.get("year") else None,
+        "venue": str(paper.get("venue", "")),
+        "doi": str(paper.get("doi", "")),
+        "section": str(paper.get("section", "")),
+    }
+
+    return clean_metadata(paper_metadata)
+
+
+def build_chunk_records(paper: dict, paper_metadata: dict, chunks: list[dict]):
+    """
+    Build the (ids, documents, metadatas) lists stored in ChromaDB.
+    """
+    ids = []
+    documents = []
+    metadatas = []
+
+    for chunk in chunks:
+        chunk_id = int(chunk["chunk_id"])
+        token_count = int(chunk["token_count"])
+
+        ids.append(f"{paper['id']}_chunk_{chunk_id:04d}")
+        documents.append(chunk["text"])
+
+        meta = {
+            **paper_metadata,
+            "chunk_id": chunk_id,
+            "token_count": token_count
+        }
+
+        metadatas.append(clean_metadata(meta))
+
+    return ids, documents, metadatas
+
+
+def seed_deduplicator(deduplicator, collection):
+    """Treat every chunk already in `collection` as kept."""
+    stored = collection.get(include=["documents", "metadatas"])
+    deduplicator.seed(
+        stored["ids"],
+        stored["documents"],
+        [(meta or {}).get("paper_id") for meta in stored["metadatas"]]
+    )
+
+
+def write_dedup_report(deduplicator, collection, persist_directory) -> dict:
+    report = deduplicator.report()
+    kept = [cluster["kept"] for cluster in report["top_clusters"]]
+    if kept:
+        stored = collection.get(ids=kept, include=["documents"])
+        report = deduplicator.report(texts=dict(zip(stored["ids"], stored["documents"])))
+
+    out = analytics_dir(persist_directory)
+    out.mkdir(parents=True, exist_ok=True)
+    (out / "dedup_report.json").write_text(json.dumps(report, indent=2, ensure_ascii=False), encoding="utf-8")
+    return report
+
+
+def publish_version(
+    vectorstore,
+    alias: str,
+    active,
+    expected_chunks: int,
+    expected_papers: set,
+    persist_directory: str = CHROMA_DIR,
+    sample_queries: dict = None,
+    embedder=None,
+    allow_shrink: bool = False,
+    keep_versions: int = 2,
+    **info
+) -> dict:
+    """
+    Validate the freshly built vectorstore.collection and, if it passes,
+    make it the active version of `alias`: flip the pointer, drop old
+    versions and re-export the mmap snapshot. A failing build is deleted.
+    `info` is recorded in the pointer history. Returns the validation.
+    """
+    target = vectorstore.collection.name
+    with request_priority("batch"):
+        validation = validate_collection(
+            vectorstore.collection,
+            expected_chunks=expected_chunks,
+            expected_papers=expected_papers,
+            active=active,
+            sample_queries=sample_queries,
+            embedder=embedder,
+            allow_shrink=allow_shrink
+        )
+    logger.info(f"Validation of {target}: {validation['checks']}")
+
+    if not validation["ok"]:
+        logger.error(f"Not activating {target}: {'; '.join(validation['errors'])}")
+        vectorstore.client.delete_collection(target)
+        return validation
+
+    vectorstore.pointer.activate(alias, target, **info)
+    logger.success(f"Active collection for '{alias}': {active.name} -> {target}")
+
+    deleted = prune_versions(vectorstore.client, vectorstore.pointer, alias, keep=keep_versions)
+    if deleted:
+        logger.info(f"Dropped old versions: {', '.join(deleted)}")
+
+    # Workers on the mmap backend remap to the new generation
+    if VECTOR_BACKEND == "mmap" or read_current(snapshot_root(persist_directory, alias)):
+        manifest = export_snapshot(vectorstore.collection, persist_directory, alias=alias)
+        logger.info(f"mmap snapshot generation {manifest['generation']} ({manifest['count']} vectors)")
+
+    return validation
+
+
+def load_catalog() -> list:
+    """Load paper metadata from the shared catalog."""
+    return list(get_catalog().papers)
+
+
+# ---------------------------------------------------
+# One paper: extract → clean → chunk → embed → upsert
+# ---------------------------------------------------
+EMBED_BATCH_SIZE = 100
 
 
-def ingest(chunk_size: int = 512, chunk_overlap: int = 50, reset: bool = False):
+def ingest_paper(paper, pdf_path, chunker, embedder, vectorstore, progress=None, dedup=None) -> dict:
+    """
+    Index a single paper into the vectorstore's current collection.
+    Chunks are upserted, then any left over from a previous version of
+    the paper are deleted, so the paper stays searchable throughout.
+    With a ChunkDeduplicator, boilerplate (chunks repeating those kept by
+    several other papers) is neither embedded nor stored; the paper's
+    chunks are added to the deduplicator only once they are stored.
+    progress(stage, fraction) is called as work advances.
+    Returns chunk/page counts and per-stage timings.
+    """
+    report = progress or (lambda stage, fraction: None)
+
+    # -------------------------
+    # Extract & clean text
+    # -------------------------
+    report("extract", 0.0)
+    t0 = time.perf_counter()
+    extracted = extract_text_from_pdf(str(pdf_path))
+    clean_text = clean_extracted_text(extracted["text"])
+
+    # -------------------------
+    # Build paper metadata & chunk records
+    # -------------------------
+    report("chunk", 0.2)
+    t1 = time.perf_counter()
+    paper_metadata = build_paper_metadata(paper)
+    chunks = chunker.chunk_text(clean_text, metadata=paper_metadata)
+    ids, documents, metadatas = build_chunk_records(paper, paper_metadata, chunks)
+
+    pending = None
+    if dedup is not None:
+        keep, pending = dedup.filter_chunks(
+            str(paper["id"]), ids, documents, [meta["token_count"] for meta in metadatas]
+        )
+        ids = [ids[i] for i in keep]
+        documents = [documents[i] for i in keep]
+        metadatas = [metadatas[i] for i in keep]
+
+    # -------------------------
+    # Generate embeddings (batched)
+    # -------------------------
+    t2 = time.perf_counter()
+    all_embeddings = []
+
+    # Ingest yields to interactive queries on the shared rate limits
+    with request_priority("batch"):
+        for i in range(0, len(documents), EMBED_BATCH_SIZE):
+            report("embed", 0.3 + 0.6 * i / max(len(documents), 1))
+            batch = documents[i:i + EMBED_BATCH_SIZE]
+            all_embeddings.extend(embedder.embed_texts(batch))
+    t3 = time.perf_counter()
+
+    # -------------------------
+    # Store in ChromaDB
+    # -------------------------
+    report("upsert", 0.9)
+    if ids:
+        vectorstore.upsert_documents(
+            ids=ids,
+            documents=documents,
+            embeddings=all_embeddings,
+            metadatas=metadatas
+        )
+    if pending is not None:
+        # Only chunks that are actually stored become dedup targets
+        dedup.add(pending)
+    stale = set(vectorstore.paper_chunk_ids(str(paper["id"]))) - set(ids)
+    if stale:
+        vectorstore.delete_documents(sorted(stale))
+    report("done", 1.0)
+
+    return {
+        "chunks": len(ids),
+        "duplicates": len(pending["skipped"]) if pending is not None else 0,
+        "chunk_ids": [int(meta["chunk_id"]) for meta in metadatas],
+        "token_counts": [int(meta["token_count"]) for meta in metadatas],
+        "pages": extracted["total_pages"],
+        "extraction_ms": (t1 - t0) * 1000,
+        "chunking_ms": (t2 - t1) * 1000,
+        "embedding_ms": (t3 - t2) * 1000,
+    }
+
+
+def ingest(
+    chunk_size: int = 512,
+    chunk_overlap: int = 50,
+    reset: bool = False,
+    collection_name: str = COLLECTION_NAME,
+    persist_directory: str = CHROMA_DIR,
+    embedding_model: str = "text-embedding-3-small",
+    embedder=None,
+    chunker=None,
+    sample_queries: dict = None,
+    keep_versions: int = 2,
+    allow_shrink: bool = False,
+    dedup: bool = DEDUP_ENABLED
+) -> dict:
+    """
+    Index every catalog paper into a Chroma collection.
+
+    With reset=True the live collection is left alone: everything is
+    built into a new version of `collection_name`, validated, and only
+    then made active (older versions beyond `keep_versions` are dropped).
+    A build that fails validation is deleted and never served.
+
+    With dedup, chunks that repeat across papers (publisher boilerplate)
+    are embedded once; the counts and largest clusters are written to
+    analytics/dedup_report.json.
+
+    Returns a summary with paper/chunk counts and elapsed seconds.
+    """
     logger.info(f"Starting ingestion | chunk_size={chunk_size} | overlap={chunk_overlap}")
+    started = time.perf_counter()
 
     # 1️⃣ Load catalog
     papers = load_catalog()
     logger.info(f"Found {len(papers)} papers in catalog")
 
     # 2️⃣ Setup components
-    chunker = TokenChunker(chunk_size=chunk_size, chunk_overlap=chunk_overlap)
-    embedder = OpenAIEmbedder()
-    vectorstore = ChromaVectorStore(persist_directory=CHROMA_DIR)
+    chunker = chunker or TokenChunker(chunk_size=chunk_size, chunk_overlap=chunk_overlap)
+    embedder = embedder or OpenAIEmbedder(model=embedding_model)
+    vectorstore = ChromaVectorStore(persist_directory=persist_directory)
 
-    # 3️⃣ Reset collection if requested
+    # 3️⃣ Target collection: a fresh shadow version, or the active one
+    active = vectorstore.open_active(collection_name)
     if reset:
-        logger.warning("Resetting ChromaDB collection...")
-        try:
-            vectorstore.client.delete_collection(COLLECTION_NAME)
-            logger.info("Collection deleted")
-        except Exception:
-            pass
-
-    collection = vectorstore.create_collection(COLLECTION_NAME)
+        target = version_name(collection_name)
+        logger.info(f"Building shadow collection {target} (active: {active.name})")
+        vectorstore.create_collection(target, metadata={
+            "embedding_model": embedder.model,
+            "chunk_size": chunk_size,
+            "chunk_overlap": chunk_overlap,
+        })
+    else:
+        target = active.name
+
+    deduplicator = None
+    if dedup:
+        deduplicator = ChunkDeduplicator(threshold=DEDUP_THRESHOLD)
+        if not reset:
+            seed_deduplicator(deduplicator, vectorstore.collection)
 
     total_chunks = 0
     skipped = 0
     successful = 0
+    snapshot = SnapshotWriter(papers)
+
+    ingested = set()
 
-    # 4️⃣ Process each paper
-    for paper in tqdm(papers, desc="Ingesting papers"):
+    def process(paper):
+        nonlocal total_chunks, skipped, successful
         pdf_path = PAPERS_DIR / paper["filename"]
 
         if not pdf_path.exists():
             logger.warning(f"PDF not found, skipping: {pdf_path}")
             skipped += 1
-            continue
+            return
 
         try:
-            # -------------------------
-            # Extract & clean text
-            # -------------------------
-            extracted = extract_text_from_pdf(str(pdf_path))
-            raw_text = extracted["text"]
-            clean_text = clean_extracted_text(raw_text)
-
-            # -------------------------
-            # Build paper metadata (FIXED)
-            # -------------------------
-            paper_metadata = {
-                "paper_id": str(paper["id"]),
-                "title": str(paper["title"]),  # ✅ FIXED (consistent with generator)
-                "authors": ", ".join(map(str, paper.get("authors", []))),
-                "year": int(paper["year"]) if paper.get("year") else None,
-                "venue": str(paper.get("venue", "")),
-                "doi": str(paper.get("doi", "")),
-                "section": str(paper.get("section", "")),
-            }
-
-            paper_metadata = clean_metadata(paper_metadata)
-
-            # -------------------------
-            # Chunk text
-            # -------------------------
-            chunks = chunker.chunk_text(clean_text, metadata=paper_metadata)
-
-            ids = []
-            documents = []
-            embeddings_input = []
-            metadatas = []
-
-            for chunk in chunks:
-                chunk_id = int(chunk["chunk_id"])
-                token_count = int(chunk["token_count"])
-
-                ids.append(f"{paper['id']}_chunk_{chunk_id:04d}")
-                documents.append(chunk["text"])
-                embeddings_input.append(chunk["text"])
-
-                meta = {
-                    **paper_metadata,
-                    "chunk_id": chunk_id,
-                    "token_count": token_count
-                }
-
-                meta = clean_metadata(meta)
-                metadatas.append(meta)
-
-            # -------------------------
-            # Generate embeddings (batched)
-            # -------------------------
-            all_embeddings = []
-            batch_size = 100
-
-            for i in range(0, len(embeddings_input), batch_size):
-                batch = embeddings_input[i:i + batch_size]
-                batch_embeddings = embedder.embed_texts(batch)
-                all_embeddings.extend(batch_embeddings)
-
-            # -------------------------
-            # Store in ChromaDB
-            # -------------------------
-            collection.add(
-                ids=ids,
-                documents=documents,
-                embeddings=all_embeddings,
-                metadatas=metadatas
+            stats = ingest_paper(paper, pdf_path, chunker, embedder, vectorstore, dedup=deduplicator)
+
+            snapshot.record_paper(
+                str(paper["id"]),
+                chunk_ids=stats["chunk_ids"],
+                token_counts=stats["token_counts"],
+                pages=stats["pages"],
+                extraction_ms=stats["extraction_ms"],
+                chunking_ms=stats["chunking_ms"],
+                embedding_ms=stats["embedding_ms"]
             )
 
-            total_chunks += len(chunks)
+            total_chunks += stats["chunks"]
             successful += 1
+            if stats["chunks"]:
+                ingested.add(str(paper["id"]))
 
             logger.success(
-                f"✓ {paper['id']} — {paper['title'][:50]} ({len(chunks)} chunks)"
+                f"✓ {paper['id']} — {paper['title'][:50]} ({stats['chunks']} chunks)"
             )
 
         except Exception as e:
             logger.error(f"Failed to process {paper['filename']}: {e}")
 
+    # Every embedding call below (papers, catch-up, validation) is accounted
+    # to this run and saved to the usage store
+    with track_usage("ingest", label=collection_name) as usage:
+        # 4️⃣ Process each paper
+        for paper in tqdm(papers, desc="Ingesting papers"):
+            process(paper)
+
+        # Papers uploaded through the API while the shadow was being built
+        if reset:
+            seen = {str(paper["id"]) for paper in papers}
+            catalog = get_catalog()
+            catalog.refresh()
+            late = [paper for paper in catalog.papers if paper.id not in seen]
+            if late:
+                logger.info(f"Catching up {len(late)} papers added during the rebuild")
+                snapshot.papers = papers = papers + late
+                for paper in late:
+                    process(paper)
+
+        # 5️⃣ Validate and flip (blue/green only)
+        validation = None
+        if reset:
+            if sample_queries is None:
+                # Each sampled paper's title should retrieve that paper
+                sampled = [paper for paper in papers if str(paper["id"]) in ingested]
+                sampled = sampled[::max(len(sampled) // 5, 1)][:5]
+                sample_queries = {paper["title"]: str(paper["id"]) for paper in sampled}
+
+            validation = publish_version(
+                vectorstore,
+                collection_name,
+                active,
+                expected_chunks=total_chunks,
+                expected_papers=ingested,
+                persist_directory=persist_directory,
+                sample_queries=sample_queries,
+                embedder=embedder,
+                allow_shrink=allow_shrink,
+                keep_versions=keep_versions,
+                chunks=total_chunks,
+                embedding_model=embedder.model,
+                chunk_size=chunk_size,
+                chunk_overlap=chunk_overlap
+            )
+
+            if not validation["ok"]:
+                return {
+                    "collection": target,
+                    "activated": False,
+                    "validation": validation,
+                    "papers_processed": successful,
+                    "papers_skipped": skipped,
+                    "total_chunks": total_chunks,
+                    "usage": usage.summary(),
+                    "seconds": round(time.perf_counter() - started, 3)
+                }
+
     logger.info("─" * 60)
     logger.info("Ingestion complete!")
     logger.info(f"  Papers processed : {successful}/{len(papers)}")
     logger.info(f"  Papers skipped   : {skipped}")
     logger.info(f"  Total chunks     : {total_chunks}")
-    logger.info(f"  ChromaDB path    : {CHROMA_DIR}")
+    logger.info(f"  ChromaDB path    : {persist_directory}")
+    logger.info(f"  Collection       : {target}")
+
+    summary = usage.summary()
+    logger.info(f"  Embedding tokens : {summary['embedding_tokens']} (${summary['cost_usd']:.4f})")
+
+    dedup_report = None
+    if deduplicator is not None:
+        dedup_report = write_dedup_report(deduplicator, vectorstore.collection, persist_directory)
+        logger.info(
+            f"  Duplicates       : {dedup_report['skipped']} chunks skipped "
+            f"({dedup_report['exact']} exact, {dedup_report['near']} near, "
+            f"{dedup_report['tokens_skipped']} tokens not embedded)"
+        )
+
+    # 6️⃣ Analytics snapshot for the dashboard
+    index_version = snapshot.write(persist_directory, {
+        "collection": target,
+        "chunk_size": chunk_size,
+        "chunk_overlap": chunk_overlap,
+        "embedding_model": embedder.model,
+        "duplicates_skipped": dedup_report["skipped"] if dedup_report else 0,
+    })
+    logger.info(f"  Index version    : {index_version}")
+
+    return {
+        "collection": target,
+        "activated": reset,
+        "validation": validation,
+        "papers_processed": successful,
+        "papers_skipped": skipped,
+        "total_chunks": total_chunks,
+        "dedup": {k: v for k, v in dedup_report.items() if k != "top_clusters"} if dedup_report else None,
+        "index_version": index_version,
+        "usage": summary,
+        "seconds": round(time.perf_counter() - started, 3)
+    }
 
 
 if __name__ == "__main__":
@@ -194,11 +484,13 @@ if __name__ == "__main__":
     parser.add_argument("--chunk-size", type=int, default=512)
     parser.add_argument("--chunk-overlap", type=int, default=50)
     parser.add_argument("--reset", action="store_true")
+    parser.add_argument("--no-dedup", action="store_true", help="Embed duplicate chunks too")
 
     args = parser.parse_args()
 
     ingest(
         chunk_size=args.chunk_size,
         chunk_overlap=args.chunk_overlap,
-        reset=args.reset
+        reset=args.reset,
+        dedup=DEDUP_ENABLED and not args.no_dedup
     )
\ No newline at end of file
@@ -0,0 +1,245 @@
+"""
+dedup.py — Exact and near-duplicate chunk detection (xxhash + MinHash/LSH).
+
+Publisher boilerplate (licences, journal headers, funding and
+author-contribution blocks) repeats across many PDFs. Each chunk is
+checked before it is embedded:
+
+- exact: same xxh64 of the normalised text as a chunk already kept
+- near: MinHash signature over word shingles collides with a kept chunk
+  in an LSH band and the estimated Jaccard similarity >= threshold
+
+The first occurrence is kept (embedded and stored); later copies are
+skipped. Matches against the same paper are ignored, so re-ingesting a
+paper never dedups it against its own previous version. A paper is only
+indexed once its chunks are stored, and a paper that is mostly repeats
+of others is kept whole (see ChunkDeduplicator).
+"""
+
+import re
+import threading
+from collections import defaultdict
+
+import mmh3
+import numpy as np
+import xxhash
+
+
+MERSENNE_PRIME = (1 << 61) - 1
+WORD_PATTERN = re.compile(r"\w+")
+
+
+def normalize_text(text: str) -> str:
+    return " ".join(WORD_PATTERN.findall(text.lower()))
+
+
+def shingles(text: str, size: int = 5) -> set[str]:
+    """Word n-grams of the normalised text (the text itself if shorter)."""
+    words = normalize_text(text).split()
+    if len(words) <= size:
+        return {" ".join(words)} if words else set()
+    return {" ".join(words[i:i + size]) for i in range(len(words) - size + 1)}
+
+
+class MinHasher:
+    """
+    num_perm hash functions of the form (a * h + b) mod p over a 32-bit
+    MurmurHash3 of each shingle.
+    """
+
+    def __init__(self, num_perm: int = 128, seed: int = 1):
+        rng = np.random.default_rng(seed)
+        self.num_perm = num_perm
+        self.a = rng.integers(1, 1 << 32, size=num_perm, dtype=np.uint64)
+        self.b = rng.integers(0, 1 << 32, size=num_perm, dtype=np.uint64)
+
+    def signature(self, tokens: set[str]) -> np.ndarray:
+        if not tokens:
+            return np.full(self.num_perm, MERSENNE_PRIME, dtype=np.uint64)
+
+        hashes = np.fromiter(
+            (mmh3.hash(token, signed=False) for token in tokens),
+            dtype=np.uint64,
+            count=len(tokens)
+        )
+        # a, h < 2**32 so a * h + b cannot overflow uint64
+        return ((self.a[:, None] * hashes[None, :] + self.b[:, None]) % MERSENNE_PRIME).min(axis=1)
+
+
+class ChunkDeduplicator:
+    """
+    Corpus-wide index of kept chunks. `bands` x `rows` must equal
+    num_perm; with 16 x 8 pairs above ~0.7 similarity become candidates,
+    and only those at or above `threshold` count as duplicates.
+
+    Only boilerplate is dropped: a chunk is skipped when it repeats kept
+    chunks of at least `min_papers` other papers (licences, journal
+    headers). Text shared by fewer, such as a preprint and its journal
+    version, is kept in each, so content stays citable under its own
+    paper.
+    """
+
+    def __init__(
+        self,
+        threshold: float = 0.85,
+        num_perm: int = 128,
+        bands: int = 16,
+        shingle_size: int = 5,
+        min_words: int = 20,
+        min_papers: int = 2
+    ):
+        if num_perm % bands:
+            raise ValueError("num_perm must be a multiple of bands")
+
+        self.threshold = threshold
+        self.bands = bands
+        self.rows = num_perm // bands
+        self.shingle_size = shingle_size
+        self.min_words = min_words
+        self.min_papers = min_papers
+        self.hasher = MinHasher(num_perm)
+        self._lock = threading.Lock()
+
+        self._owners = []        # entry -> paper_id (None once forgotten)
+        self._chunk_ids = []
+        self._digests = []       # xxh64 of the normalised text
+        self._signatures = []
+        self._buckets = defaultdict(list)
+
+        self.stats = {"checked": 0, "exact": 0, "near": 0, "tokens_skipped": 0}
+        self.clusters = defaultdict(list)   # kept chunk id -> [duplicate chunk ids]
+
+    def __len__(self) -> int:
+        return sum(owner is not None for owner in self._owners)
+
+    def _band_keys(self, signature: np.ndarray):
+        for band in range(self.bands):
+            yield band, signature[band * self.rows:(band + 1) * self.rows].tobytes()
+
+    def _signature(self, normalized: str) -> np.ndarray:
+        return self.hasher.signature(shingles(normalized, self.shingle_size))
+
+    def _add(self, paper_id: str, chunk_id: str, digest: int, signature: np.ndarray):
+        entry = len(self._owners)
+        self._owners.append(paper_id)
+        self._chunk_ids.append(chunk_id)
+        self._digests.append(digest)
+        self._signatures.append(signature)
+        for key in self._band_keys(signature):
+            self._buckets[key].append(entry)
+
+    def _match(self, paper_id: str, digest: int, signature: np.ndarray):
+        """
+        (kind, kept_chunk_id, similarity) when the chunk repeats kept chunks
+        of at least min_papers other papers, else None. Identical text
+        collides in every band, so exact copies are found the same way.
+        """
+        best = {}   # other paper -> (similarity, entry)
+        seen = set()
+        for key in self._band_keys(signature):
+            for candidate in self._buckets.get(key, ()):
+                owner = self._owners[candidate]
+                if candidate in seen or owner in (None, paper_id):
+                    continue
+                seen.add(candidate)
+                similarity = float(np.mean(self._signatures[candidate] == signature))
+                if similarity >= self.threshold and similarity > best.get(owner, (0.0,))[0]:
+                    best[owner] = (similarity, candidate)
+
+        if len(best) < self.min_papers:
+            return None
+        similarity, entry = max(best.values())
+        kind = "exact" if self._digests[entry] == digest else "near"
+        return kind, self._chunk_ids[entry], round(similarity, 3)
+
+    def filter_chunks(self, paper_id: str, ids: list[str], texts: list[str], token_counts: list[int]):
+        """
+        Returns (positions to keep, pending). Only reads the index: pass
+        `pending` to add() once the kept chunks are stored, so a paper
+        that fails before that leaves nothing behind. Chunks shorter than
+        min_words are always kept. Thread-safe.
+        """
+        keep, kept, skipped = [], [], []
+        with self._lock:
+            for i, (chunk_id, text, tokens) in enumerate(zip(ids, texts, token_counts)):
+                normalized = normalize_text(text)
+                if len(normalized.split()) < self.min_words:
+                    keep.append(i)
+                    continue
+
+                digest = xxhash.xxh64_intdigest(normalized)
+                signature = self._signature(normalized)
+                match = self._match(paper_id, digest, signature)
+                if match is None:
+                    keep.append(i)
+                    kept.append((chunk_id, digest, signature))
+                else:
+                    skipped.append((chunk_id, tokens, match))
+
+        return keep, {"paper_id": paper_id, "checked": len(ids), "kept": kept, "skipped": skipped}
+
+    def add(self, pending: dict):
+        """
+        Index a paper's stored chunks as kept (replacing its previous
+        version) and count what it skipped.
+        """
+        paper_id = pending["paper_id"]
+        with self._lock:
+            self._forget(paper_id)
+            for chunk_id, digest, signature in pending["kept"]:
+                self._add(paper_id, chunk_id, digest, signature)
+
+            self.stats["checked"] += pending["checked"]
+            for chunk_id, tokens, (kind, kept, _) in pending["skipped"]:
+                self.stats[kind] += 1
+                self.stats["tokens_skipped"] += int(tokens)
+                self.clusters[kept].append(chunk_id)
+
+    def seed(self, ids: list[str], texts: list[str], paper_ids: list[str]):
+        """Index chunks already stored (e.g. the active collection) as kept."""
+        with self._lock:
+            for chunk_id, text, paper_id in zip(ids, texts, paper_ids):
+                normalized = normalize_text(text or "")
+                if len(normalized.split()) < self.min_words:
+                    continue
+                self._add(paper_id, chunk_id, xxhash.xxh64_intdigest(normalized), self._signature(normalized))
+
+    def _forget(self, paper_id: str):
+        forgotten = set()
+        for entry, owner in enumerate(self._owners):
+            if owner == paper_id:
+                self._owners[entry] = None
+                forgotten.add(self._chunk_ids[entry])
+
+        # Clusters only name chunks that are still kept or still skipped
+        for kept in forgotten & set(self.clusters):
+            del self.clusters[kept]
+        for kept, duplicates in list(self.clusters.items()):
+            duplicates[:] = [d for d in duplicates if d.split("_chunk_")[0] != paper_id]
+            if not duplicates:
+                del self.clusters[kept]
+
+    def report(self, texts: dict = None, top: int = 20) -> dict:
+        """
+        Summary counts plus the largest duplicate clusters. `texts` maps
+        kept chunk ids to their text, for a preview of what was repeated.
+        """
+        checked = self.stats["checked"]
+        skipped = self.stats["exact"] + self.stats["near"]
+        clusters = sorted(self.clusters.items(), key=lambda item: -len(item[1]))[:top]
+
+        return {
+            **self.stats,
+            "skipped": skipped,
+            "skipped_ratio": round(skipped / checked, 4) if checked else 0.0,
+            "threshold": self.threshold,
+            "top_clusters": [
+                {
+                    "kept": kept,
+                    "duplicates": len(duplicates),
+                    "papers": sorted({d.split("_chunk_")[0] for d in duplicates}),
+                    "preview": (texts or {}).get(kept, "")[:160],
+                }
+                for kept, duplicates in clusters
+            ],
+        }
@@ -0,0 +1,330 @@
+"""
+job_queue.py — Background ingestion of uploaded papers.
+
+Uploads are saved to papers/, given a catalog id and queued. A small pool
+of worker threads runs extract → clean → chunk → embed → upsert against
+the live collection, then adds the paper to the catalog, so it becomes
+searchable (and visible to metadata questions) as soon as its job ends.
+With the mmap backend the snapshot is re-exported once the queue drains,
+so a batch of uploads becomes searchable together.
+"""
+
+import copy
+import queue
+import re
+import threading
+import time
+import uuid
+from dataclasses import asdict, dataclass, field
+
+from loguru import logger
+
+from src.catalog.catalog import get_catalog
+from src.config import CATALOG_PATH, CHROMA_DIR, DEDUP_ENABLED, DEDUP_THRESHOLD, PAPERS_DIR
+from src.observability.usage import track_usage
+
+
+@dataclass
+class IngestJob:
+    id: str
+    paper_id: str
+    filename: str
+    status: str = "queued"        # queued | running | succeeded | failed
+    stage: str = "queued"         # extract | chunk | embed | upsert | done
+    progress: float = 0.0
+    chunks: int = None
+    duplicates: int = None
+    collection: str = None
+    usage: dict = None
+    error: str = None
+    created_at: float = field(default_factory=time.time)
+    started_at: float = None
+    finished_at: float = None
+    paper: dict = field(default_factory=dict, repr=False)
+
+    def to_dict(self) -> dict:
+        data = asdict(self)
+        data.pop("paper")
+        data["title"] = self.paper.get("title")
+        return data
+
+
+def parse_metadata(metadata: dict) -> dict:
+    """
+    Validate upload metadata into a catalog entry (without id/filename).
+    Raises ValueError with a user-facing message.
+    """
+    if not isinstance(metadata, dict):
+        raise ValueError("Metadata must be a JSON object.")
+
+    title = str(metadata.get("title") or "").strip()
+    if not title:
+        raise ValueError("Field 'title' is required.")
+
+    def as_list(key):
+        value = metadata.get(key) or []
+        if isinstance(value, str):
+            value = value.split(";")
+        return [str(v).strip() for v in value if str(v).strip()]
+
+    year = metadata.get("year")
+    try:
+        year = int(year) if year not in (None, "") else None
+    except (TypeError, ValueError):
+        raise ValueError("Field 'year' must be an integer.")
+
+    paper = {
+        **{k: v for k, v in metadata.items() if k not in ("filename",)},
+        "title": title,
+        "authors": as_list("authors"),
+        "topics": as_list("topics"),
+        "year": year,
+    }
+    return {k: v for k, v in paper.items() if v is not None}
+
+
+def safe_filename(name: str, paper_id: str) -> str:
+    stem = re.sub(r"[^\w.-]+", "_", name.rsplit("/", 1)[-1]).strip("._") or paper_id
+    if not stem.lower().endswith(".pdf"):
+        stem += ".pdf"
+    return stem
+
+
+class IngestionQueue:
+    """
+    FIFO of ingestion jobs served by `workers` daemon threads, started on
+    the first submission. Components are created lazily so the queue is
+    free until someone uploads a paper.
+    """
+
+    def __init__(
+        self,
+        workers: int = 2,
+        persist_directory=CHROMA_DIR,
+        embedder=None,
+        chunker=None,
+        dedup: bool = DEDUP_ENABLED,
+        papers_dir=PAPERS_DIR,
+        catalog_path=CATALOG_PATH,
+        max_jobs: int = 500
+    ):
+        self.workers = workers
+        self.papers_dir = papers_dir
+        self.catalog_path = catalog_path
+        self.max_jobs = max_jobs
+
+        self.persist_directory = str(persist_directory)
+        self._embedder = embedder
+        self._chunker = chunker
+        self._embedders = {}     # model -> embedder
+        self._chunkers = {}      # (chunk_size, chunk_overlap) -> chunker
+        self.dedup = dedup
+        self._deduplicator = None
+        self._dedup_collection = None
+        self._stale_snapshot = None
+
+        self._queue = queue.Queue()
+        self._jobs = {}
+        self._lock = threading.Lock()
+        self._components_lock = threading.Lock()
+        self._snapshot_lock = threading.Lock()
+        self._threads = []
+
+    # --------------------------------------------------
+    # Lazily built components
+    # --------------------------------------------------
+    def _components(self):
+        """
+        Chunker, embedder, vectorstore and deduplicator for one job.
+        Chunkers and embedders are never changed once built, only looked
+        up by the parameters of the active collection, so concurrent
+        jobs can share them.
+        """
+        with self._components_lock:
+            if self._chunker is None:
+                from src.chunking.chunker import TokenChunker
+                self._chunker = TokenChunker()
+
+            if self._embedder is None:
+                from src.embedding.embedder import OpenAIEmbedder
+                self._embedder = OpenAIEmbedder()
+
+            # A store of its own per job, pinned to the collection active
+            # when the job starts: a blue/green flip mid-job can't split its
+            # writes, and the query path's store is never touched
+            from src.vectorstore.chroma_store import ChromaVectorStore
+
+            vectorstore = ChromaVectorStore(persist_directory=self.persist_directory)
+            vectorstore.open_active("papers")
+
+            # Chunk and embed the way the active collection was built
+            params = vectorstore.index_params()
+            model = params.get("embedding_model") or self._embedder.model
+            if model not in self._embedders:
+                embedder = copy.copy(self._embedder)
+                embedder.model = model
+                self._embedders[model] = embedder
+
+            chunking = (self._chunker.chunk_size, self._chunker.chunk_overlap)
+            if params.get("chunk_size"):
+                chunking = (int(params["chunk_size"]), int(params.get("chunk_overlap", chunking[1])))
+            if chunking not in self._chunkers:
+                chunker = copy.copy(self._chunker)
+                chunker.chunk_size, chunker.chunk_overlap = chunking
+                self._chunkers[chunking] = chunker
+
+            # Seeded once per collection; each job then commits its own chunks
+            if self.dedup and self._dedup_collection != vectorstore.collection.name:
+                from src.ingest import seed_deduplicator
+                from src.ingestion.dedup import ChunkDeduplicator
+
+                self._deduplicator = ChunkDeduplicator(threshold=DEDUP_THRESHOLD)
+                self._dedup_collection = vectorstore.collection.name
+                seed_deduplicator(self._deduplicator, vectorstore.collection)
+
+            return self._chunkers[chunking], self._embedders[model], vectorstore, self._deduplicator
+
+    def _start_workers(self):
+        while len(self._threads) < self.workers:
+            thread = threading.Thread(
+                target=self._work,
+                name=f"ingest-worker-{len(self._threads)}",
+                daemon=True
+            )
+            self._threads.append(thread)
+            thread.start()
+
+    # --------------------------------------------------
+    # Submission & status
+    # --------------------------------------------------
+    def submit(self, pdf_bytes: bytes, filename: str, metadata: dict) -> IngestJob:
+        """
+        Save the PDF, reserve a catalog id and enqueue the job.
+        A metadata "id" that already exists replaces that paper.
+        """
+        with self._lock:
+            pending = {job.paper_id for job in self._jobs.values() if job.status in ("queued", "running")}
+            paper_id = str(metadata.get("id") or get_catalog(self.catalog_path).next_paper_id(reserved=pending))
+
+            filename = safe_filename(filename, paper_id)
+            path = self.papers_dir / filename
+            if path.exists() and path.read_bytes() != pdf_bytes:
+                filename = f"{paper_id}_{filename}"
+                path = self.papers_dir / filename
+            path.write_bytes(pdf_bytes)
+
+            job = IngestJob(
+                id=uuid.uuid4().hex[:12],
+                paper_id=paper_id,
+                filename=filename,
+                paper={**metadata, "id": paper_id, "filename": filename},
+            )
+            self._jobs[job.id] = job
+            self._prune()
+            self._start_workers()
+
+        self._queue.put(job)
+        logger.info(f"Queued ingestion job {job.id} for {paper_id} ({filename})")
+        return job
+
+    def _prune(self):
+        finished = [j for j in self._jobs.values() if j.status in ("succeeded", "failed")]
+        for job in sorted(finished, key=lambda j: j.finished_at)[:max(len(self._jobs) - self.max_jobs, 0)]:
+            del self._jobs[job.id]
+
+    def get(self, job_id: str):
+        return self._jobs.get(job_id)
+
+    def jobs(self) -> list[IngestJob]:
+        return sorted(self._jobs.values(), key=lambda job: job.created_at, reverse=True)
+
+    def stats(self) -> dict:
+        statuses = [job.status for job in self._jobs.values()]
+        return {
+            "workers": len(self._threads),
+            "queued": statuses.count("queued"),
+            "running": statuses.count("running"),
+            "succeeded": statuses.count("succeeded"),
+            "failed": statuses.count("failed"),
+        }
+
+    # --------------------------------------------------
+    # Workers
+    # --------------------------------------------------
+    def _work(self):
+        while True:
+            job = self._queue.get()
+            try:
+                self._run(job)
+                self._refresh_snapshot()
+            finally:
+                self._queue.task_done()
+
+    def _run(self, job: IngestJob):
+        from src.ingest import ingest_paper
+
+        job.status = "running"
+        job.started_at = time.time()
+
+        def progress(stage, fraction):
+            job.stage = stage
+            job.progress = round(fraction, 3)
+
+        try:
+            chunker, embedder, vectorstore, deduplicator = self._components()
+            job.collection = vectorstore.collection.name
+            with track_usage("ingest", label=job.paper_id) as usage:
+                stats = ingest_paper(
+                    job.paper,
+                    self.papers_dir / job.filename,
+                    chunker,
+                    embedder,
+                    vectorstore,
+                    progress=progress,
+                    dedup=deduplicator
+                )
+            job.usage = usage.summary()
+            get_catalog(self.catalog_path).add_paper(job.paper)
+            with self._lock:
+                self._stale_snapshot = vectorstore
+
+            job.chunks = stats["chunks"]
+            job.duplicates = stats["duplicates"]
+            job.status = "succeeded"
+            logger.success(f"✓ Ingested {job.paper_id} ({job.chunks} chunks) in job {job.id}")
+
+        except Exception as e:
+            job.status = "failed"
+            job.error = str(e)
+            logger.error(f"Ingestion job {job.id} failed: {e}")
+
+        finally:
+            job.finished_at = time.time()
+
+    def _refresh_snapshot(self):
+        """
+        If queries are served from an mmap snapshot, publish a new
+        generation once no job is queued or running: one export per
+        batch of uploads rather than one per paper.
+        """
+        from src.vectorstore.mmap_store import export_snapshot, read_current, snapshot_root
+
+        with self._snapshot_lock:
+            with self._lock:
+                busy = any(job.status in ("queued", "running") for job in self._jobs.values())
+                if busy or self._stale_snapshot is None:
+                    return
+                vectorstore, self._stale_snapshot = self._stale_snapshot, None
+
+            try:
+                if read_current(snapshot_root(vectorstore.persist_directory, "papers")):
+                    # The active collection, not the one a job was pinned to
+                    export_snapshot(vectorstore.open_active("papers"), vectorstore.persist_directory)
+            except Exception as e:
+                logger.error(f"Snapshot export after ingestion failed: {e}")
+                with self._lock:
+                    self._stale_snapshot = self._stale_snapshot or vectorstore
+
+    def join(self):
+        """Block until every queued job has finished."""
+        self._queue.join()
@@ -1,34 +1,174 @@
-from fastapi import FastAPI, Request
+import asyncio
+import json
+import time
+from contextlib import asynccontextmanager
+
+from fastapi import FastAPI, Request, Response, Body, Header, HTTPException, File, Form, UploadFile
 from fastapi.templating import Jinja2Templates
-from fastapi.responses import HTMLResponse
+from fastapi.responses import HTMLResponse, JSONResponse
+from starlette.concurrency import run_in_threadpool
+
+from src.config import INGEST_WORKERS, PROJECT_ROOT, UPLOAD_MAX_MB
+from src.ingestion.job_queue import IngestionQueue, parse_metadata
+from src.observability.loop_lag import EventLoopLagMonitor
+from src.observability.usage import usage_stats
+from src.concurrency.single_flight import AsyncSingleFlight, flight_key
+from src.rag_pipeline import get_shared_pipeline
+from src.transport.http import close_http_clients, transport_info
+from src.transport.rate_limit import rate_limit_stats
+
+
+loop_lag = EventLoopLagMonitor()
+ask_flight = AsyncSingleFlight()
+
+# Cheap: components are built on first use or by the warm-up below
+pipeline = get_shared_pipeline()
+
+readiness = {"ready": False, "error": None, "warmup_ms": None}
+
+# Uploaded papers are indexed into the active Chroma collection, which
+# queries pick up (the mmap backend is read-only: uploads go to Chroma
+# and are re-exported)
+ingestion = IngestionQueue(workers=INGEST_WORKERS)
 
-app = FastAPI()
 
-templates = Jinja2Templates(directory="src/templates")
+async def warm_up():
+    """
+    Build Chroma, OpenAI clients, tokenizer and prompts off the event loop.
+    The server accepts connections meanwhile; /ready reports when done.
+    """
+    start = time.perf_counter()
+    try:
+        readiness["components_ms"] = await run_in_threadpool(pipeline.warm_up)
+        readiness["ready"] = True
+    except Exception as e:
+        readiness["error"] = str(e)
+    readiness["warmup_ms"] = round((time.perf_counter() - start) * 1000, 1)
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    loop_lag.start()
+    warmup_task = asyncio.create_task(warm_up())
+    yield
+    warmup_task.cancel()
+    await loop_lag.stop()
+    await close_http_clients()
+
+
+app = FastAPI(lifespan=lifespan)
+
+templates = Jinja2Templates(directory=str(PROJECT_ROOT / "src" / "templates"))
 
 @app.get("/", response_class=HTMLResponse)
 async def home(request: Request):
     return templates.TemplateResponse("index.html", {"request": request})
 
-from fastapi import Body
-from src.generation.generator import Generator
-from src.retrieval.retriever import Retriever
-
-generator = Generator()
-retriever = Retriever()
 
 
 @app.post("/ask")
-async def ask_question(data: dict = Body(...)):
-    question = data.get("question")
+async def ask_question(response: Response, data: dict = Body(...), x_profile: str = Header(None)):
+    question = data.get("question") or ""
+    strategy = data.get("strategy", "v1_delimiters")
+    # X-Profile: 1 profiles this request when RC_PROFILE=request
+    profile = x_profile in ("1", "true") and pipeline.profiler.accepts_requests()
+
+    if not isinstance(question, str):
+        raise HTTPException(status_code=400, detail="Field 'question' must be a string.")
+    question = question.strip()
+    if not question:
+        raise HTTPException(status_code=400, detail="Field 'question' is required.")
+    if not isinstance(strategy, str):
+        raise HTTPException(status_code=400, detail="Field 'strategy' must be a string.")
+
+    try:
+        pipeline.generator.prompts.get(strategy)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+    # The pipeline does blocking I/O (OpenAI, Chroma); keep it off the event loop.
+    # Identical questions already in flight wait for that answer instead.
+    result, _ = await ask_flight.do(
+        flight_key(question, strategy, profile),
+        run_in_threadpool,
+        pipeline.query,
+        question,
+        strategy,
+        profile
+    )
+
+    body = {
+        "answer": result["answer"],
+        "citations": result["citations"],
+        "retrieved": result["retrieved_chunks"],
+        "metadata": result.get("metadata"),
+        "usage": result.get("usage")
+    }
+    if result.get("profile"):
+        body["profile"] = result["profile"]
+        response.headers["X-Profile-Id"] = result["profile"]["id"]
+
+    return body
+
+
+@app.post("/papers", status_code=202)
+async def upload_paper(file: UploadFile = File(...), metadata: str = Form(...)):
+    """
+    Upload a PDF plus its catalog metadata (JSON: title, authors, year,
+    venue, doi, topics, ...). Returns the ingestion job to poll.
+    """
+    try:
+        paper = parse_metadata(json.loads(metadata))
+    except json.JSONDecodeError:
+        raise HTTPException(status_code=400, detail="Field 'metadata' must be valid JSON.")
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+    pdf_bytes = await file.read()
+
+    if len(pdf_bytes) > UPLOAD_MAX_MB * 1024 * 1024:
+        raise HTTPException(status_code=413, detail=f"PDF larger than {UPLOAD_MAX_MB:g} MB.")
+    if not pdf_bytes.startswith(b"%PDF"):
+        raise HTTPException(status_code=400, detail="Uploaded file is not a PDF.")
+
+    job = await run_in_threadpool(ingestion.submit, pdf_bytes, file.filename or "", paper)
+    return job.to_dict()
+
+
+@app.get("/jobs")
+async def list_jobs():
+    return {"jobs": [job.to_dict() for job in ingestion.jobs()]}
+
+
+@app.get("/jobs/{job_id}")
+async def get_job(job_id: str):
+    job = ingestion.get(job_id)
+    if job is None:
+        raise HTTPException(status_code=404, detail=f"Job '{job_id}' not found.")
+    return job.to_dict()
+
 
-    # 1. Retrieve relevant chunks
-    retrieved_chunks = retriever.retrieve(question, top_k=5)
+@app.get("/ready")
+async def ready():
+    """
+    Readiness probe: 200 once warm-up has finished, 503 before (or if it failed).
+    """
+    return JSONResponse(readiness, status_code=200 if readiness["ready"] else 503)
 
-    # 2. Generate answer with context
-    answer = generator.generate(question, retrieved_chunks.get("documents", []))
 
+@app.get("/metrics")
+async def metrics():
     return {
-        "answer": answer,
-        "retrieved": retrieved_chunks
-    }
\ No newline at end of file
+        "event_loop_lag": loop_lag.snapshot(),
+        "single_flight": {
+            "api": ask_flight.stats(),
+            "pipeline": pipeline.flight.stats()
+        },
+        "embedding_batcher": pipeline.retriever.batching_stats(),
+        "http_transport": transport_info(),
+        "rate_limits": rate_limit_stats(),
+        "profiler": pipeline.profiler.stats(),
+        "usage": usage_stats(),
+        "ingestion": ingestion.stats(),
+        "vector_store": pipeline.retriever.store_info()
+    }
@@ -0,0 +1,52 @@
+import asyncio
+import time
+from collections import deque
+
+
+class EventLoopLagMonitor:
+    """
+    Measures how late the event loop wakes up from a fixed sleep.
+    Sustained lag means something is blocking the loop.
+    """
+
+    def __init__(self, interval: float = 0.1, window: int = 600):
+        self.interval = interval
+        self.samples_ms = deque(maxlen=window)
+        self.max_lag_ms = 0.0
+        self._task = None
+
+    async def _run(self):
+        while True:
+            start = time.perf_counter()
+            await asyncio.sleep(self.interval)
+            lag_ms = max((time.perf_counter() - start - self.interval) * 1000, 0.0)
+            self.samples_ms.append(lag_ms)
+            self.max_lag_ms = max(self.max_lag_ms, lag_ms)
+
+    def start(self):
+        if self._task is None:
+            self._task = asyncio.get_running_loop().create_task(self._run())
+
+    async def stop(self):
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+
+    def snapshot(self) -> dict:
+        samples = sorted(self.samples_ms)
+
+        def pct(q):
+            if not samples:
+                return 0.0
+            return round(samples[min(int(q / 100 * len(samples)), len(samples) - 1)], 3)
+
+        return {
+            "samples": len(samples),
+            "p50_ms": pct(50),
+            "p99_ms": pct(99),
+            "max_ms": round(self.max_lag_ms, 3),
+        }
@@ -0,0 +1,269 @@
+"""
+profiler.py — On-demand and slow-call profiling of pipeline queries.
+
+RC_PROFILE selects what gets profiled:
+    off      (default) nothing, unless RC_PROFILE_SLOW_MS is set
+    request  calls that ask for it (X-Profile: 1 on /ask, profile=True)
+    all      every call
+
+With RC_PROFILE_SLOW_MS > 0 every call is also watched by a wall-clock
+stack sampler and kept only if it ran longer than the threshold.
+
+A profile is written to RC_PROFILE_DIR as <id>.collapsed (one
+"frame;frame;frame count" line per stack, for flamegraph.pl/speedscope),
+<id>.pstats (cProfile for requested calls, built from the samples for
+slow-call captures; open with pstats or snakeviz) and <id>.json. Only the
+newest RC_PROFILE_KEEP profiles are kept.
+
+When nothing is enabled, profile_call() returns a shared null context:
+no sampler thread, no hooks, no allocation.
+"""
+
+import cProfile
+import json
+import marshal
+import sys
+import threading
+import time
+import uuid
+from collections import Counter
+from contextlib import contextmanager, nullcontext
+from datetime import datetime, timezone
+from pathlib import Path
+
+from src.config import (
+    PROFILE_DIR,
+    PROFILE_INTERVAL_MS,
+    PROFILE_KEEP,
+    PROFILE_MODE,
+    PROFILE_SLOW_MS,
+)
+
+
+_OFF = nullcontext(None)
+
+
+def frame_key(code) -> tuple:
+    """pstats function key: (filename, first line, name)."""
+    return code.co_filename, code.co_firstlineno, code.co_name
+
+
+def frame_label(key: tuple) -> str:
+    filename, line, name = key
+    return f"{name} ({Path(filename).name}:{line})"
+
+
+# ---------------------------------------------------
+# Wall-clock stack sampler
+# ---------------------------------------------------
+class _Session:
+    __slots__ = ("thread_id", "stacks", "samples")
+
+    def __init__(self, thread_id: int):
+        self.thread_id = thread_id
+        self.stacks = Counter()
+        self.samples = 0
+
+
+class StackSampler:
+    """
+    One daemon thread samples the stacks of the threads being profiled
+    every interval_ms. It sleeps on an event while no call is profiled.
+    """
+
+    def __init__(self, interval_ms: float = PROFILE_INTERVAL_MS):
+        self.interval = interval_ms / 1000
+        self._sessions = {}
+        self._lock = threading.Lock()
+        self._wake = threading.Event()
+        self._thread = None
+
+    def start(self) -> _Session:
+        session = _Session(threading.get_ident())
+        with self._lock:
+            self._sessions[id(session)] = session
+            if self._thread is None:
+                self._thread = threading.Thread(target=self._run, name="profile-sampler", daemon=True)
+                self._thread.start()
+        self._wake.set()
+        return session
+
+    def stop(self, session: _Session):
+        with self._lock:
+            self._sessions.pop(id(session), None)
+            if not self._sessions:
+                self._wake.clear()
+
+    def _run(self):
+        while True:
+            self._wake.wait()
+            with self._lock:
+                sessions = list(self._sessions.values())
+
+            frames = sys._current_frames()
+            for session in sessions:
+                frame = frames.get(session.thread_id)
+                if frame is None:
+                    continue
+                stack = []
+                while frame is not None:
+                    stack.append(frame_key(frame.f_code))
+                    frame = frame.f_back
+                session.stacks[tuple(reversed(stack))] += 1
+                session.samples += 1
+
+            time.sleep(self.interval)
+
+
+# ---------------------------------------------------
+# Output
+# ---------------------------------------------------
+def write_collapsed(path: Path, stacks: Counter):
+    lines = [
+        ";".join(frame_label(key) for key in stack) + f" {count}"
+        for stack, count in stacks.most_common()
+    ]
+    path.write_text("\n".join(lines) + "\n", encoding="utf-8")
+
+
+def write_sampled_pstats(path: Path, stacks: Counter, interval: float):
+    """
+    pstats-compatible dump built from samples: "calls" are samples,
+    tottime/cumtime are samples x interval (self / inclusive).
+    """
+    stats = {}
+    callers = {}
+
+    for stack, count in stacks.items():
+        seconds = count * interval
+        for key in set(stack):
+            cc, nc, tt, ct = stats.get(key, (0, 0, 0.0, 0.0))
+            stats[key] = (cc + count, nc + count, tt, ct + seconds)
+
+        leaf = stack[-1]
+        cc, nc, tt, ct = stats[leaf]
+        stats[leaf] = (cc, nc, tt + seconds, ct)
+
+        for parent, child in set(zip(stack, stack[1:])):
+            edge = callers.setdefault(child, {})
+            cc, nc, tt, ct = edge.get(parent, (0, 0, 0.0, 0.0))
+            edge[parent] = (cc + count, nc + count, tt, ct + seconds)
+
+    with open(path, "wb") as f:
+        marshal.dump({key: (*value, callers.get(key, {})) for key, value in stats.items()}, f)
+
+
+def prune(directory: Path, keep: int):
+    """Keep the newest `keep` profiles (all files sharing an id)."""
+    profiles = sorted(directory.glob("*.json"), key=lambda p: p.stat().st_mtime, reverse=True)
+    for meta in profiles[keep:]:
+        for path in directory.glob(f"{meta.stem}.*"):
+            path.unlink(missing_ok=True)
+
+
+# ---------------------------------------------------
+# Public API
+# ---------------------------------------------------
+class Profiler:
+
+    def __init__(
+        self,
+        mode: str = PROFILE_MODE,
+        slow_ms: float = PROFILE_SLOW_MS,
+        directory: Path = PROFILE_DIR,
+        keep: int = PROFILE_KEEP,
+        interval_ms: float = PROFILE_INTERVAL_MS
+    ):
+        self.mode = mode
+        self.slow_ms = slow_ms
+        self.directory = Path(directory)
+        self.keep = keep
+        self.sampler = StackSampler(interval_ms)
+        self.captured = Counter()
+
+    @property
+    def enabled(self) -> bool:
+        return self.mode in ("request", "all") or self.slow_ms > 0
+
+    def accepts_requests(self) -> bool:
+        return self.mode in ("request", "all")
+
+    def profile_call(self, label: str, requested: bool = False, **info):
+        """
+        Context manager around one call; yields a dict that receives the
+        profile id and paths once a profile is written, or None when this
+        call is not profiled at all.
+        """
+        requested = (requested and self.mode == "request") or self.mode == "all"
+        if not requested and self.slow_ms <= 0:
+            return _OFF
+        return self._profile(label, requested, info)
+
+    @contextmanager
+    def _profile(self, label: str, requested: bool, info: dict):
+        saved = {}
+        session = self.sampler.start()
+        profile = cProfile.Profile() if requested else None
+        started = time.perf_counter()
+
+        if profile is not None:
+            try:
+                profile.enable()
+            except ValueError:
+                # Another cProfile is active (one per process on 3.12+):
+                # fall back to the sampled pstats
+                profile = None
+        try:
+            yield saved
+        finally:
+            if profile is not None:
+                profile.disable()
+            self.sampler.stop(session)
+            elapsed_ms = (time.perf_counter() - started) * 1000
+
+            if requested or elapsed_ms >= self.slow_ms:
+                reason = "requested" if requested else "slow"
+                saved.update(self._write(label, reason, elapsed_ms, session, profile, info))
+
+    def _write(self, label, reason, elapsed_ms, session, profile, info) -> dict:
+        self.directory.mkdir(parents=True, exist_ok=True)
+        stamp = datetime.now(timezone.utc)
+        profile_id = f"{stamp:%Y%m%dT%H%M%S}_{label}_{reason}_{uuid.uuid4().hex[:6]}"
+        base = self.directory / profile_id
+
+        write_collapsed(base.with_suffix(".collapsed"), session.stacks)
+        if profile is not None:
+            profile.dump_stats(base.with_suffix(".pstats"))
+        else:
+            write_sampled_pstats(base.with_suffix(".pstats"), session.stacks, self.sampler.interval)
+
+        meta = {
+            "id": profile_id,
+            "label": label,
+            "reason": reason,
+            "duration_ms": round(elapsed_ms, 1),
+            "samples": session.samples,
+            "interval_ms": self.sampler.interval * 1000,
+            "created_at": stamp.isoformat(),
+            **info,
+        }
+        base.with_suffix(".json").write_text(json.dumps(meta, indent=2, default=str), encoding="utf-8")
+
+        prune(self.directory, self.keep)
+        self.captured[reason] += 1
+        return {"id": profile_id, "reason": reason, "duration_ms": meta["duration_ms"], "path": str(base)}
+
+    def stats(self) -> dict:
+        return {
+            "mode": self.mode,
+            "slow_ms": self.slow_ms,
+            "captured": dict(self.captured),
+            "directory": str(self.directory) if self.enabled else None,
+        }
+
+
+_profiler = Profiler()
+
+
+def get_profiler() -> Profiler:
+    return _profiler
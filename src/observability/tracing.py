@@ -0,0 +1,78 @@
+"""
+tracing.py — OpenTelemetry setup for per-stage pipeline spans.
+
+Exporter is chosen with RC_TRACE_EXPORTER:
+    none     (default) spans are no-ops
+    console  pretty-printed spans on stdout
+    file     one JSON span per line in RC_TRACE_FILE (default traces/spans.jsonl)
+"""
+
+import os
+import threading
+from pathlib import Path
+
+from opentelemetry import trace
+from opentelemetry.sdk.resources import Resource
+from opentelemetry.sdk.trace import TracerProvider
+from opentelemetry.sdk.trace.export import (
+    BatchSpanProcessor,
+    ConsoleSpanExporter,
+    SimpleSpanProcessor,
+)
+
+from src.config import PROJECT_ROOT
+
+
+TRACER_NAME = "research_copilot"
+DEFAULT_TRACE_FILE = PROJECT_ROOT / "traces" / "spans.jsonl"
+
+_configured = False
+_lock = threading.Lock()
+
+
+def configure_tracing(exporter: str = None, path: str = None):
+    """
+    Install the tracer provider once per process.
+    """
+    global _configured
+
+    with _lock:
+        if _configured:
+            return
+
+        exporter = (exporter or os.getenv("RC_TRACE_EXPORTER", "none")).lower()
+        _configured = True
+
+        if exporter == "none":
+            return
+
+        provider = TracerProvider(
+            resource=Resource.create({"service.name": "research-copilot"})
+        )
+
+        if exporter == "console":
+            provider.add_span_processor(SimpleSpanProcessor(ConsoleSpanExporter()))
+
+        elif exporter == "file":
+            trace_file = Path(path or os.getenv("RC_TRACE_FILE", DEFAULT_TRACE_FILE))
+            trace_file.parent.mkdir(parents=True, exist_ok=True)
+            out = open(trace_file, "a", encoding="utf-8")
+
+            provider.add_span_processor(BatchSpanProcessor(
+                ConsoleSpanExporter(
+                    out=out,
+                    formatter=lambda span: span.to_json(indent=None) + "\n"
+                )
+            ))
+
+        else:
+            raise ValueError(
+                f"Unknown RC_TRACE_EXPORTER '{exporter}'. Use none, console or file."
+            )
+
+        trace.set_tracer_provider(provider)
+
+
+def get_tracer():
+    configure_tracing()
+    return trace.get_tracer(TRACER_NAME)
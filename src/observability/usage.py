@@ -0,0 +1,343 @@
+"""
+usage.py — Token and cost accounting for OpenAI calls.
+
+The embedder and the generator record every call with the token counts
+the API reports (a tiktoken estimate when a response carries none).
+Each record goes to the process totals (/metrics) and to the meters open
+in the calling context:
+
+    with track_usage("query", label=question) as usage:
+        ...           # retrieval, generation
+    usage.summary()   # embedding / prompt / completion tokens, cost, by model
+
+When a top-level meter with a scope closes, it is written to the SQLite
+store at RC_USAGE_DB, one row per (kind, model), so totals survive
+restarts and are shared by the API, the CLIs and the Analytics page.
+Each row carries the RC_USAGE_SOURCE of the process that wrote it
+("app" by default); the benchmark harnesses disable the store or point
+it at a throwaway file with their own source, so synthetic traffic never
+reaches the app's totals.
+
+Prices are USD per million tokens (RC_USAGE_PRICES overrides or adds
+models); a model without a price costs 0.
+"""
+
+import sqlite3
+import threading
+import time
+import uuid
+from contextlib import contextmanager
+from contextvars import ContextVar
+from functools import lru_cache
+from pathlib import Path
+
+from loguru import logger
+
+from src.config import USAGE_DB, USAGE_PRICES, USAGE_SOURCE, USAGE_STORE
+
+
+PRICES = {
+    "text-embedding-3-small": {"input": 0.02, "output": 0.0},
+    "text-embedding-3-large": {"input": 0.13, "output": 0.0},
+    "text-embedding-ada-002": {"input": 0.10, "output": 0.0},
+    "gpt-4o-mini": {"input": 0.15, "output": 0.60},
+    "gpt-4o": {"input": 2.50, "output": 10.00},
+    **USAGE_PRICES,
+}
+
+_meter = ContextVar("usage_meter", default=None)
+
+
+def price(model: str) -> dict:
+    """Exact match first, then the longest known prefix (dated snapshots)."""
+    if model in PRICES:
+        return PRICES[model]
+    matches = [name for name in PRICES if model.startswith(name)]
+    return PRICES[max(matches, key=len)] if matches else {"input": 0.0, "output": 0.0}
+
+
+def cost_usd(model: str, input_tokens: int, output_tokens: int = 0) -> float:
+    rates = price(model)
+    return (input_tokens * rates["input"] + output_tokens * rates["output"]) / 1_000_000
+
+
+@lru_cache(maxsize=None)
+def _encoder(model: str):
+    import tiktoken
+
+    try:
+        return tiktoken.encoding_for_model(model)
+    except KeyError:
+        return tiktoken.get_encoding("cl100k_base")
+
+
+def count_tokens(texts: list[str], model: str) -> int:
+    """tiktoken estimate, for responses without a usage block."""
+    encoder = _encoder(model)
+    return sum(len(encoder.encode(text)) for text in texts if text)
+
+
+def apportion(total: int, texts: list[str]) -> list[int]:
+    """Split one batched request's tokens between its inputs by length."""
+    lengths = [max(len(text), 1) for text in texts]
+    shares = [total * length // sum(lengths) for length in lengths]
+    if shares:
+        shares[0] += total - sum(shares)
+    return shares
+
+
+# ---------------------------------------------------
+# Meters
+# ---------------------------------------------------
+class UsageMeter:
+    """Token counts per (kind, model); kind is "embedding" or "chat"."""
+
+    def __init__(self, scope: str = None, label: str = None, parent: "UsageMeter" = None):
+        self.scope = scope
+        self.label = label
+        self.parent = parent
+        self.entries = {}
+        self.started = time.perf_counter()
+        self.duration_ms = None
+        self._lock = threading.Lock()
+
+    def add(self, kind: str, model: str, input_tokens: int, output_tokens: int = 0, estimated: bool = False):
+        with self._lock:
+            entry = self.entries.setdefault((kind, model), {
+                "calls": 0, "input_tokens": 0, "output_tokens": 0, "estimated": False
+            })
+            entry["calls"] += 1
+            entry["input_tokens"] += int(input_tokens)
+            entry["output_tokens"] += int(output_tokens)
+            entry["estimated"] = entry["estimated"] or estimated
+
+        if self.parent is not None:
+            self.parent.add(kind, model, input_tokens, output_tokens, estimated)
+
+    def tokens(self, kind: str) -> int:
+        return sum(entry["input_tokens"] for (k, _), entry in self.entries.items() if k == kind)
+
+    @property
+    def estimated(self) -> bool:
+        return any(entry["estimated"] for entry in self.entries.values())
+
+    def rows(self) -> list[dict]:
+        with self._lock:
+            entries = dict(self.entries)
+        return [
+            {
+                "kind": kind,
+                "model": model,
+                **entry,
+                "cost_usd": round(cost_usd(model, entry["input_tokens"], entry["output_tokens"]), 6),
+            }
+            for (kind, model), entry in sorted(entries.items())
+        ]
+
+    def summary(self) -> dict:
+        rows = self.rows()
+        embedding = sum(r["input_tokens"] for r in rows if r["kind"] == "embedding")
+        prompt = sum(r["input_tokens"] for r in rows if r["kind"] == "chat")
+        completion = sum(r["output_tokens"] for r in rows if r["kind"] == "chat")
+        return {
+            "embedding_tokens": embedding,
+            "prompt_tokens": prompt,
+            "completion_tokens": completion,
+            "total_tokens": embedding + prompt + completion,
+            "cost_usd": round(sum(r["cost_usd"] for r in rows), 6),
+            "estimated": any(r["estimated"] for r in rows),
+            "by_model": rows,
+        }
+
+
+_process = UsageMeter(scope="process")
+
+
+def record(kind: str, model: str, input_tokens: int, output_tokens: int = 0, estimated: bool = False):
+    """One API call: counted in the process totals and the open meters."""
+    _process.add(kind, model, input_tokens, output_tokens, estimated)
+    attribute(kind, model, input_tokens, output_tokens, estimated)
+
+
+def attribute(kind: str, model: str, input_tokens: int, output_tokens: int = 0, estimated: bool = False):
+    """
+    Charge tokens to the open meters only (a caller's share of a batched
+    request already recorded by the batch leader).
+    """
+    meter = _meter.get()
+    if meter is not None:
+        meter.add(kind, model, input_tokens, output_tokens, estimated)
+
+
+@contextmanager
+def track_usage(scope: str = None, label: str = None, isolated: bool = False):
+    """
+    Open a meter for the block. It also feeds the enclosing meter unless
+    isolated; a top-level meter with a scope is saved to the store.
+    """
+    parent = None if isolated else _meter.get()
+    meter = UsageMeter(scope, label, parent)
+    token = _meter.set(meter)
+    try:
+        yield meter
+    finally:
+        _meter.reset(token)
+        meter.duration_ms = (time.perf_counter() - meter.started) * 1000
+        if scope is not None and parent is None and not isolated:
+            get_usage_store().write(meter)
+
+
+# ---------------------------------------------------
+# SQLite store
+# ---------------------------------------------------
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS usage (
+    id            INTEGER PRIMARY KEY,
+    run_id        TEXT NOT NULL,
+    source        TEXT NOT NULL DEFAULT 'app',
+    ts            REAL NOT NULL,
+    scope         TEXT NOT NULL,
+    label         TEXT,
+    kind          TEXT,
+    model         TEXT,
+    calls         INTEGER NOT NULL DEFAULT 0,
+    input_tokens  INTEGER NOT NULL DEFAULT 0,
+    output_tokens INTEGER NOT NULL DEFAULT 0,
+    cost_usd      REAL NOT NULL DEFAULT 0,
+    estimated     INTEGER NOT NULL DEFAULT 0,
+    duration_ms   REAL
+);
+CREATE INDEX IF NOT EXISTS usage_ts ON usage (ts);
+CREATE INDEX IF NOT EXISTS usage_scope ON usage (scope, ts);
+"""
+
+# Files created before rows were tagged: their rows count as "app"
+MIGRATIONS = {
+    "source": "ALTER TABLE usage ADD COLUMN source TEXT NOT NULL DEFAULT 'app'",
+}
+
+
+class UsageStore:
+    """
+    Append-only usage log. WAL mode, so the API workers, the ingest CLI
+    and the Streamlit app can share the file.
+    """
+
+    def __init__(self, path=USAGE_DB, enabled: bool = USAGE_STORE, source: str = USAGE_SOURCE):
+        self.path = Path(path)
+        self.enabled = enabled
+        self.source = source
+        self._conn = None
+        self._lock = threading.Lock()
+
+    def _connection(self) -> sqlite3.Connection:
+        if self._conn is None:
+            self.path.parent.mkdir(parents=True, exist_ok=True)
+            conn = sqlite3.connect(self.path, timeout=5, check_same_thread=False)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            conn.executescript(SCHEMA)
+            columns = {row[1] for row in conn.execute("PRAGMA table_info(usage)")}
+            for column, statement in MIGRATIONS.items():
+                if column not in columns:
+                    conn.execute(statement)
+            self._conn = conn
+        return self._conn
+
+    def write(self, meter: UsageMeter):
+        """One row per (kind, model); a run without API calls keeps one empty row."""
+        if not self.enabled:
+            return
+
+        run_id = uuid.uuid4().hex
+        ts = time.time()
+        rows = meter.rows() or [{
+            "kind": None, "model": None, "calls": 0, "input_tokens": 0,
+            "output_tokens": 0, "estimated": False, "cost_usd": 0.0,
+        }]
+
+        try:
+            with self._lock:
+                conn = self._connection()
+                with conn:
+                    conn.executemany(
+                        "INSERT INTO usage (run_id, source, ts, scope, label, kind, model, calls, input_tokens,"
+                        " output_tokens, cost_usd, estimated, duration_ms)"
+                        " VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                        [
+                            (run_id, self.source, ts, meter.scope, (meter.label or "")[:500], row["kind"], row["model"],
+                             row["calls"], row["input_tokens"], row["output_tokens"], row["cost_usd"],
+                             int(row["estimated"]), meter.duration_ms)
+                            for row in rows
+                        ]
+                    )
+        except sqlite3.Error as e:
+            # Accounting must never fail the request it accounts for
+            logger.warning(f"Could not write usage to {self.path}: {e}")
+
+    def _query(self, sql: str, params: tuple = ()) -> list[dict]:
+        if not self.path.exists():
+            return []
+        with self._lock:
+            cursor = self._connection().execute(sql, params)
+            columns = [c[0] for c in cursor.description]
+            return [dict(zip(columns, row)) for row in cursor.fetchall()]
+
+    def totals(self, since: float = 0.0, source: str = None) -> list[dict]:
+        """Runs, calls, tokens and cost per scope, kind and model (one source, or all)."""
+        where, params = ("AND source = ?", (since, source)) if source else ("", (since,))
+        return self._query(
+            f"""
+            SELECT scope, kind, model,
+                   COUNT(DISTINCT run_id) AS runs, SUM(calls) AS calls,
+                   SUM(input_tokens) AS input_tokens, SUM(output_tokens) AS output_tokens,
+                   SUM(cost_usd) AS cost_usd
+            FROM usage WHERE ts >= ? AND kind IS NOT NULL {where}
+            GROUP BY scope, kind, model ORDER BY cost_usd DESC
+            """,
+            params
+        )
+
+    def runs(self, scope: str = None, limit: int = 500, source: str = None) -> list[dict]:
+        """Most recent runs (queries, ingests...) with their tokens, cost and latency."""
+        filters = {"scope": scope, "source": source}
+        clauses = [f"{column} = ?" for column, value in filters.items() if value]
+        where = f"WHERE {' AND '.join(clauses)}" if clauses else ""
+        params = (*[value for value in filters.values() if value], limit)
+        return self._query(
+            f"""
+            SELECT run_id, MIN(ts) AS ts, source, scope, label,
+                   SUM(CASE WHEN kind = 'embedding' THEN input_tokens ELSE 0 END) AS embedding_tokens,
+                   SUM(CASE WHEN kind = 'chat' THEN input_tokens ELSE 0 END) AS prompt_tokens,
+                   SUM(CASE WHEN kind = 'chat' THEN output_tokens ELSE 0 END) AS completion_tokens,
+                   SUM(cost_usd) AS cost_usd, MAX(estimated) AS estimated, MAX(duration_ms) AS duration_ms
+            FROM usage {where}
+            GROUP BY run_id ORDER BY ts DESC LIMIT ?
+            """,
+            params
+        )
+
+
+_store = UsageStore()
+
+
+def get_usage_store() -> UsageStore:
+    return _store
+
+
+def configure_usage_store(path=None, enabled: bool = True, source: str = None) -> UsageStore:
+    """
+    Replace the process store, e.g. a harness that must not log into the
+    app's file: configure_usage_store(enabled=False, source="benchmark").
+    """
+    global _store
+    _store = UsageStore(path or _store.path, enabled, source or _store.source)
+    return _store
+
+
+def usage_stats() -> dict:
+    """Totals since this process started, for /metrics."""
+    return {
+        **_process.summary(),
+        "store": str(_store.path) if _store.enabled else None,
+    }
@@ -1,101 +1,92 @@
 from src.retrieval.retriever import Retriever
 from src.generation.generator import Generator
-import json
-import os
-import re
+from src.observability.profiler import get_profiler
+from src.observability.tracing import get_tracer
+from src.observability.usage import track_usage
+from src.routing.metadata_query import MetadataQueryEngine
+from src.concurrency.single_flight import SingleFlight, flight_key
+from concurrent.futures import ThreadPoolExecutor, as_completed
+import contextvars
+import threading
+import time
+
+
+tracer = get_tracer()
 
 
 class RAGPipeline:
     """
     Main orchestrator:
-    - Metadata Router (explicit listing only)
+    - Metadata Router (catalog list / count / group-by, no LLM)
     - Retrieval
     - Generation
-    - Debug support
+    - Multi-strategy comparison
+    - Single-flight coalescing of identical in-flight questions
+    - Per-stage tracing
+    - Opt-in / slow-call profiling
+    - Token and cost accounting per query
     """
 
-    def __init__(self):
-        self.retriever = Retriever()
-        self.generator = Generator(debug=True)  # ✅ DEBUG ACTIVADO
+    def __init__(self, retriever=None, generator=None):
+        self.retriever = retriever or Retriever()
+        self.generator = generator or Generator()
+        self.metadata = MetadataQueryEngine()
+        # Identical questions already in flight share one computation
+        self.flight = SingleFlight()
+        self.profiler = get_profiler()
+
+    # ==========================================================
+    # 🔥 Warm-up
+    # ==========================================================
+    def warm_up(self) -> dict:
+        """
+        Build every lazily initialised resource (Chroma collection,
+        OpenAI clients, tokenizer, prompt templates, catalog) so the first
+        question is fast. Returns the time spent per component in ms.
+        """
+        steps = {
+            "vectorstore": lambda: self.retriever.vectorstore.count(),
+            "embedder": lambda: getattr(self.retriever.embedder, "client", None),
+            "prompts": lambda: self.generator.prompts.count_tokens("warm-up"),
+            "llm": lambda: self.generator.llm,
+            "catalog": lambda: self.metadata.parse("list all papers"),
+        }
+
+        timings = {}
+        for name, step in steps.items():
+            start = time.perf_counter()
+            step()
+            timings[name] = round((time.perf_counter() - start) * 1000, 1)
+
+        return timings
 
     # ==========================================================
     # 🔎 SMART METADATA ROUTER
     # ==========================================================
     def is_metadata_query(self, question: str) -> bool:
-
-        q = question.lower()
-
-        metadata_patterns = [
-            r"\blist (all |the |my )?(papers|titles|authors|documents)\b",
-            r"\bshow (all |the |my )?(papers|titles|authors|documents)\b",
-            r"\bwhat (papers|titles|documents) (do you have|are available|are indexed)\b",
-            r"\bhow many papers\b",
-            r"\ball (the |my )?papers\b",
-            r"\ball (the |my )?titles\b",
-            r"\ball (the |my )?authors\b",
-            r"\blist of papers\b",
-            r"\blist of titles\b",
-
-            r"\blistar (los |mis )?papers\b",
-            r"\blistar (los |mis )?títulos\b",
-            r"\bcuántos papers\b",
-            r"\bqué papers (tienes|hay|están)\b",
-            r"\bqué investigaciones (tienes|hay|están)\b",
-            r"\btodos los papers\b",
-            r"\btodos los títulos\b",
-            r"\blista de papers\b",
-            r"\blista de títulos\b",
-        ]
-
-        return any(re.search(pattern, q) for pattern in metadata_patterns)
+        return self.metadata.parse(question) is not None
 
     # ==========================================================
-    # 📂 Metadata Handler
+    # 📂 Metadata Handler (catalog indexes, no LLM)
     # ==========================================================
-    def handle_metadata_query(self):
+    def handle_metadata_query(self, intent):
 
         try:
-            catalog_path = os.path.abspath(
-                os.path.join(
-                    os.path.dirname(__file__),
-                    "..",
-                    "papers",
-                    "paper_catalog.json"
-                )
-            )
-
-            if not os.path.exists(catalog_path):
-                return "Catalog file not found.", []
-
-            with open(catalog_path, "r", encoding="utf-8") as f:
-                catalog = json.load(f)
-
-            papers = catalog.get("papers", [])
-
-            if not papers:
-                return "No papers found in catalog.", []
-
-            lines = []
-            for i, paper in enumerate(papers, 1):
-                title = paper.get("title", "Unknown Title")
-                authors = paper.get("authors", [])
-                year = paper.get("year", "N/A")
-
-                author_str = ", ".join(authors[:2])
-                if len(authors) > 2:
-                    author_str += " et al."
+            return self.metadata.execute(intent)
 
-                lines.append(f"{i}. **{title}** — {author_str} ({year})")
-
-            return "\n".join(lines), []
+        except FileNotFoundError:
+            message = "Catalog file not found."
 
         except Exception as e:
-            return f"Error reading catalog: {str(e)}", []
+            message = f"Error reading catalog: {str(e)}"
+
+        return {"answer": message, "citations": [], "citation_map": {}, "result": None}
 
     # ==========================================================
     # 🔄 Normalize Retrieval Output
     # ==========================================================
-    def _parse_retrieval_results(self, results):
+    @staticmethod
+    def _parse_retrieval_results(results):
 
         retrieved_chunks = []
 
@@ -112,44 +103,103 @@ class RAGPipeline:
             return retrieved_chunks
 
         if isinstance(results, dict):
-            documents_list = results.get("documents", [])
-            metadatas_list = results.get("metadatas", [])
 
-            documents = documents_list[0] if (
-                documents_list and isinstance(documents_list[0], list)
-            ) else documents_list
+            def first_query(key):
+                values = results.get(key) or []
+                if values and isinstance(values[0], list):
+                    return values[0]
+                return values
 
-            metadatas = metadatas_list[0] if (
-                metadatas_list and isinstance(metadatas_list[0], list)
-            ) else metadatas_list
+            documents = first_query("documents")
+            metadatas = first_query("metadatas")
+            ids = first_query("ids")
+            distances = first_query("distances")
 
             for i, doc in enumerate(documents):
-                retrieved_chunks.append({
+                chunk = {
                     "document": doc,
                     "metadata": metadatas[i] if i < len(metadatas) else {}
-                })
+                }
+                if i < len(ids):
+                    chunk["id"] = ids[i]
+                if i < len(distances) and distances[i] is not None:
+                    # Collection uses cosine distance
+                    chunk["similarity_score"] = 1 - distances[i]
+                retrieved_chunks.append(chunk)
+
+        return retrieved_chunks
+
+    # ==========================================================
+    # 🔍 Retrieval Step (shared by query and compare)
+    # ==========================================================
+    def _route_metadata(self, question: str):
+        with tracer.start_as_current_span("rag.metadata_routing") as span:
+            intent = self.metadata.parse(question)
+            span.set_attribute("routing.metadata_query", intent is not None)
+            if intent is not None:
+                span.set_attribute("routing.intent", f"{intent.action}:{intent.target}")
+            return intent
+
+    def _retrieve(self, question: str, top_k: int = 20):
+        results = self.retriever.retrieve(question, top_k=top_k)
+
+        with tracer.start_as_current_span("rag.parse_results") as span:
+            retrieved_chunks = self._parse_retrieval_results(results)
+            span.set_attribute("retrieval.chunk_count", len(retrieved_chunks))
 
         return retrieved_chunks
 
     # ==========================================================
     # 🚀 Query Pipeline
     # ==========================================================
-    def query(self, question: str, strategy: str = "v1_delimiters"):
+    def query(self, question: str, strategy: str = "v1_delimiters", profile: bool = False):
+        """
+        profile=True asks for a profile of this call (honoured when
+        RC_PROFILE=request); its id is returned under "profile".
+        "usage" holds the embedding / prompt / completion tokens and cost.
+        """
+        profile = profile and self.profiler.accepts_requests()
+
+        with tracer.start_as_current_span("rag.query") as span:
+            span.set_attribute("prompt.strategy", strategy)
+            # A profiled call never joins an unprofiled one (nothing to sample)
+            result, collapsed = self.flight.do(
+                flight_key(question, "query", strategy, profile),
+                self._profiled_query,
+                question,
+                strategy,
+                profile
+            )
+            span.set_attribute("single_flight.collapsed", collapsed)
+            return {**result, "question": question}
+
+    def _profiled_query(self, question: str, strategy: str, profile: bool):
+        with track_usage("query", label=question) as usage:
+            with self.profiler.profile_call("query", requested=profile, question=question, strategy=strategy) as saved:
+                result = self._query(question, strategy)
+
+        result = {**result, "usage": usage.summary()}
+        if saved:
+            result["profile"] = saved
+        return result
+
+    def _query(self, question: str, strategy: str):
 
         # 1️⃣ Metadata Shortcut
-        if self.is_metadata_query(question):
-            answer_text, citations = self.handle_metadata_query()
+        intent = self._route_metadata(question)
+        if intent is not None:
+            metadata = self.handle_metadata_query(intent)
             return {
                 "question": question,
-                "answer": answer_text,
-                "citations": citations,
-                "citation_map": {},
-                "retrieved_chunks": []
+                "answer": metadata["answer"],
+                "citations": metadata["citations"],
+                "citation_map": metadata["citation_map"],
+                "retrieved_chunks": [],
+                "metadata": metadata["result"]
             }
 
         # 2️⃣ Retrieval
-        results = self.retriever.retrieve(question, top_k=20)
-        retrieved_chunks = self._parse_retrieval_results(results)
+        retrieved_chunks = self._retrieve(question)
 
         # 3️⃣ Generation
         answer_data = self.generator.generate(
@@ -164,4 +214,144 @@ class RAGPipeline:
             "citations": answer_data.get("citations", []),
             "citation_map": answer_data.get("citation_map", {}),
             "retrieved_chunks": retrieved_chunks
-        }
\ No newline at end of file
+        }
+
+    # ==========================================================
+    # ⚖️ Multi-Strategy Comparison
+    # ==========================================================
+    def _generate_timed(self, question: str, retrieved_chunks: list, strategy: str):
+        start = time.perf_counter()
+
+        try:
+            # Saved per strategy when streamed; part of compare()'s total otherwise
+            with track_usage("compare", label=question):
+                answer_data = self.generator.generate(
+                    question,
+                    retrieved_chunks,
+                    strategy=strategy
+                )
+            error = None
+        except Exception as e:
+            answer_data = {}
+            error = str(e)
+
+        usage = answer_data.get("usage", {})
+
+        return {
+            "strategy": strategy,
+            "answer": answer_data.get("answer"),
+            "citations": answer_data.get("citations", []),
+            "citation_map": answer_data.get("citation_map", {}),
+            "latency_ms": round((time.perf_counter() - start) * 1000, 1),
+            "prompt_tokens": usage.get("prompt_tokens", 0),
+            "completion_tokens": usage.get("completion_tokens", 0),
+            "error": error
+        }
+
+    def compare_stream(self, question: str, strategies: list[str] = None):
+        """
+        Retrieve once, then run every strategy concurrently on the same
+        context. Returns (retrieved_chunks, iterator) where the iterator
+        yields each strategy's result as soon as it completes.
+        """
+        strategies = strategies or self.generator.prompts.strategies()
+
+        # Validate up front so a typo fails before any API call
+        for strategy in strategies:
+            self.generator.prompts.get(strategy)
+
+        intent = self._route_metadata(question)
+        if intent is not None:
+            metadata = self.handle_metadata_query(intent)
+
+            def metadata_results():
+                for strategy in strategies:
+                    yield {
+                        "strategy": strategy,
+                        "answer": metadata["answer"],
+                        "citations": metadata["citations"],
+                        "citation_map": metadata["citation_map"],
+                        "latency_ms": 0.0,
+                        "prompt_tokens": 0,
+                        "completion_tokens": 0,
+                        "error": None
+                    }
+
+            return [], metadata_results()
+
+        with track_usage("compare", label=question):
+            retrieved_chunks = self._retrieve(question)
+
+        def results():
+            with ThreadPoolExecutor(max_workers=len(strategies)) as pool:
+                # Each worker runs in a copy of the caller's context so its
+                # spans nest under the active comparison span.
+                futures = [
+                    pool.submit(
+                        contextvars.copy_context().run,
+                        self._generate_timed,
+                        question,
+                        retrieved_chunks,
+                        strategy
+                    )
+                    for strategy in strategies
+                ]
+                for future in as_completed(futures):
+                    yield future.result()
+
+        return retrieved_chunks, results()
+
+    def compare(self, question: str, strategies: list[str] = None):
+        """
+        Answer the question with several prompt strategies side by side.
+        Costs one retrieval and the wall time of the slowest LLM call.
+        """
+        start = time.perf_counter()
+        strategies = strategies or self.generator.prompts.strategies()
+
+        def run():
+            with track_usage("compare", label=question) as usage:
+                retrieved_chunks, results = self.compare_stream(question, strategies)
+                by_strategy = {result["strategy"]: result for result in results}
+            return {
+                "results": [by_strategy[strategy] for strategy in strategies],
+                "retrieved_chunks": retrieved_chunks,
+                "usage": usage.summary()
+            }
+
+        with tracer.start_as_current_span("rag.compare") as span:
+            span.set_attribute("compare.strategies", strategies)
+            result, collapsed = self.flight.do(
+                flight_key(question, "compare", tuple(strategies)),
+                run
+            )
+            span.set_attribute("single_flight.collapsed", collapsed)
+
+        return {
+            "question": question,
+            **result,
+            "wall_ms": round((time.perf_counter() - start) * 1000, 1)
+        }
+
+
+# ==========================================================
+# 🌐 Process-wide shared pipeline
+# ==========================================================
+_shared_pipeline = None
+_shared_lock = threading.Lock()
+
+
+def get_shared_pipeline() -> RAGPipeline:
+    """
+    One pipeline (Chroma client, OpenAI clients, prompt registry) per
+    process. Its components are safe to use from concurrent threads;
+    the lock only guards construction.
+    """
+    global _shared_pipeline
+
+    if _shared_pipeline is None:
+        with _shared_lock:
+            if _shared_pipeline is None:
+                _shared_pipeline = RAGPipeline()
+
+    return _shared_pipeline
@@ -0,0 +1,213 @@
+"""
+reindex.py — Zero-downtime re-indexing and collection management.
+
+Builds a new version of the collection next to the live one, validates
+it and flips the active pointer; the API and the Streamlit app switch
+over on their next query, without a restart.
+
+Usage:
+    python -m src.reindex
+    python -m src.reindex --chunk-size 256 --chunk-overlap 25
+    python -m src.reindex --embedding-model text-embedding-3-large
+    python -m src.reindex --status
+    python -m src.reindex --rollback
+    python -m src.reindex --activate papers_v20250101120000000
+    python -m src.reindex --snapshot
+    python -m src.reindex --export exports/papers.parquet
+    python -m src.reindex --import exports/papers.parquet
+    python -m src.reindex --import exports/papers.arrow --into mmap
+
+--snapshot exports the active collection to the read-only mmap snapshot
+served with RC_VECTOR_BACKEND=mmap. Once a snapshot exists, every
+--reset build re-exports it.
+
+--export / --import move the active collection as one Arrow (.arrow) or
+Parquet (.parquet) file. An import becomes a new validated version (or,
+with --into mmap, the mmap snapshot directly), with no PDF parsing and no
+embedding calls.
+"""
+
+from dotenv import load_dotenv
+load_dotenv()
+
+import argparse
+import json
+import sys
+import time
+
+from loguru import logger
+
+from src.ingest import CHROMA_DIR, COLLECTION_NAME, ingest, publish_version
+from src.vectorstore.arrow_io import TableCollection, bulk_load, export_collection, read_table
+from src.vectorstore.chroma_store import ChromaVectorStore
+from src.vectorstore.collections import is_version_of, list_versions, version_name
+from src.vectorstore.mmap_store import export_snapshot, read_current, snapshot_root
+
+
+def status(vectorstore: ChromaVectorStore, alias: str) -> dict:
+    entry = vectorstore.pointer.entry(alias, force=True)
+    active = entry.get("active") or alias
+
+    versions = []
+    for name in list_versions(vectorstore.client, alias):
+        collection = vectorstore.client.get_collection(name)
+        versions.append({
+            "name": name,
+            "chunks": collection.count(),
+            "active": name == active,
+            "previous": name == entry.get("previous"),
+            **{k: v for k, v in (collection.metadata or {}).items() if k != "hnsw:space"},
+        })
+
+    return {
+        "alias": alias,
+        "mmap_snapshot": read_current(snapshot_root(vectorstore.persist_directory, alias)) or None,
+        "active": active,
+        "previous": entry.get("previous"),
+        "activated_at": entry.get("activated_at"),
+        "versions": versions,
+        "history": entry.get("history", []),
+    }
+
+
+def activate(vectorstore: ChromaVectorStore, alias: str, name: str) -> dict:
+    """Point the alias at an existing version (manual roll forward/back)."""
+    if not is_version_of(name, alias) or name not in list_versions(vectorstore.client, alias):
+        raise ValueError(f"'{name}' is not a version of '{alias}'.")
+    return vectorstore.pointer.activate(alias, name, manual=True)
+
+
+def import_index(
+    path,
+    alias: str = COLLECTION_NAME,
+    into: str = "chroma",
+    persist_directory: str = CHROMA_DIR,
+    keep_versions: int = 2,
+    allow_shrink: bool = False
+) -> dict:
+    """
+    Load an exported file as the new active version of `alias`
+    (into="chroma") or as a new mmap snapshot generation (into="mmap").
+    """
+    started = time.perf_counter()
+    source = TableCollection(read_table(path))
+    logger.info(f"Importing {source.count()} chunks of {source.name} ({source.metadata})")
+
+    if into == "mmap":
+        manifest = export_snapshot(source, persist_directory, alias=alias)
+        return {
+            "into": "mmap",
+            "generation": manifest["generation"],
+            "chunks": manifest["count"],
+            "activated": True,
+            "seconds": round(time.perf_counter() - started, 3),
+        }
+
+    vectorstore = ChromaVectorStore(persist_directory=persist_directory)
+    active = vectorstore.open_active(alias)
+    target = version_name(alias)
+
+    rows = bulk_load(source, vectorstore, target)
+    paper_ids = source.table.column("paper_id").to_pylist() if "paper_id" in source.table.column_names else []
+
+    validation = publish_version(
+        vectorstore,
+        alias,
+        active,
+        expected_chunks=rows,
+        expected_papers=set(paper_ids),
+        persist_directory=persist_directory,
+        allow_shrink=allow_shrink,
+        keep_versions=keep_versions,
+        imported_from=str(path),
+        **source.metadata
+    )
+
+    return {
+        "into": "chroma",
+        "collection": target,
+        "chunks": rows,
+        "activated": validation["ok"],
+        "validation": validation,
+        "seconds": round(time.perf_counter() - started, 3),
+    }
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Blue/green re-indexing of the papers collection")
+    parser.add_argument("--collection", default=COLLECTION_NAME)
+    parser.add_argument("--chunk-size", type=int, default=512)
+    parser.add_argument("--chunk-overlap", type=int, default=50)
+    parser.add_argument("--embedding-model", default="text-embedding-3-small")
+    parser.add_argument("--keep-versions", type=int, default=2,
+                        help="Versions to keep after a flip (active + previous at least)")
+    parser.add_argument("--allow-shrink", action="store_true",
+                        help="Activate even if the new version covers fewer papers")
+
+    action = parser.add_mutually_exclusive_group()
+    action.add_argument("--status", action="store_true", help="Show active/previous and all versions")
+    action.add_argument("--rollback", action="store_true", help="Swap back to the previous version")
+    action.add_argument("--activate", metavar="NAME", help="Make an existing version active")
+    action.add_argument("--snapshot", action="store_true", help="Export the active collection as an mmap snapshot")
+    action.add_argument("--export", metavar="PATH", help="Write the active collection to .arrow/.parquet")
+    action.add_argument("--import", dest="import_path", metavar="PATH", help="Load an exported .arrow/.parquet file")
+    parser.add_argument("--into", choices=["chroma", "mmap"], default="chroma",
+                        help="Where --import loads into")
+
+    args = parser.parse_args()
+
+    if args.export:
+        collection = ChromaVectorStore(persist_directory=CHROMA_DIR).open_active(args.collection)
+        info = export_collection(collection, args.export)
+        print(json.dumps(info, indent=2))
+        sys.exit(0)
+
+    if args.import_path:
+        summary = import_index(
+            args.import_path,
+            alias=args.collection,
+            into=args.into,
+            keep_versions=args.keep_versions,
+            allow_shrink=args.allow_shrink
+        )
+        print(json.dumps(summary, indent=2, default=str))
+        sys.exit(0 if summary["activated"] else 1)
+
+    if args.status or args.rollback or args.activate or args.snapshot:
+        vectorstore = ChromaVectorStore(persist_directory=CHROMA_DIR)
+        try:
+            if args.snapshot:
+                collection = vectorstore.open_active(args.collection)
+                manifest = export_snapshot(collection, CHROMA_DIR, alias=args.collection)
+                logger.success(f"Snapshot generation {manifest['generation']}: {manifest['count']} vectors of {collection.name}")
+            elif args.rollback:
+                entry = vectorstore.pointer.rollback(args.collection)
+                logger.success(f"Rolled back '{args.collection}' to {entry['active']}")
+            elif args.activate:
+                entry = activate(vectorstore, args.collection, args.activate)
+                logger.success(f"Activated {entry['active']} for '{args.collection}'")
+
+            # Keep an existing mmap snapshot in step with the pointer
+            if (args.rollback or args.activate) and read_current(snapshot_root(CHROMA_DIR, args.collection)):
+                collection = vectorstore.open_active(args.collection)
+                export_snapshot(collection, CHROMA_DIR, alias=args.collection)
+        except ValueError as e:
+            logger.error(str(e))
+            sys.exit(1)
+
+        print(json.dumps(status(vectorstore, args.collection), indent=2, default=str))
+        sys.exit(0)
+
+    summary = ingest(
+        chunk_size=args.chunk_size,
+        chunk_overlap=args.chunk_overlap,
+        reset=True,
+        collection_name=args.collection,
+        embedding_model=args.embedding_model,
+        keep_versions=args.keep_versions,
+        allow_shrink=args.allow_shrink
+    )
+    print(json.dumps(summary, indent=2, default=str))
+
+    if not summary["activated"]:
+        sys.exit(1)
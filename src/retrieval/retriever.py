@@ -1,5 +1,16 @@
+import threading
+
+from loguru import logger
+
+from src.config import EMBED_BATCH_MAX_SIZE, EMBED_BATCH_SEARCH, EMBED_BATCH_WINDOW_MS, VECTOR_BACKEND
+from src.embedding.batcher import BatchingEmbedder, MicroBatcher
 from src.embedding.embedder import OpenAIEmbedder
+from src.observability.usage import apportion, attribute, track_usage
 from src.vectorstore.chroma_store import ChromaVectorStore
+from src.observability.tracing import get_tracer
+
+
+tracer = get_tracer()
 
 
 class Retriever:
@@ -7,29 +18,170 @@ class Retriever:
     Handles semantic search over vector database.
     """
 
-    def __init__(self, collection_name: str = "papers"):
-        self.embedder = OpenAIEmbedder()
-        self.vectorstore = ChromaVectorStore()
-        self.vectorstore.create_collection(collection_name)
+    def __init__(
+        self,
+        collection_name: str = "papers",
+        embedder=None,
+        vectorstore=None,
+        batch_window_ms: float = EMBED_BATCH_WINDOW_MS,
+        max_batch_size: int = EMBED_BATCH_MAX_SIZE,
+        batch_search: bool = EMBED_BATCH_SEARCH
+    ):
+        self.collection_name = collection_name
+        self.embedder = embedder or OpenAIEmbedder()
+
+        # The Chroma store is opened on first use (or in warm-up), not here.
+        # collection_name is an alias resolved through the active pointer,
+        # so a blue/green re-index is picked up without a restart.
+        self._vectorstore = vectorstore
+        self._active = None
+        self._lock = threading.Lock()
+
+        # Micro-batching of concurrent queries: either the embedding request
+        # alone, or embedding + one multi-vector Chroma query
+        self.batcher = None
+        if batch_window_ms > 0:
+            if batch_search:
+                self.batcher = MicroBatcher(self._search_batch, batch_window_ms, max_batch_size)
+            else:
+                self.embedder = BatchingEmbedder(self.embedder, batch_window_ms, max_batch_size)
+                self.batcher = self.embedder.batcher
+
+    @property
+    def vectorstore(self):
+        self.resolve()
+        return self._vectorstore
+
+    def resolve(self):
+        """
+        The active collection (a Chroma collection or an mmap snapshot)
+        and the embedding model it was built with. A query embeds with
+        that model and searches that collection, so a flip in between
+        never pairs a vector with the wrong index.
+        """
+        if self._vectorstore is None:
+            with self._lock:
+                if self._vectorstore is None:
+                    if VECTOR_BACKEND == "mmap":
+                        from src.vectorstore.mmap_store import MmapVectorStore
+                        self._vectorstore = MmapVectorStore()
+                    else:
+                        self._vectorstore = ChromaVectorStore()
+
+        collection = self._vectorstore.open_active(self.collection_name)
+        model = (collection.metadata or {}).get("embedding_model") or self.embedder.model
+
+        if collection.name != self._active:
+            with self._lock:
+                if collection.name != self._active:
+                    if self._active is not None:
+                        logger.info(f"Retriever switched to collection {collection.name} ({model})")
+                    self._active = collection.name
+        return collection, model
+
+    @property
+    def active_collection(self):
+        return self._active
+
+    def store_info(self) -> dict:
+        """Backend, active collection and (mmap) snapshot generation, for /metrics."""
+        return {
+            "backend": type(self._vectorstore).__name__ if self._vectorstore is not None else None,
+            "collection": self._active,
+            "generation": getattr(self._vectorstore, "generation", None),
+        }
 
     def retrieve(self, query: str, top_k: int = 5):
         """
         Convert query into embedding and search similar chunks.
         """
+        if self.batcher is not None and not isinstance(self.embedder, BatchingEmbedder):
+            with tracer.start_as_current_span("retrieval.batched_search") as span:
+                span.set_attribute("retrieval.top_k", top_k)
+                (results, tokens, estimated, model), batch_size, wait_ms = self.batcher.submit((query, top_k))
+                span.set_attribute("query.batch_size", batch_size)
+                span.set_attribute("batch.wait_ms", round(wait_ms, 3))
+            attribute("embedding", model, tokens, estimated=estimated)
+            return results
 
-        query_embedding = self.embedder.embed_query(query)
+        collection, model = self.resolve()
 
-        results = self.vectorstore.query(
-            query_embedding=query_embedding,
-            n_results=top_k
-        )
+        with tracer.start_as_current_span("retrieval.embed_query") as span:
+            span.set_attribute("embedding.model", model)
+            span.set_attribute("query.chars", len(query))
+            query_embedding = self.embedder.embed_query(query, model=model)
+
+        with tracer.start_as_current_span("retrieval.vector_search") as span:
+            span.set_attribute("retrieval.top_k", top_k)
+            results = self._vectorstore.query(
+                query_embedding=query_embedding,
+                n_results=top_k,
+                collection=collection
+            )
+            span.set_attribute(
+                "retrieval.result_count",
+                len((results or {}).get("ids", [[]])[0])
+            )
 
         if not results or "documents" not in results:
+            return {}
+
+        return results
+
+    def retrieve_batch(self, queries: list[str], top_k: int = 5, resolved: tuple = None) -> list[dict]:
+        """
+        Embed all queries in one request and search them in one Chroma call.
+        `resolved` is a (collection, model) pair from resolve().
+        Returns one result dict per query, shaped like retrieve().
+        """
+        if not queries:
             return []
 
-        documents = results["documents"]
+        collection, model = resolved or self.resolve()
+
+        with tracer.start_as_current_span("retrieval.embed_query") as span:
+            span.set_attribute("embedding.model", model)
+            span.set_attribute("query.batch_size", len(queries))
+            query_embeddings = self.embedder.embed_texts(queries, model=model)
+
+        with tracer.start_as_current_span("retrieval.vector_search") as span:
+            span.set_attribute("retrieval.top_k", top_k)
+            span.set_attribute("query.batch_size", len(queries))
+            results = self._vectorstore.query_batch(
+                query_embeddings=query_embeddings,
+                n_results=top_k,
+                collection=collection
+            )
+
+        keys = [key for key in ("ids", "documents", "metadatas", "distances") if results.get(key)]
+
+        return [
+            {key: [results[key][i]] for key in keys}
+            for i in range(len(queries))
+        ]
+
+    def _search_batch(self, items: list[tuple[str, int]]) -> list[dict]:
+        """
+        MicroBatcher callback: one embedding request and one Chroma query
+        per distinct top_k in the batch. Each result comes with the
+        caller's share of the embedding tokens and the model used.
+        The whole batch searches the collection active when it is sent.
+        """
+        results = [None] * len(items)
+        by_top_k = {}
+
+        for i, (query, top_k) in enumerate(items):
+            by_top_k.setdefault(top_k, []).append(i)
+
+        resolved = self.resolve()
+        with track_usage(isolated=True) as usage:
+            for top_k, positions in by_top_k.items():
+                batch = self.retrieve_batch([items[i][0] for i in positions], top_k=top_k, resolved=resolved)
+                for i, result in zip(positions, batch):
+                    results[i] = result
 
-        if isinstance(documents, list) and len(documents) > 0:
-            return documents[0]
+        shares = apportion(usage.tokens("embedding"), [query for query, _ in items])
+        return [(result, share, usage.estimated, resolved[1]) for result, share in zip(results, shares)]
 
-        return []
\ No newline at end of file
+    def batching_stats(self):
+        return self.batcher.stats() if self.batcher is not None else None
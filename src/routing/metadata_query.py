@@ -0,0 +1,468 @@
+"""
+metadata_query.py — Catalog questions answered without retrieval or the LLM.
+
+A small compiled intent parser (English + Spanish) turns questions such as
+"papers from 2024", "what has Meier published here", "how many papers cover
+sustainability" or "cuántos papers hay por año" into a MetadataIntent, which
+is executed directly against the Catalog indexes.
+
+A question is routed only when it asks to list / count / group explicitly
+("list", "how many", "por año", "do you have"), or names papers with at
+least one resolved filter (year, author, topic) — and nothing else: once
+filters, nouns and filler words are removed, any word left over ("discuss",
+"use", "hablan", an unknown topic) sends it to normal RAG. Anything the
+parser cannot resolve completely returns None.
+"""
+
+import re
+import threading
+from dataclasses import asdict, dataclass
+
+from src.catalog.catalog import get_catalog
+from src.catalog.paper_index import normalize
+from src.config import CATALOG_PATH
+
+
+# ---------------------------------------------------
+# Vocabulary (questions are normalized: lowercase, no accents)
+# ---------------------------------------------------
+PAPER_NOUNS = (
+    r"papers?|articles?|articulos?|documents?|documentos?|publications?|"
+    r"publicaciones?|titles?|titulos?|studies|estudios?|investigaciones?|trabajos?"
+)
+AUTHOR_NOUNS = r"authors?|autor(?:es|as?)?"
+TOPIC_NOUNS = r"topics?|temas?"
+NOUNS = rf"(?:{PAPER_NOUNS}|{AUTHOR_NOUNS}|{TOPIC_NOUNS})"
+
+YEAR = r"((?:19|20)\d{2})"
+
+GROUP_FIELDS = {
+    "year": "year", "years": "year", "ano": "year", "anos": "year",
+    "author": "author", "authors": "author", "autor": "author", "autores": "author",
+    "topic": "topic", "topics": "topic", "tema": "topic", "temas": "topic",
+}
+
+NOT_NAMES = {"the", "a", "an", "el", "la", "los", "las", "un", "una", "each", "cada"}
+
+COUNT_PATTERN = re.compile(
+    rf"\b(?:how many|number of|count(?: of)?|cuant[oa]s|numero de|cantidad de)\b"
+    rf"(?:\s+\w+){{0,2}}?\s+({NOUNS})\b"
+)
+NOUN_PATTERN = re.compile(rf"\b({NOUNS})\b")
+# Explicit requests for a listing: an imperative at the start, "all papers",
+# or asking what the collection holds
+LIST_VERB_PATTERN = re.compile(
+    r"^\W*(?:(?:please|can you|could you|would you|por favor|puedes|podrias)\s+)*"
+    r"(?:list|show(?: me)?|enumerate|give me|get me|lista|listar|listame|muestra|muestrame|"
+    r"mostrar|dame|ensename)\b"
+)
+ALL_PATTERN = re.compile(rf"\b(?:all|every|todos|todas)\s+(?:(?:the|my|los|las|mis)\s+)?(?:{NOUNS})\b")
+AVAILABLE_PATTERN = re.compile(
+    r"\b(?:do you have|have you got|are (?:available|indexed|included|stored|covered)|hay|tienes|"
+    r"tenemos|estan|disponibles?|(?:in|en) (?:the|this|your|el|la|tu) "
+    r"(?:catalog|catalogo|collection|coleccion|database|base de datos|library|biblioteca|index|indice))\b"
+)
+PUBLISHED_PATTERN = re.compile(
+    r"\b(?:published|publish|wrote|written|authored|publico|publicaron|"
+    r"publicado|escribio|escribieron)\b"
+)
+GROUP_PATTERN = re.compile(
+    rf"\b(?:by|per|for each|each|por|por cada|segun)\s+({'|'.join(GROUP_FIELDS)})\b"
+)
+
+# Questions about what the papers *say* belong to RAG, not the catalog
+CONTENT_PATTERN = re.compile(
+    r"\b(?:say|says|said|conclude|concludes|conclusions?|argue|argues|explain|explains|"
+    r"findings|results|methods?|methodology|why|summari[sz]e|summary|recommend|suggest|"
+    r"dicen|dice|concluyen|conclusiones|argumentan|explica|explican|hallazgos|resultados|"
+    r"metodos?|metodologia|por que|resume|resumen|recomiendan|sugieren)\b"
+)
+
+RANGE_PATTERN = re.compile(
+    rf"\b(?:between|from|entre|de|desde)\s+{YEAR}\s*(?:and|to|-|y|a|hasta)\s*{YEAR}\b"
+)
+SINCE_PATTERN = re.compile(rf"\b(?:since|desde|a partir de)\s+(?:el\s+)?{YEAR}\b")
+AFTER_PATTERN = re.compile(rf"\b(?:after|despues de|posteriores a)\s+(?:el\s+)?{YEAR}\b")
+UNTIL_PATTERN = re.compile(rf"\b(?:until|up to|hasta)\s+(?:el\s+)?{YEAR}\b")
+BEFORE_PATTERN = re.compile(rf"\b(?:before|antes de|anteriores a)\s+(?:el\s+)?{YEAR}\b")
+YEAR_PATTERN = re.compile(rf"\b{YEAR}\b")
+
+AUTHOR_CUE_PATTERN = re.compile(
+    r"\b(?:by|written by|authored by|escritos? por|publicados? por|del autor|de la autora)\s+([a-z][\w-]*)"
+)
+TOPIC_CUE_PATTERN = re.compile(
+    r"\b(?:about|on|cover|covers|covering|regarding|related to|sobre|acerca de|"
+    r"tratan|trata|relacionados con)\b"
+)
+
+# Words a catalog question may contain besides filters and nouns. Any other
+# word is a predicate about content ("discuss", "use", "hablan de") -> RAG.
+FILLER_WORDS = frozenset("""
+    the a an of in from by on at about for to and or with all any every each me us please
+    there are is were was be been do does did have has had you we i your our my this that these
+    those here which what who whose s currently total overall can could would get got
+    catalog collection database library index corpus available indexed included stored listed
+    published publish wrote written authored cover covers covering covered regarding related
+    list show enumerate give how many number count
+    el la los las lo un una unos unas de del en y o con que cual cuales quien quienes hay
+    tienes tiene tengo tenemos estan esta son es todos todas todo mis mi tus tu me nos por para
+    sobre acerca catalogo coleccion base datos biblioteca indice disponible disponibles indexados
+    guardados publico publicaron publicado publicados publicadas escribio escribieron escritos
+    escritas escrito tratan trata relacionados relacionadas cuantos cuantas numero cantidad
+    lista listar listame muestra muestrame mostrar dame ensename puedes podrias favor
+""".split())
+WORD_PATTERN = re.compile(r"[a-z0-9]+")
+
+
+@dataclass(frozen=True)
+class MetadataIntent:
+    action: str                  # "list" | "count" | "group"
+    target: str = "papers"       # "papers" | "authors" | "topics"
+    group_by: str = None         # "year" | "author" | "topic"
+    years: tuple = ()            # explicit years (OR-ed)
+    year_min: int = None
+    year_max: int = None
+    authors: tuple = ()          # normalized surnames (AND-ed: co-authorship)
+    topics: tuple = ()           # normalized topics (AND-ed)
+
+    def to_dict(self) -> dict:
+        return asdict(self)
+
+
+class MetadataQueryEngine:
+    """
+    Parses catalog questions into a MetadataIntent and answers them
+    from the Catalog indexes. Name and topic matchers are compiled from
+    the catalog vocabulary and rebuilt only when the catalog changes.
+    """
+
+    def __init__(self, catalog_path=CATALOG_PATH):
+        self.catalog_path = catalog_path
+
+        self._lock = threading.Lock()
+        self._vocab_version = None
+        self._author_pattern = None
+        self._topic_pattern = None
+        self._author_keys = {}
+        self._author_display = {}
+
+    # --------------------------------------------------
+    # Catalog vocabulary
+    # --------------------------------------------------
+    @staticmethod
+    def _alternation(words) -> re.Pattern:
+        words = sorted(words, key=len, reverse=True)
+        if not words:
+            return None
+        return re.compile(rf"\b({'|'.join(re.escape(w) for w in words)})(?:s|es)?\b")
+
+    def _vocabulary(self, catalog):
+        if self._vocab_version == catalog.version:
+            return
+
+        with self._lock:
+            if self._vocab_version == catalog.version:
+                return
+
+            author_keys, author_display = {}, {}
+            for author in catalog.by_author:
+                surname = author.split(",")[0].strip()
+                key = normalize(surname)
+                author_display.setdefault(key, surname)
+                author_keys[key] = key
+                # "Courel" also finds "Courel-Ibáñez"; ambiguous parts are skipped
+                for part in re.split(r"[-\s]+", key):
+                    if len(part) >= 4 and part != key:
+                        author_keys[part] = key if author_keys.get(part, key) == key else None
+
+            self._author_keys = {k: v for k, v in author_keys.items() if v}
+            self._author_display = author_display
+            self._author_pattern = self._alternation(self._author_keys)
+            self._topic_pattern = self._alternation(catalog.by_topic)
+            self._vocab_version = catalog.version
+
+    # --------------------------------------------------
+    # Parsing
+    # --------------------------------------------------
+    @staticmethod
+    def _parse_years(q: str):
+        years, year_min, year_max = [], None, None
+
+        def bound(pattern, apply):
+            nonlocal q
+            for match in pattern.finditer(q):
+                apply(*(int(y) for y in match.groups()))
+            q = pattern.sub(" ", q)
+
+        def set_range(low, high):
+            nonlocal year_min, year_max
+            year_min, year_max = min(low, high), max(low, high)
+
+        def set_min(year, offset=0):
+            nonlocal year_min
+            year_min = year + offset
+
+        def set_max(year, offset=0):
+            nonlocal year_max
+            year_max = year + offset
+
+        bound(RANGE_PATTERN, set_range)
+        bound(SINCE_PATTERN, set_min)
+        bound(AFTER_PATTERN, lambda y: set_min(y, 1))
+        bound(UNTIL_PATTERN, set_max)
+        bound(BEFORE_PATTERN, lambda y: set_max(y, -1))
+
+        years = [int(y) for y in YEAR_PATTERN.findall(q)]
+        return tuple(sorted(set(years))), year_min, year_max, YEAR_PATTERN.sub(" ", q)
+
+    def parse(self, question: str):
+        """
+        MetadataIntent for a catalog question, or None if it should go
+        through retrieval + generation.
+        """
+        q = " ".join(normalize(question).split())
+
+        if CONTENT_PATTERN.search(q):
+            return None
+
+        try:
+            catalog = get_catalog(self.catalog_path)
+        except FileNotFoundError:
+            return None
+
+        self._vocabulary(catalog)
+
+        group = GROUP_PATTERN.search(q)
+        group_by = GROUP_FIELDS[group.group(1)] if group else None
+        if group:
+            q = q[:group.start()] + " " + q[group.end():]
+
+        years, year_min, year_max, q = self._parse_years(q)
+
+        # Resolved spans are blanked out; what remains must be filler
+        rest = q
+
+        def blank(match):
+            nonlocal rest
+            rest = rest[:match.start()] + " " * (match.end() - match.start()) + rest[match.end():]
+
+        authors = []
+        if self._author_pattern:
+            for match in self._author_pattern.finditer(q):
+                authors.append(self._author_keys[match.group(1)])
+                blank(match)
+        # "papers by Someone" with a name the catalog has never seen: zero matches, not RAG
+        for match in AUTHOR_CUE_PATTERN.finditer(q):
+            name = match.group(1)
+            if name not in NOT_NAMES and name not in self._author_keys and not re.fullmatch(NOUNS, name):
+                authors.append(name)
+                blank(match)
+
+        topics = []
+        if self._topic_pattern:
+            for match in self._topic_pattern.finditer(q):
+                topics.append(match.group(1))
+                blank(match)
+        # A topic we cannot resolve means we cannot answer correctly from the catalog
+        if not topics and TOPIC_CUE_PATTERN.search(q):
+            return None
+
+        nouns = [match.group(1) for match in NOUN_PATTERN.finditer(rest)]
+        if any(word not in FILLER_WORDS for word in WORD_PATTERN.findall(NOUN_PATTERN.sub(" ", rest))):
+            return None
+
+        count = COUNT_PATTERN.search(q)
+        noun = nouns[0] if nouns else None
+        has_filters = bool(years or year_min or year_max or authors or topics)
+        explicit = LIST_VERB_PATTERN.search(q) or ALL_PATTERN.search(q) or AVAILABLE_PATTERN.search(q)
+
+        if count:
+            action, noun = "count", count.group(1)
+        elif group_by and noun:
+            action = "group"
+        elif noun and (explicit or has_filters):
+            action = "list"
+        elif PUBLISHED_PATTERN.search(q) and authors:
+            action, noun = "list", "papers"
+        else:
+            return None
+
+        if group_by:
+            action = "group"
+
+        if re.fullmatch(AUTHOR_NOUNS, noun):
+            target = "authors"
+        elif re.fullmatch(TOPIC_NOUNS, noun):
+            target = "topics"
+        else:
+            target = "papers"
+
+        return MetadataIntent(
+            action=action,
+            target=target,
+            group_by=group_by,
+            years=years,
+            year_min=year_min,
+            year_max=year_max,
+            authors=tuple(dict.fromkeys(authors)),
+            topics=tuple(dict.fromkeys(topics)),
+        )
+
+    # --------------------------------------------------
+    # Execution
+    # --------------------------------------------------
+    @staticmethod
+    def _select(catalog, intent: MetadataIntent) -> list:
+        candidates = None
+
+        def narrow(papers):
+            nonlocal candidates
+            ids = {paper.id for paper in papers}
+            candidates = ids if candidates is None else candidates & ids
+
+        if intent.years or intent.year_min is not None or intent.year_max is not None:
+            narrow(
+                paper
+                for year, papers in catalog.by_year.items()
+                if (not intent.years or year in intent.years)
+                and (intent.year_min is None or year >= intent.year_min)
+                and (intent.year_max is None or year <= intent.year_max)
+                for paper in papers
+            )
+
+        for author in intent.authors:
+            narrow(catalog.by_author_name(author))
+
+        for topic in intent.topics:
+            narrow(catalog.by_topic_name(topic))
+
+        if candidates is None:
+            return list(catalog.papers)
+
+        return [paper for paper in catalog.papers if paper.id in candidates]
+
+    def _describe(self, intent: MetadataIntent) -> str:
+        parts = []
+
+        if intent.years:
+            parts.append("from " + ", ".join(str(y) for y in intent.years))
+        if intent.year_min is not None and intent.year_max is not None:
+            parts.append(f"between {intent.year_min} and {intent.year_max}")
+        elif intent.year_min is not None:
+            parts.append(f"since {intent.year_min}")
+        elif intent.year_max is not None:
+            parts.append(f"up to {intent.year_max}")
+        if intent.authors:
+            names = [self._author_display.get(a, a.title()) for a in intent.authors]
+            parts.append("by " + " & ".join(names))
+        if intent.topics:
+            parts.append("on " + " & ".join(intent.topics))
+
+        return (" " + " ".join(parts)) if parts else ""
+
+    @staticmethod
+    def _groups(papers: list, field: str) -> list[dict]:
+        groups = {}
+
+        for paper in papers:
+            if field == "year":
+                keys = [paper.year] if paper.year is not None else []
+            elif field == "author":
+                keys = paper.authors
+            else:
+                keys = paper.topics
+
+            for key in keys:
+                groups.setdefault(key, []).append(paper.id)
+
+        if field == "year":
+            ordered = sorted(groups.items(), key=lambda item: item[0], reverse=True)
+        else:
+            ordered = sorted(groups.items(), key=lambda item: (-len(item[1]), str(item[0])))
+
+        return [{"key": key, "count": len(ids), "paper_ids": ids} for key, ids in ordered]
+
+    @staticmethod
+    def _citations(papers: list):
+        citations, citation_map = [], {}
+
+        for i, paper in enumerate(papers, 1):
+            citation_text = f"{', '.join(paper.authors)} ({paper.year}). {paper.title}."
+            citation_map[i] = citation_text
+            citations.append(f"[{i}] {citation_text}")
+
+        return citations, citation_map
+
+    def execute(self, intent: MetadataIntent) -> dict:
+        """
+        Run an intent against the catalog. Returns answer (markdown),
+        citations, citation_map and the structured result.
+        """
+        catalog = get_catalog(self.catalog_path)
+        self._vocabulary(catalog)
+
+        papers = self._select(catalog, intent)
+        desc = self._describe(intent)
+        result = {
+            "intent": intent.to_dict(),
+            "count": len(papers),
+            "paper_ids": [paper.id for paper in papers],
+        }
+
+        if intent.action == "group":
+            label = intent.group_by.capitalize()
+            groups = self._groups(papers, intent.group_by)
+            result["groups"] = groups
+
+            rows = [f"| {g['key']} | {g['count']} |" for g in groups]
+            answer = "\n".join([
+                f"Papers{desc} by {intent.group_by} ({len(papers)} total):",
+                "",
+                f"| {label} | Papers |",
+                "|---|---|",
+                *rows,
+            ]) if papers else f"No papers{desc} in the catalog."
+
+        elif intent.target in ("authors", "topics"):
+            field = intent.target[:-1]
+            groups = self._groups(papers, field)
+            result["groups"] = groups
+            noun = intent.target if len(groups) != 1 else field
+
+            if intent.action == "count":
+                answer = f"**{len(groups)}** distinct {noun}{desc}."
+            elif groups:
+                lines = [
+                    f"{i}. {g['key']} — {g['count']} paper{'s' if g['count'] != 1 else ''}"
+                    for i, g in enumerate(groups, 1)
+                ]
+                answer = f"{len(groups)} {noun}{desc}:\n\n" + "\n".join(lines)
+            else:
+                answer = f"No {intent.target}{desc} in the catalog."
+
+        elif intent.action == "count":
+            noun = "paper" if len(papers) == 1 else "papers"
+            answer = f"**{len(papers)}** {noun}{desc}."
+
+        elif papers:
+            lines = []
+            for i, paper in enumerate(papers, 1):
+                author_str = ", ".join(paper.authors[:2])
+                if len(paper.authors) > 2:
+                    author_str += " et al."
+                lines.append(f"{i}. **{paper.title}** — {author_str} ({paper.get('year', 'N/A')})")
+
+            noun = "paper" if len(papers) == 1 else "papers"
+            answer = f"{len(papers)} {noun}{desc}:\n\n" + "\n".join(lines)
+
+        else:
+            answer = f"No papers{desc} in the catalog."
+
+        citations, citation_map = self._citations(papers)
+
+        return {
+            "answer": answer,
+            "citations": citations,
+            "citation_map": citation_map,
+            "result": result,
+        }
@@ -1,26 +1,16 @@
-import json
-import os
+from src.catalog.catalog import get_catalog
+from src.config import CATALOG_PATH
 
-# Ajustamos la ruta porque estamos dentro de src
-path = os.path.join(
-    os.path.dirname(os.path.dirname(__file__)),
-    "papers",
-    "paper_catalog.json"
-)
-
-if not os.path.exists(path):
+if not CATALOG_PATH.exists():
     print("❌ paper_catalog.json NOT FOUND")
-    print("Buscado en:", path)
+    print("Buscado en:", CATALOG_PATH)
     exit()
 
-with open(path, "r", encoding="utf-8") as f:
-    catalog = json.load(f)
-
-papers = catalog.get("papers", [])
+papers = get_catalog().papers
 
 if not papers:
     print("⚠ No papers found in catalog.")
 else:
     print("✅ Titles found:\n")
     for paper in papers:
-        print("-", paper.get("title", "No Title"))
\ No newline at end of file
+        print("-", paper.get("title", "No Title"))
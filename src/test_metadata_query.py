@@ -0,0 +1,46 @@
+import sys
+
+from src.routing.metadata_query import MetadataQueryEngine
+
+# Answered from the catalog indexes (no retrieval, no LLM)
+ROUTED = [
+    "papers from 2024",
+    "list all papers",
+    "What papers do you have?",
+    "how many papers cover sustainability",
+    "cuántos papers hay por año",
+    "Which papers are about human rights?",
+    "Show me papers on machine learning from 2025",
+    "What topics are covered?",
+    "qué papers hay sobre doping violations",
+    "Are there papers about gender equality?",
+    "lista los papers de 2026",
+]
+
+# Questions about what the papers say: must go through RAG
+NOT_ROUTED = [
+    "Which papers discuss doping among athletes?",
+    "Qué papers hablan de dopaje?",
+    "What do studies show about physical activity during COVID?",
+    "Which studies use machine learning?",
+    "Is there any paper that mentions human rights?",
+    "What documents talk about Brazil?",
+    "List the papers that discuss doping",
+    "How many papers discuss doping?",
+    "What are the main findings on doping?",
+]
+
+engine = MetadataQueryEngine()
+failures = 0
+
+for question in ROUTED + NOT_ROUTED:
+    intent = engine.parse(question)
+    expected = question in ROUTED
+    ok = (intent is not None) == expected
+    failures += not ok
+    route = f"{intent.action} {intent.target}" if intent else "RAG"
+    print(f"{'✅' if ok else '❌'} {question} -> {route}")
+
+if failures:
+    print(f"\n{failures} question(s) routed incorrectly.")
+    sys.exit(1)
@@ -0,0 +1,144 @@
+"""
+http.py — One pooled HTTP transport for every OpenAI client.
+
+The embedding and chat paths share a process-wide httpx.Client (and an
+httpx.AsyncClient for async callers) with keep-alive pooling, explicit
+connect/read/pool timeouts and connection limits, so TLS sessions are
+reused instead of being opened per client. Retries are bounded and use
+the OpenAI SDK's exponential backoff with jitter (honouring Retry-After).
+Every embeddings / chat request first waits for its turn in the
+rate-limit scheduler (see rate_limit.py).
+"""
+
+import threading
+
+import httpx
+
+from src.config import (
+    HTTP_CONNECT_TIMEOUT,
+    HTTP_KEEPALIVE_EXPIRY,
+    HTTP_MAX_CONNECTIONS,
+    HTTP_MAX_KEEPALIVE,
+    HTTP_MAX_RETRIES,
+    HTTP_POOL_TIMEOUT,
+    HTTP_READ_TIMEOUT,
+    OPENAI_BASE_URL,
+)
+from src.transport.rate_limit import async_event_hooks, event_hooks
+
+
+_lock = threading.RLock()  # factories nest (OpenAI client -> httpx client)
+_clients = {}
+
+
+def transport_timeout() -> httpx.Timeout:
+    return httpx.Timeout(
+        connect=HTTP_CONNECT_TIMEOUT,
+        read=HTTP_READ_TIMEOUT,
+        write=HTTP_READ_TIMEOUT,
+        pool=HTTP_POOL_TIMEOUT
+    )
+
+
+def transport_limits() -> httpx.Limits:
+    return httpx.Limits(
+        max_connections=HTTP_MAX_CONNECTIONS,
+        max_keepalive_connections=HTTP_MAX_KEEPALIVE,
+        keepalive_expiry=HTTP_KEEPALIVE_EXPIRY
+    )
+
+
+def openai_client_kwargs() -> dict:
+    """
+    Settings every OpenAI / ChatOpenAI client is built with. The SDK
+    applies its own per-request timeout, so it must be passed explicitly.
+    """
+    return {
+        "base_url": OPENAI_BASE_URL,
+        "max_retries": HTTP_MAX_RETRIES,
+        "timeout": transport_timeout(),
+    }
+
+
+def _shared(name: str, factory):
+    client = _clients.get(name)
+
+    if client is None:
+        with _lock:
+            client = _clients.get(name)
+            if client is None:
+                client = _clients[name] = factory()
+
+    return client
+
+
+# ---------------------------------------------------
+# Raw httpx clients
+# ---------------------------------------------------
+def get_http_client() -> httpx.Client:
+    return _shared("http", lambda: httpx.Client(
+        limits=transport_limits(),
+        timeout=transport_timeout(),
+        event_hooks=event_hooks()
+    ))
+
+
+def get_async_http_client() -> httpx.AsyncClient:
+    """
+    Pooled connections belong to the event loop that opened them, so use
+    this from a single loop (the FastAPI server's).
+    """
+    return _shared("async_http", lambda: httpx.AsyncClient(
+        limits=transport_limits(),
+        timeout=transport_timeout(),
+        event_hooks=async_event_hooks()
+    ))
+
+
+# ---------------------------------------------------
+# OpenAI SDK clients on top of the shared transport
+# ---------------------------------------------------
+def get_openai_client():
+    from openai import OpenAI
+
+    return _shared("openai", lambda: OpenAI(
+        http_client=get_http_client(),
+        **openai_client_kwargs()
+    ))
+
+
+def get_async_openai_client():
+    from openai import AsyncOpenAI
+
+    return _shared("async_openai", lambda: AsyncOpenAI(
+        http_client=get_async_http_client(),
+        **openai_client_kwargs()
+    ))
+
+
+def transport_info() -> dict:
+    """Effective transport settings, for /metrics."""
+    return {
+        "base_url": OPENAI_BASE_URL or "default",
+        "max_connections": HTTP_MAX_CONNECTIONS,
+        "max_keepalive": HTTP_MAX_KEEPALIVE,
+        "connect_timeout_s": HTTP_CONNECT_TIMEOUT,
+        "read_timeout_s": HTTP_READ_TIMEOUT,
+        "max_retries": HTTP_MAX_RETRIES,
+        "clients": sorted(_clients),
+    }
+
+
+async def close_http_clients():
+    with _lock:
+        clients = dict(_clients)
+        _clients.clear()
+
+    for name in ("openai", "http"):
+        if name in clients:
+            clients[name].close()
+
+    if "async_openai" in clients:
+        await clients["async_openai"].close()
+    if "async_http" in clients:
+        await clients["async_http"].aclose()
@@ -0,0 +1,409 @@
+"""
+rate_limit.py — Process-wide scheduler for OpenAI requests.
+
+Every embeddings and chat completions request on the shared transport
+(see http.py) takes a slot from two token buckets of its model: requests
+per minute and tokens per minute. Waiting requests are served by priority
+class, then in arrival order:
+
+    interactive  (default) /ask, the Streamlit app, query embeddings
+    batch        ingest, uploads, re-indexing
+    eval         benchmarks and retrieval evaluation
+
+Batch and eval never take the last RC_RATE_RESERVE of either bucket, so
+a question asked during a large ingest finds capacity immediately
+instead of queueing behind hundreds of embedding batches.
+
+The buckets start from RC_RATE_RPM / RC_RATE_TPM (RC_RATE_LIMITS for
+per-model values) and adopt the x-ratelimit-* headers of every response:
+limits replace the configured ones and the remaining counts (which
+include other processes using the same key) cap the local level. A 429
+pauses the model until its retry-after.
+
+Code sets its class with:
+
+    with request_priority("batch"):
+        embedder.embed_texts(texts)
+"""
+
+import asyncio
+import heapq
+import itertools
+import json
+import re
+import threading
+import time
+from collections import Counter, deque
+from contextlib import contextmanager
+from contextvars import ContextVar
+
+import httpx
+
+from src.config import (
+    RATE_LIMIT_ENABLED,
+    RATE_LIMITS,
+    RATE_RESERVE,
+    RATE_RPM,
+    RATE_TPM,
+)
+
+
+PRIORITIES = {"interactive": 0, "batch": 1, "eval": 2}
+SCHEDULED_PATHS = ("/embeddings", "/chat/completions")
+CHARS_PER_TOKEN = 4
+DEFAULT_COMPLETION_TOKENS = 512
+ASYNC_POLL_S = 0.05
+DURATION_PATTERN = re.compile(r"(\d+(?:\.\d+)?)(ms|h|m|s)")
+DURATION_UNITS = {"ms": 0.001, "s": 1, "m": 60, "h": 3600}
+
+_priority = ContextVar("rate_limit_priority", default="interactive")
+
+
+@contextmanager
+def request_priority(name: str):
+    """
+    Run the block's OpenAI requests under priority class `name`. A nested
+    block never raises the class (ingest inside an eval run stays eval).
+    """
+    if name not in PRIORITIES:
+        raise ValueError(f"Unknown priority '{name}'. Expected one of {list(PRIORITIES)}.")
+    token = _priority.set(max(name, _priority.get(), key=PRIORITIES.get))
+    try:
+        yield
+    finally:
+        _priority.reset(token)
+
+
+def current_priority() -> str:
+    return _priority.get()
+
+
+def parse_duration(value: str) -> float:
+    """OpenAI reset durations ("1s", "6m0s", "20ms", "1h2m3.5s") in seconds."""
+    if not value:
+        return 0.0
+    try:
+        return float(value)
+    except ValueError:
+        return sum(float(n) * DURATION_UNITS[unit] for n, unit in DURATION_PATTERN.findall(value))
+
+
+def estimate_tokens(path: str, body: dict) -> int:
+    """Cheap pre-request estimate (characters / 4) for the TPM bucket."""
+    if path.endswith("/embeddings"):
+        inputs = body.get("input") or []
+        if isinstance(inputs, str):
+            inputs = [inputs]
+        return sum(len(item) if isinstance(item, (str, list)) else 1 for item in inputs) // CHARS_PER_TOKEN + 1
+
+    prompt_chars = sum(len(str(message.get("content", ""))) for message in body.get("messages", []))
+    completion = body.get("max_completion_tokens") or body.get("max_tokens") or DEFAULT_COMPLETION_TOKENS
+    return prompt_chars // CHARS_PER_TOKEN + completion
+
+
+# ---------------------------------------------------
+# Buckets
+# ---------------------------------------------------
+class TokenBucket:
+    """Refills continuously to `capacity` over one minute."""
+
+    def __init__(self, capacity: float):
+        self.capacity = float(capacity)
+        self.level = float(capacity)
+        self.updated = time.monotonic()
+
+    def refill(self, now: float):
+        self.level = min(self.capacity, self.level + (now - self.updated) * self.capacity / 60)
+        self.updated = now
+
+    def wait_for(self, amount: float, floor: float) -> float:
+        """Seconds until `amount` can be taken while leaving `floor`."""
+        missing = amount + floor - self.level
+        return max(missing, 0.0) * 60 / self.capacity
+
+
+class _Waiter:
+    __slots__ = ("priority", "seq", "tokens", "enqueued")
+
+    def __init__(self, priority: int, seq: int, tokens: int):
+        self.priority = priority
+        self.seq = seq
+        self.tokens = tokens
+        self.enqueued = time.monotonic()
+
+    def __lt__(self, other):
+        return (self.priority, self.seq) < (other.priority, other.seq)
+
+
+class ModelLimiter:
+    """RPM and TPM buckets of one model plus its priority queue."""
+
+    def __init__(self, model: str, rpm: float, tpm: float, reserve: float):
+        self.model = model
+        self.requests = TokenBucket(rpm)
+        self.tokens = TokenBucket(tpm)
+        self.reserve = reserve
+        self.paused_until = 0.0
+        self.queue = []
+        self.from_headers = False
+
+    def _floors(self, priority: int) -> tuple[float, float]:
+        if priority == PRIORITIES["interactive"]:
+            return 0.0, 0.0
+        return self.requests.capacity * self.reserve, self.tokens.capacity * self.reserve
+
+    def try_take(self, waiter: _Waiter, now: float) -> float:
+        """
+        Take the waiter's slot if it is first in line and both buckets
+        allow it; returns 0 on success, else the seconds to wait.
+        """
+        if self.queue[0] is not waiter:
+            return ASYNC_POLL_S
+        if now < self.paused_until:
+            return self.paused_until - now
+
+        self.requests.refill(now)
+        self.tokens.refill(now)
+
+        request_floor, token_floor = self._floors(waiter.priority)
+        # A single request larger than the bucket would never fit
+        tokens = min(waiter.tokens, self.tokens.capacity - token_floor)
+        wait = max(
+            self.requests.wait_for(1, request_floor),
+            self.tokens.wait_for(tokens, token_floor)
+        )
+        if wait > 0:
+            return wait
+
+        self.requests.level -= 1
+        self.tokens.level -= tokens
+        heapq.heappop(self.queue)
+        return 0.0
+
+    def update_from_headers(self, headers: httpx.Headers, now: float):
+        limit_requests = headers.get("x-ratelimit-limit-requests")
+        limit_tokens = headers.get("x-ratelimit-limit-tokens")
+        remaining_requests = headers.get("x-ratelimit-remaining-requests")
+        remaining_tokens = headers.get("x-ratelimit-remaining-tokens")
+
+        for bucket, limit, remaining in (
+            (self.requests, limit_requests, remaining_requests),
+            (self.tokens, limit_tokens, remaining_tokens),
+        ):
+            bucket.refill(now)
+            if limit:
+                bucket.capacity = max(float(limit), 1.0)
+                self.from_headers = True
+            if remaining:
+                bucket.level = min(bucket.level, float(remaining))
+
+    def pause(self, seconds: float, now: float):
+        self.paused_until = max(self.paused_until, now + seconds)
+
+
+# ---------------------------------------------------
+# Scheduler
+# ---------------------------------------------------
+class RateLimiter:
+
+    def __init__(
+        self,
+        rpm: float = RATE_RPM,
+        tpm: float = RATE_TPM,
+        limits: dict = None,
+        reserve: float = RATE_RESERVE,
+        window: int = 1000
+    ):
+        self.rpm = rpm
+        self.tpm = tpm
+        self.limits = RATE_LIMITS if limits is None else limits
+        self.reserve = reserve
+        self._models = {}
+        self._condition = threading.Condition()
+        self._seq = itertools.count()
+
+        self.granted = Counter()
+        self.throttled = Counter()
+        self._waits_ms = {name: deque(maxlen=window) for name in PRIORITIES}
+
+    def _limiter(self, model: str) -> ModelLimiter:
+        limiter = self._models.get(model)
+        if limiter is None:
+            configured = self.limits.get(model, {})
+            limiter = self._models[model] = ModelLimiter(
+                model,
+                configured.get("rpm", self.rpm),
+                configured.get("tpm", self.tpm),
+                self.reserve
+            )
+        return limiter
+
+    def _enqueue(self, model: str, tokens: int, priority: str):
+        with self._condition:
+            limiter = self._limiter(model)
+            waiter = _Waiter(PRIORITIES[priority], next(self._seq), tokens)
+            heapq.heappush(limiter.queue, waiter)
+        return limiter, waiter
+
+    def _poll(self, limiter: ModelLimiter, waiter: _Waiter) -> float:
+        with self._condition:
+            wait = limiter.try_take(waiter, time.monotonic())
+            if wait == 0:
+                # The next in line may fit now
+                self._condition.notify_all()
+            return wait
+
+    def _granted(self, waiter: _Waiter, priority: str):
+        waited_ms = (time.monotonic() - waiter.enqueued) * 1000
+        with self._condition:
+            self.granted[priority] += 1
+            self._waits_ms[priority].append(waited_ms)
+
+    def _abandon(self, limiter: ModelLimiter, waiter: _Waiter):
+        with self._condition:
+            if waiter in limiter.queue:
+                limiter.queue.remove(waiter)
+                heapq.heapify(limiter.queue)
+                self._condition.notify_all()
+
+    def acquire(self, model: str, tokens: int, priority: str = None):
+        """Block until a request of `tokens` to `model` may be sent."""
+        priority = priority or current_priority()
+        limiter, waiter = self._enqueue(model, tokens, priority)
+        try:
+            while (wait := self._poll(limiter, waiter)) > 0:
+                with self._condition:
+                    self._condition.wait(timeout=wait)
+        except BaseException:
+            self._abandon(limiter, waiter)
+            raise
+        self._granted(waiter, priority)
+
+    async def aacquire(self, model: str, tokens: int, priority: str = None):
+        """acquire() for the event loop: polls instead of blocking it."""
+        priority = priority or current_priority()
+        limiter, waiter = self._enqueue(model, tokens, priority)
+        try:
+            while (wait := self._poll(limiter, waiter)) > 0:
+                await asyncio.sleep(min(wait, ASYNC_POLL_S))
+        except BaseException:
+            self._abandon(limiter, waiter)
+            raise
+        self._granted(waiter, priority)
+
+    def observe(self, model: str, status_code: int, headers: httpx.Headers):
+        """Adopt the rate-limit headers of a response (and back off on 429)."""
+        now = time.monotonic()
+        with self._condition:
+            limiter = self._limiter(model)
+            limiter.update_from_headers(headers, now)
+
+            if status_code == 429:
+                self.throttled[model] += 1
+                retry_after = parse_duration(headers.get("retry-after", "")) or max(
+                    parse_duration(headers.get("x-ratelimit-reset-requests", "")),
+                    parse_duration(headers.get("x-ratelimit-reset-tokens", "")),
+                    1.0
+                )
+                limiter.pause(retry_after, now)
+
+            self._condition.notify_all()
+
+    def stats(self) -> dict:
+        now = time.monotonic()
+
+        def percentile(values, q):
+            if not values:
+                return 0.0
+            ordered = sorted(values)
+            return round(ordered[min(int(q * len(ordered)), len(ordered) - 1)], 1)
+
+        with self._condition:
+            models = {}
+            for model, limiter in self._models.items():
+                limiter.requests.refill(now)
+                limiter.tokens.refill(now)
+                depth = Counter(waiter.priority for waiter in limiter.queue)
+                models[model] = {
+                    "rpm": limiter.requests.capacity,
+                    "tpm": limiter.tokens.capacity,
+                    "requests_available": round(limiter.requests.level, 1),
+                    "tokens_available": round(limiter.tokens.level),
+                    "limits_from_headers": limiter.from_headers,
+                    "paused_s": round(max(limiter.paused_until - now, 0.0), 2),
+                    "queue_depth": {name: depth[level] for name, level in PRIORITIES.items()},
+                }
+
+            return {
+                "enabled": True,
+                "reserve": self.reserve,
+                "granted": dict(self.granted),
+                "throttled_429": dict(self.throttled),
+                "wait_ms": {
+                    name: {"p50": percentile(waits, 0.5), "p95": percentile(waits, 0.95), "max": percentile(waits, 1.0)}
+                    for name, waits in self._waits_ms.items() if waits
+                },
+                "models": models,
+            }
+
+
+_limiter = RateLimiter()
+
+
+def get_rate_limiter() -> RateLimiter:
+    return _limiter
+
+
+# ---------------------------------------------------
+# httpx event hooks for the shared clients
+# ---------------------------------------------------
+def _scheduled(request: httpx.Request):
+    """(model, estimated tokens) for requests that go through the buckets."""
+    if request.method != "POST" or not request.url.path.endswith(SCHEDULED_PATHS):
+        return None
+    try:
+        body = json.loads(request.content or b"{}")
+    except ValueError:
+        return None
+    model = body.get("model") or "default"
+    request.extensions["rate_limit_model"] = model
+    return model, estimate_tokens(request.url.path, body)
+
+
+def _observe(response: httpx.Response):
+    model = response.request.extensions.get("rate_limit_model")
+    if model is not None:
+        _limiter.observe(model, response.status_code, response.headers)
+
+
+def _on_request(request: httpx.Request):
+    if (scheduled := _scheduled(request)) is not None:
+        _limiter.acquire(*scheduled)
+
+
+async def _aon_request(request: httpx.Request):
+    if (scheduled := _scheduled(request)) is not None:
+        await _limiter.aacquire(*scheduled)
+
+
+async def _aobserve(response: httpx.Response):
+    _observe(response)
+
+
+def event_hooks() -> dict:
+    if not RATE_LIMIT_ENABLED:
+        return {}
+    return {"request": [_on_request], "response": [_observe]}
+
+
+def async_event_hooks() -> dict:
+    if not RATE_LIMIT_ENABLED:
+        return {}
+    return {"request": [_aon_request], "response": [_aobserve]}
+
+
+def rate_limit_stats() -> dict:
+    """Queue depth, waits and current limits, for /metrics."""
+    if not RATE_LIMIT_ENABLED:
+        return {"enabled": False}
+    return _limiter.stats()
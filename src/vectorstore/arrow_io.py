@@ -0,0 +1,182 @@
+"""
+arrow_io.py — Portable Arrow/Parquet export and import of a collection.
+
+One row per chunk:
+    id          string
+    document    string
+    embedding   fixed_size_list<float32>[dim]
+    <metadata>  one typed column per metadata key (paper_id, title, ...)
+
+The schema metadata records how the index was built (embedding model,
+chunking parameters, source collection), so a replica can be stood up
+from the file alone: no PDF parsing and no embedding calls.
+
+`.arrow` files (Arrow IPC) are memory-mapped on import, so embeddings go
+to the store as a zero-copy numpy view; `.parquet` is smaller and decoded
+once. The format is chosen by the file suffix.
+"""
+
+import json
+from datetime import datetime, timezone
+from pathlib import Path
+
+import numpy as np
+import pyarrow as pa
+import pyarrow.ipc as ipc
+import pyarrow.parquet as pq
+
+
+FORMAT_VERSION = "1"
+EXPORT_PAGE_SIZE = 5000
+BASE_COLUMNS = ("id", "document", "embedding")
+
+
+# ---------------------------------------------------
+# Export
+# ---------------------------------------------------
+def collection_to_table(collection) -> pa.Table:
+    count = collection.count()
+    ids, documents, metadatas, pages = [], [], [], []
+
+    for offset in range(0, count, EXPORT_PAGE_SIZE):
+        page = collection.get(
+            limit=EXPORT_PAGE_SIZE,
+            offset=offset,
+            include=["embeddings", "documents", "metadatas"]
+        )
+        ids.extend(page["ids"])
+        documents.extend(page["documents"])
+        metadatas.extend(meta or {} for meta in page["metadatas"])
+        pages.append(np.asarray(page["embeddings"], dtype=np.float32))
+
+    embeddings = np.concatenate(pages) if pages else np.zeros((0, 0), dtype=np.float32)
+    dim = embeddings.shape[1]
+
+    columns = {
+        "id": pa.array(ids, type=pa.string()),
+        "document": pa.array(documents, type=pa.string()),
+        "embedding": pa.FixedSizeListArray.from_arrays(pa.array(embeddings.reshape(-1)), dim),
+    }
+
+    keys = sorted({key for meta in metadatas for key in meta})
+    for key in keys:
+        columns[key] = pa.array([meta.get(key) for meta in metadatas])
+
+    params = dict(collection.metadata or {})
+    params.pop("hnsw:space", None)
+
+    schema_metadata = {
+        "format_version": FORMAT_VERSION,
+        "collection": collection.name,
+        "count": str(count),
+        "dim": str(dim),
+        "exported_at": datetime.now(timezone.utc).isoformat(),
+        "params": json.dumps(params),
+    }
+
+    return pa.table(columns).replace_schema_metadata(schema_metadata)
+
+
+def export_collection(collection, path) -> dict:
+    """Write `collection` to `path` (.parquet or .arrow). Returns its info."""
+    path = Path(path)
+    path.parent.mkdir(parents=True, exist_ok=True)
+    table = collection_to_table(collection)
+
+    tmp = path.with_name(f".{path.name}.tmp")
+    if path.suffix == ".parquet":
+        pq.write_table(table, tmp, compression="zstd")
+    else:
+        with ipc.new_file(tmp, table.schema) as writer:
+            writer.write_table(table)
+    tmp.replace(path)
+
+    return table_info(table)
+
+
+# ---------------------------------------------------
+# Import
+# ---------------------------------------------------
+def read_table(path) -> pa.Table:
+    """Parquet is decoded; Arrow IPC is memory-mapped (zero-copy)."""
+    path = Path(path)
+    if path.suffix == ".parquet":
+        return pq.read_table(path)
+    return ipc.open_file(pa.memory_map(str(path), "r")).read_all()
+
+
+def table_info(table: pa.Table) -> dict:
+    meta = {k.decode(): v.decode() for k, v in (table.schema.metadata or {}).items()}
+    return {
+        "collection": meta.get("collection"),
+        "count": table.num_rows,
+        "dim": int(meta.get("dim", 0)),
+        "exported_at": meta.get("exported_at"),
+        "params": json.loads(meta.get("params", "{}")),
+    }
+
+
+def embedding_matrix(table: pa.Table) -> np.ndarray:
+    """(rows, dim) float32 view over the embedding column, without copying."""
+    column = table.column("embedding").combine_chunks()
+    dim = column.type.list_size
+    values = column.values.to_numpy(zero_copy_only=True)
+    return values[column.offset * dim:(column.offset + len(column)) * dim].reshape(-1, dim)
+
+
+class TableCollection:
+    """
+    A read-only, Chroma-collection-shaped view of an exported table
+    (name, metadata, count(), get()), so anything that consumes a
+    collection (the mmap snapshot exporter, bulk_load) takes it as is.
+    """
+
+    def __init__(self, table: pa.Table):
+        info = table_info(table)
+        self.table = table
+        self.name = info["collection"]
+        self.metadata = info["params"]
+        self.embeddings = embedding_matrix(table)
+        self._metadata_columns = [name for name in table.column_names if name not in BASE_COLUMNS]
+
+    def count(self) -> int:
+        return self.table.num_rows
+
+    def get(self, limit: int = None, offset: int = 0, include=("documents", "metadatas", "embeddings")) -> dict:
+        end = self.table.num_rows if limit is None else min(offset + limit, self.table.num_rows)
+        page = self.table.slice(offset, end - offset)
+
+        result = {"ids": page.column("id").to_pylist()}
+        if "documents" in include:
+            result["documents"] = page.column("document").to_pylist()
+        if "embeddings" in include:
+            result["embeddings"] = self.embeddings[offset:end]
+        if "metadatas" in include:
+            columns = {name: page.column(name).to_pylist() for name in self._metadata_columns}
+            result["metadatas"] = [
+                {name: values[i] for name, values in columns.items() if values[i] is not None}
+                for i in range(page.num_rows)
+            ]
+        return result
+
+
+def bulk_load(source, vectorstore, name: str, batch_size: int = None) -> int:
+    """
+    Load every row of `source` (a TableCollection or any collection) into
+    a new collection `name` of `vectorstore`, in the store's largest
+    accepted batches. Build parameters travel in the collection metadata.
+    Returns the number of rows loaded.
+    """
+    vectorstore.create_collection(name, metadata=source.metadata)
+    batch_size = batch_size or vectorstore.client.get_max_batch_size()
+
+    for offset in range(0, source.count(), batch_size):
+        page = source.get(limit=batch_size, offset=offset)
+        vectorstore.add_documents(
+            ids=page["ids"],
+            documents=page["documents"],
+            embeddings=page["embeddings"],
+            metadatas=page["metadatas"]
+        )
+
+    return source.count()
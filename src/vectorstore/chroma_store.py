@@ -1,5 +1,5 @@
-import chromadb
-from chromadb.config import Settings
+from src.config import CHROMA_DIR
+from src.vectorstore.collections import CollectionPointer
 
 
 class ChromaVectorStore:
@@ -7,18 +7,52 @@ class ChromaVectorStore:
     Handles storage and retrieval of embeddings using ChromaDB.
     """
 
-    def __init__(self, persist_directory: str = "./chroma_db"):
+    def __init__(self, persist_directory: str = str(CHROMA_DIR)):
+        # chromadb is slow to import; only pay for it when a store is built
+        import chromadb
+        from chromadb.config import Settings
+
         self.client = chromadb.PersistentClient(
             path=persist_directory,
             settings=Settings(anonymized_telemetry=False)
         )
+        self.persist_directory = str(persist_directory)
+        self.pointer = CollectionPointer(persist_directory)
         self.collection = None
 
-    def create_collection(self, name: str):
+    def create_collection(self, name: str, metadata: dict = None):
+        """
+        Open (or create) a collection. `metadata` records how it was built
+        (embedding model, chunking) and only applies on creation.
+        """
         self.collection = self.client.get_or_create_collection(
             name=name,
-            metadata={"hnsw:space": "cosine"}
+            metadata={"hnsw:space": "cosine", **(metadata or {})}
         )
+        return self.collection
+
+    def open_active(self, alias: str):
+        """
+        Use the collection `alias` currently points to. Cheap to call per
+        query: the pointer file is stat-ed at most once a second, and the
+        collection is only reopened after a flip.
+        """
+        name = self.pointer.resolve(alias)
+        collection = self.collection
+
+        if collection is None or collection.name != name:
+            if name == alias:
+                collection = self.create_collection(name)
+            else:
+                collection = self.collection = self.client.get_collection(name)
+
+        return collection
+
+    def index_params(self) -> dict:
+        """Build parameters stored with the current collection."""
+        metadata = dict(self.collection.metadata or {})
+        metadata.pop("hnsw:space", None)
+        return metadata
 
     def add_documents(self, ids, documents, embeddings, metadatas):
         self.collection.add(
@@ -28,9 +62,39 @@ class ChromaVectorStore:
             metadatas=metadatas
         )
 
-    def query(self, query_embedding, n_results=5):
-        return self.collection.query(
-            query_embeddings=[query_embedding],
+    def upsert_documents(self, ids, documents, embeddings, metadatas):
+        """
+        Insert or replace chunks by id. Readers keep seeing the old
+        version of a chunk until its replacement is written.
+        """
+        self.collection.upsert(
+            ids=ids,
+            documents=documents,
+            embeddings=embeddings,
+            metadatas=metadatas
+        )
+
+    def paper_chunk_ids(self, paper_id: str) -> list[str]:
+        return self.collection.get(where={"paper_id": paper_id}, include=[])["ids"]
+
+    def delete_documents(self, ids):
+        self.collection.delete(ids=ids)
+
+    def query(self, query_embedding, n_results=5, collection=None):
+        return self.query_batch([query_embedding], n_results=n_results, collection=collection)
+
+    def query_batch(self, query_embeddings, n_results=5, collection=None):
+        """
+        Search several query vectors in one call, in `collection` (as
+        returned by open_active) or the current one.
+        Result lists are nested per query, as returned by Chroma.
+        """
+        collection = collection if collection is not None else self.collection
+        return collection.query(
+            query_embeddings=query_embeddings,
             n_results=n_results,
             include=["documents", "metadatas", "distances"]
-        )
\ No newline at end of file
+        )
+
+    def count(self) -> int:
+        return self.collection.count()
\ No newline at end of file
@@ -0,0 +1,237 @@
+"""
+collections.py — Versioned collections behind an active pointer.
+
+A re-index never touches the live collection: it builds `papers_v<timestamp>`
+next to it, validates it, and then flips the pointer file
+(active_collections.json in the Chroma directory) with an atomic
+os.replace. Readers resolve the alias ("papers") through the pointer, so
+they switch over on their next query. The previous version is kept for
+instant rollback.
+"""
+
+import json
+import os
+import threading
+import time
+from datetime import datetime, timezone
+from pathlib import Path
+
+
+POINTER_NAME = "active_collections.json"
+HISTORY_SIZE = 10
+
+
+def version_name(alias: str) -> str:
+    """New, sortable collection name for a build of `alias`."""
+    stamp = datetime.now(timezone.utc).strftime("%Y%m%d%H%M%S%f")[:-3]
+    return f"{alias}_v{stamp}"
+
+
+def is_version_of(name: str, alias: str) -> bool:
+    # The bare alias is the pre-versioning collection
+    return name == alias or name.startswith(f"{alias}_v")
+
+
+class CollectionPointer:
+    """
+    Maps an alias to its active (and previous) collection.
+    Without a pointer entry the alias is its own collection, so indexes
+    built before versioning keep working untouched.
+    """
+
+    def __init__(self, persist_directory, check_interval: float = 1.0):
+        self.path = Path(persist_directory) / POINTER_NAME
+        self.check_interval = check_interval
+
+        self._lock = threading.Lock()
+        self._checked_at = 0.0
+        self._mtime = None
+        self._data = {}
+
+    # --------------------------------------------------
+    # Reading
+    # --------------------------------------------------
+    def _refresh(self, force: bool = False):
+        """Re-read the file if it changed, at most once per check_interval."""
+        now = time.monotonic()
+        if not force and now - self._checked_at < self.check_interval:
+            return
+
+        with self._lock:
+            self._checked_at = now
+            try:
+                mtime = self.path.stat().st_mtime_ns
+            except FileNotFoundError:
+                self._mtime, self._data = None, {}
+                return
+
+            if mtime != self._mtime:
+                self._data = json.loads(self.path.read_text(encoding="utf-8"))
+                self._mtime = mtime
+
+    def entry(self, alias: str, force: bool = False) -> dict:
+        self._refresh(force)
+        return dict(self._data.get(alias) or {})
+
+    def resolve(self, alias: str) -> str:
+        return self.entry(alias).get("active") or alias
+
+    # --------------------------------------------------
+    # Flipping
+    # --------------------------------------------------
+    def _write(self, data: dict):
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        tmp = self.path.with_name(f".{POINTER_NAME}.tmp")
+        tmp.write_text(json.dumps(data, indent=2), encoding="utf-8")
+        os.replace(tmp, self.path)
+        self._checked_at = 0.0
+
+    def activate(self, alias: str, name: str, **info) -> dict:
+        """
+        Point `alias` at `name`; the current target becomes `previous`.
+        Extra keyword arguments are recorded in the history entry.
+        """
+        self._refresh(force=True)
+        with self._lock:
+            data = dict(self._data)
+            current = dict(data.get(alias) or {})
+            active = current.get("active") or alias
+
+            entry = {
+                "active": name,
+                "previous": active if active != name else current.get("previous"),
+                "activated_at": datetime.now(timezone.utc).isoformat(),
+                "history": ([{"active": name, "at": time.time(), **info}] + current.get("history", []))[:HISTORY_SIZE],
+            }
+            data[alias] = entry
+            self._write(data)
+
+        return entry
+
+    def rollback(self, alias: str) -> dict:
+        """Swap active and previous. Raises ValueError if there is no previous."""
+        previous = self.entry(alias, force=True).get("previous")
+        if not previous:
+            raise ValueError(f"No previous collection recorded for '{alias}'.")
+        return self.activate(alias, previous, rollback=True)
+
+
+# ---------------------------------------------------
+# Version housekeeping
+# ---------------------------------------------------
+def list_versions(client, alias: str) -> list[str]:
+    names = [getattr(c, "name", c) for c in client.list_collections()]
+    return sorted(name for name in names if is_version_of(name, alias))
+
+
+def prune_versions(client, pointer: CollectionPointer, alias: str, keep: int = 2) -> list[str]:
+    """
+    Delete old versions of `alias`, keeping the newest `keep` (at least
+    the active and previous ones). Returns the deleted names.
+    """
+    entry = pointer.entry(alias, force=True)
+    protected = {entry.get("active") or alias, entry.get("previous")}
+
+    versions = list_versions(client, alias)
+    # Newest first; the bare alias (pre-versioning) is the oldest
+    versions.sort(key=lambda name: "" if name == alias else name, reverse=True)
+
+    kept = 0
+    deleted = []
+    for name in versions:
+        if name in protected or kept < keep:
+            kept += 1
+            continue
+        client.delete_collection(name)
+        deleted.append(name)
+
+    return deleted
+
+
+# ---------------------------------------------------
+# Validation before a flip
+# ---------------------------------------------------
+def _paper_ids(collection) -> set:
+    metadatas = collection.get(include=["metadatas"])["metadatas"] or []
+    return {meta.get("paper_id") for meta in metadatas if meta}
+
+
+def validate_collection(
+    collection,
+    expected_chunks: int,
+    expected_papers: set,
+    active=None,
+    sample_size: int = 5,
+    sample_queries: dict = None,
+    embedder=None,
+    allow_shrink: bool = False
+) -> dict:
+    """
+    Checks a freshly built collection before it goes live:
+
+    - chunk count matches what ingestion wrote (and is not zero)
+    - every ingested paper has chunks
+    - it covers at least as many papers as the active collection
+    - sampled chunks find themselves as top hit (index is queryable)
+    - sample queries ({text: expected paper_id or None}) return results;
+      the share that hit their expected paper is reported, not enforced
+
+    Returns {"ok", "errors", "checks"}.
+    """
+    errors = []
+    checks = {}
+
+    count = collection.count()
+    checks["chunks"] = count
+    if count == 0:
+        errors.append("collection is empty")
+    elif count != expected_chunks:
+        errors.append(f"chunk count {count} != {expected_chunks} written")
+
+    papers = _paper_ids(collection)
+    checks["papers"] = len(papers)
+    missing = set(expected_papers) - papers
+    if missing:
+        errors.append(f"{len(missing)} ingested papers have no chunks: {sorted(missing)[:5]}")
+
+    if active is not None and active.name != collection.name:
+        active_papers = _paper_ids(active)
+        checks["active_papers"] = len(active_papers)
+        if len(papers) < len(active_papers) and not allow_shrink:
+            errors.append(f"covers {len(papers)} papers, the active collection {len(active_papers)}")
+
+    # Self-retrieval: a stored vector must come back as its own nearest hit
+    if count:
+        step = max(count // sample_size, 1)
+        sample_ids, sample_vectors = [], []
+        for offset in range(0, count, step)[:sample_size]:
+            got = collection.get(limit=1, offset=offset, include=["embeddings"])
+            sample_ids.extend(got["ids"])
+            sample_vectors.extend(got["embeddings"])
+
+        results = collection.query(query_embeddings=sample_vectors, n_results=1, include=["distances"])
+        hits = sum(
+            1 for chunk_id, ids, distances in zip(sample_ids, results["ids"], results["distances"])
+            if ids and (ids[0] == chunk_id or distances[0] < 1e-6)
+        )
+        checks["self_retrieval"] = f"{hits}/{len(sample_ids)}"
+        if hits < len(sample_ids):
+            errors.append(f"self-retrieval {hits}/{len(sample_ids)}")
+
+    if sample_queries and embedder is not None:
+        texts = list(sample_queries)
+        results = collection.query(
+            query_embeddings=embedder.embed_texts(texts),
+            n_results=5,
+            include=["metadatas"]
+        )
+        empty = sum(1 for ids in results["ids"] if not ids)
+        expected = [(sample_queries[t], metas) for t, metas in zip(texts, results["metadatas"]) if sample_queries[t]]
+        found = sum(1 for paper_id, metas in expected if any(m.get("paper_id") == paper_id for m in metas))
+
+        checks["sample_queries"] = len(texts)
+        checks["sample_query_hit_rate"] = round(found / len(expected), 3) if expected else None
+        if empty:
+            errors.append(f"{empty}/{len(texts)} sample queries returned nothing")
+
+    return {"ok": not errors, "errors": errors, "checks": checks}
@@ -0,0 +1,298 @@
+"""
+mmap_store.py — Read-only, memory-mapped snapshot of the active collection.
+
+Several uvicorn workers each opening Chroma means one HNSW copy and one
+SQLite reader per process. Instead, the active collection is exported to
+flat files that every worker maps read-only, so the vectors live once in
+the page cache no matter how many workers there are:
+
+    <chroma_dir>/mmap/<alias>/
+        CURRENT                   {"generation": 3, "path": "gen_000003_9f2c41ab"}
+        gen_000003_9f2c41ab/
+            manifest.json         count, dim, source collection, build params
+            vectors.f32           N x dim float32, L2-normalised
+            rows.i32              N x 3: paper index, chunk_id, token_count
+            papers.json           paper-level metadata, stored once per paper
+            ids.bin / ids.idx     UTF-8 blob + int64 offsets
+            documents.bin / .idx
+
+Search is exact (one matrix product against the mapped vectors). Each
+export bumps the generation and atomically replaces CURRENT; workers
+notice on their next query and remap. Exports from different processes
+(the reindex CLI, the API's ingestion queue) are serialised by a file
+lock, and the generation that was current before an export is never
+deleted by it, so a reader that just read CURRENT can still open it.
+"""
+
+import json
+import os
+import shutil
+import threading
+import time
+import uuid
+from datetime import datetime, timezone
+from pathlib import Path
+
+import numpy as np
+from filelock import FileLock
+
+from src.config import CHROMA_DIR
+
+
+CURRENT_NAME = "CURRENT"
+LOCK_NAME = ".export.lock"
+ROW_FIELDS = ("chunk_id", "token_count")
+EXPORT_PAGE_SIZE = 5000
+
+
+def snapshot_root(persist_directory, alias: str) -> Path:
+    return Path(persist_directory) / "mmap" / alias
+
+
+def read_current(root: Path) -> dict:
+    try:
+        return json.loads((root / CURRENT_NAME).read_text(encoding="utf-8"))
+    except FileNotFoundError:
+        return {}
+
+
+# ---------------------------------------------------
+# Variable-length strings: one blob + offsets
+# ---------------------------------------------------
+def _write_strings(path: Path, strings: list[str]):
+    offsets = np.zeros(len(strings) + 1, dtype=np.int64)
+    with open(path.with_suffix(".bin"), "wb") as f:
+        for i, text in enumerate(strings):
+            data = (text or "").encode("utf-8")
+            f.write(data)
+            offsets[i + 1] = offsets[i] + len(data)
+    offsets.tofile(path.with_suffix(".idx"))
+
+
+class _Strings:
+
+    def __init__(self, path: Path):
+        self.offsets = np.fromfile(path.with_suffix(".idx"), dtype=np.int64)
+        size = int(self.offsets[-1])
+        self.blob = np.memmap(path.with_suffix(".bin"), dtype=np.uint8, mode="r") if size else b""
+
+    def __getitem__(self, i: int) -> str:
+        start, end = int(self.offsets[i]), int(self.offsets[i + 1])
+        return bytes(self.blob[start:end]).decode("utf-8")
+
+
+# ---------------------------------------------------
+# Export (Chroma -> snapshot)
+# ---------------------------------------------------
+def export_snapshot(collection, persist_directory=str(CHROMA_DIR), alias: str = "papers", keep: int = 2) -> dict:
+    """
+    Write `collection` as a new snapshot generation for `alias` and make
+    it current. Older generations beyond `keep` (at least the new one and
+    the previous) are removed; workers still mapping them keep working
+    (the files stay alive until unmapped).
+    Returns the new manifest.
+    """
+    root = snapshot_root(persist_directory, alias)
+    root.mkdir(parents=True, exist_ok=True)
+
+    # Cross-process: the reindex CLI and the API may export at once
+    with FileLock(str(root / LOCK_NAME)):
+        return _export(collection, root, keep)
+
+
+def _export(collection, root: Path, keep: int) -> dict:
+    # Only one exporter runs at a time: temp dirs left here are from crashed exports
+    for stale in root.glob(".gen_*.tmp"):
+        shutil.rmtree(stale, ignore_errors=True)
+
+    generation = int(read_current(root).get("generation", 0)) + 1
+    out = root / f"gen_{generation:06d}_{uuid.uuid4().hex[:8]}"
+    tmp = root / f".{out.name}.tmp"
+    tmp.mkdir()
+
+    count = collection.count()
+    vectors = None
+    ids, documents, rows = [], [], []
+    papers, paper_index = [], {}
+
+    for offset in range(0, count, EXPORT_PAGE_SIZE):
+        page = collection.get(
+            limit=EXPORT_PAGE_SIZE,
+            offset=offset,
+            include=["embeddings", "documents", "metadatas"]
+        )
+        embeddings = np.asarray(page["embeddings"], dtype=np.float32)
+
+        if vectors is None:
+            vectors = np.memmap(tmp / "vectors.f32", dtype=np.float32, mode="w+", shape=(count, embeddings.shape[1]))
+
+        norms = np.linalg.norm(embeddings, axis=1, keepdims=True)
+        vectors[offset:offset + len(embeddings)] = embeddings / np.maximum(norms, 1e-12)
+
+        for meta in page["metadatas"]:
+            meta = dict(meta or {})
+            row = [int(meta.pop(field, None) or 0) for field in ROW_FIELDS]
+            key = json.dumps(meta, sort_keys=True)
+            if key not in paper_index:
+                paper_index[key] = len(papers)
+                papers.append(meta)
+            rows.append([paper_index[key], *row])
+
+        ids.extend(page["ids"])
+        documents.extend(page["documents"])
+
+    if vectors is not None:
+        vectors.flush()
+        dim = vectors.shape[1]
+        del vectors
+    else:
+        dim = 0
+
+    np.asarray(rows, dtype=np.int32).reshape(-1, 1 + len(ROW_FIELDS)).tofile(tmp / "rows.i32")
+    (tmp / "papers.json").write_text(json.dumps(papers), encoding="utf-8")
+    _write_strings(tmp / "ids", ids)
+    _write_strings(tmp / "documents", documents)
+
+    metadata = dict(collection.metadata or {})
+    metadata.pop("hnsw:space", None)
+    manifest = {
+        "generation": generation,
+        "collection": collection.name,
+        "count": count,
+        "dim": dim,
+        "papers": len(papers),
+        "created_at": datetime.now(timezone.utc).isoformat(),
+        "params": metadata,
+    }
+    (tmp / "manifest.json").write_text(json.dumps(manifest, indent=2), encoding="utf-8")
+    os.replace(tmp, out)
+
+    current = root / f".{CURRENT_NAME}.tmp"
+    current.write_text(json.dumps({"generation": generation, "path": out.name}), encoding="utf-8")
+    os.replace(current, root / CURRENT_NAME)
+
+    # Zero-padded, so names sort by generation; never drop the previous one
+    generations = sorted(p for p in root.glob("gen_*") if p.is_dir())
+    for old in generations[:-max(keep, 2)]:
+        shutil.rmtree(old, ignore_errors=True)
+
+    return manifest
+
+
+# ---------------------------------------------------
+# Read side
+# ---------------------------------------------------
+class Snapshot:
+    """
+    One mapped generation. Exposes `name` and `metadata` like a Chroma
+    collection, so the Retriever can follow it the same way.
+    """
+
+    def __init__(self, path: Path):
+        self.path = path
+        self.manifest = json.loads((path / "manifest.json").read_text(encoding="utf-8"))
+        self.generation = self.manifest["generation"]
+        self.name = self.manifest["collection"]
+        self.metadata = self.manifest["params"]
+
+        count, dim = self.manifest["count"], self.manifest["dim"]
+        self.vectors = (
+            np.memmap(path / "vectors.f32", dtype=np.float32, mode="r", shape=(count, dim))
+            if count else np.zeros((0, dim), dtype=np.float32)
+        )
+        self.rows = np.fromfile(path / "rows.i32", dtype=np.int32).reshape(-1, 1 + len(ROW_FIELDS))
+        self.papers = json.loads((path / "papers.json").read_text(encoding="utf-8"))
+        self.ids = _Strings(path / "ids")
+        self.documents = _Strings(path / "documents")
+
+    def count(self) -> int:
+        return len(self.vectors)
+
+    def metadata_at(self, i: int) -> dict:
+        paper, *values = self.rows[i].tolist()
+        return {**self.papers[paper], **dict(zip(ROW_FIELDS, values))}
+
+    def query(self, query_embeddings, n_results: int = 5) -> dict:
+        queries = np.asarray(query_embeddings, dtype=np.float32)
+        queries = queries / np.maximum(np.linalg.norm(queries, axis=1, keepdims=True), 1e-12)
+
+        k = min(n_results, self.count())
+        result = {"ids": [], "documents": [], "metadatas": [], "distances": []}
+
+        scores = queries @ self.vectors.T if k else np.zeros((len(queries), 0), dtype=np.float32)
+        for row in scores:
+            top = np.argpartition(-row, k - 1)[:k] if k else np.array([], dtype=np.int64)
+            top = top[np.argsort(-row[top], kind="stable")]
+
+            result["ids"].append([self.ids[i] for i in top])
+            result["documents"].append([self.documents[i] for i in top])
+            result["metadatas"].append([self.metadata_at(i) for i in top])
+            # Same scale as Chroma's cosine space
+            result["distances"].append([float(1.0 - row[i]) for i in top])
+
+        return result
+
+
+class MmapVectorStore:
+    """
+    Drop-in, read-only replacement for ChromaVectorStore on the query path
+    (RC_VECTOR_BACKEND=mmap). The snapshot is exported with
+    `python -m src.reindex --snapshot` (and after every --reset build).
+    """
+
+    def __init__(self, persist_directory: str = str(CHROMA_DIR), check_interval: float = 1.0):
+        self.persist_directory = str(persist_directory)
+        self.check_interval = check_interval
+
+        self.collection = None
+        self._alias = None
+        self._lock = threading.Lock()
+        self._checked_at = 0.0
+
+    def _current(self, alias: str) -> Snapshot:
+        root = snapshot_root(self.persist_directory, alias)
+        current = read_current(root)
+        if not current:
+            raise FileNotFoundError(
+                f"No mmap snapshot for '{alias}' in {root}. Run: python -m src.reindex --snapshot"
+            )
+        snapshot = self.collection
+        if snapshot is None or snapshot.generation != current["generation"] or alias != self._alias:
+            try:
+                snapshot = Snapshot(root / current["path"])
+            except FileNotFoundError:
+                # Pruned by exports that finished after CURRENT was read
+                snapshot = Snapshot(root / read_current(root)["path"])
+        return snapshot
+
+    def open_active(self, alias: str) -> Snapshot:
+        """Remap when a newer generation is current (checked once per interval)."""
+        now = time.monotonic()
+        if self.collection is not None and alias == self._alias and now - self._checked_at < self.check_interval:
+            return self.collection
+
+        with self._lock:
+            self._checked_at = now
+            self.collection = self._current(alias)
+            self._alias = alias
+            return self.collection
+
+    def create_collection(self, name: str, metadata: dict = None):
+        return self.open_active(name)
+
+    def index_params(self) -> dict:
+        return dict(self.collection.metadata or {})
+
+    @property
+    def generation(self):
+        return self.collection.generation if self.collection is not None else None
+
+    def query(self, query_embedding, n_results=5, collection=None):
+        return self.query_batch([query_embedding], n_results=n_results, collection=collection)
+
+    def query_batch(self, query_embeddings, n_results=5, collection=None):
+        snapshot = collection if collection is not None else self.collection
+        return snapshot.query(query_embeddings, n_results=n_results)
+
+    def count(self) -> int:
+        return self.collection.count()